@@ -0,0 +1,159 @@
+# AUTO-ATC Playbook v3 - Throughput del action server multi-proceso
+# Levanta rasa/action_workers.py con 1, 2, 4 y 8 workers y mide turnos/s de una acción
+# CPU-bound (validación, búsqueda en el índice del catálogo, RRF y formateo del listado)
+#
+#   python benchmarks/bench_action_workers.py --workers 1 2 4 8 --duration 10 --clients 32
+#
+# El módulo también es el paquete de acciones que cargan los workers
+# (--actions bench_action_workers), así la medición no depende de Postgres ni Qdrant.
+
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from typing import Any, Dict, List, Text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+QUERIES = ["laptop dell", "precio iphone", "auriculares sony", "smart tv samsung", "cafetera", "heladera lg",
+           "notebook gamer", "cargador", "televisor 55", "monitor hp"]
+
+_index = None
+
+
+def catalog_index():
+    """Índice del catálogo sintético, construido una vez por worker"""
+    global _index
+    if _index is None:
+        from bench_catalog_index import make_catalog
+        from catalog_index import CatalogIndex
+        _index = CatalogIndex()
+        _index.build(make_catalog(int(os.getenv("BENCH_CATALOG_SIZE", "20000"))))
+    return _index
+
+
+class ActionBenchListing(Action):
+    """Trabajo de CPU de ActionSearchProduct sin I/O"""
+
+    def name(self) -> Text:
+        return "action_bench_listing"
+
+    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        from hybrid_search import reciprocal_rank_fusion
+        from validators import validate
+
+        query = tracker.latest_message.get("text", "")
+        if not validate(query, "text"):
+            dispatcher.utter_message(text="Consulta inválida")
+            return []
+        index = catalog_index()
+        results = reciprocal_rank_fusion([index.search(query, 10), index.search(query.split()[0], 10)], 5)
+        lines = [f"{i}. {r['title']} - ${r['price']:,.2f} ({r['category']})" for i, r in enumerate(results, 1)]
+        dispatcher.utter_message(text="Encontré estos productos:\n" + "\n".join(lines))
+        return []
+
+
+# En los workers el índice se construye al importar, antes de aceptar conexiones
+if os.getenv("ACTION_WORKER_ID") is not None:
+    catalog_index()
+
+
+def payload(i: int) -> Dict[str, Any]:
+    sender = f"bench-{i}"
+    return {
+        "next_action": "action_bench_listing",
+        "sender_id": sender,
+        "version": "3.6.0",
+        "domain": {},
+        "tracker": {"sender_id": sender, "slots": {}, "latest_message": {"text": QUERIES[i % len(QUERIES)]},
+                    "events": [], "paused": False, "followup_action": None, "active_loop": {},
+                    "latest_action_name": None},
+    }
+
+
+def wait_health(url: str, timeout: float = 60.0) -> None:
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Action server at {url} not healthy after {timeout:.0f}s")
+
+
+def drive(url: str, clients: int, duration: float) -> Dict[str, float]:
+    """`clients` hilos con keep-alive enviando turnos durante `duration` segundos"""
+    import requests
+    counts, errors = [0] * clients, [0] * clients
+    deadline = time.monotonic() + duration
+
+    def client(slot):
+        session = requests.Session()
+        i = slot
+        while time.monotonic() < deadline:
+            response = session.post(f"{url}/webhook", json=payload(i), timeout=30)
+            if response.ok:
+                counts[slot] += 1
+            else:
+                errors[slot] += 1
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return {"turns": sum(counts), "errors": sum(errors), "throughput": sum(counts) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput del action server multi-proceso")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                                     os.getenv("PYTHONPATH")])),
+               LOG_LEVEL="warning", METRICS_PORT="0", PYTHONWARNINGS="ignore")
+    url = f"http://127.0.0.1:{args.port}"
+    print(f"cpus={os.cpu_count()} clients={args.clients} duration={args.duration:.0f}s")
+    for workers in args.workers:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "rasa", "action_workers.py"),
+                                   "--actions", "bench_action_workers", "--workers", str(workers),
+                                   "--host", "127.0.0.1", "--port", str(args.port), "--watch", ""], env=env)
+        try:
+            wait_health(url)
+            drive(url, args.clients, 1.0)  # conexiones y caches calientes antes de medir
+            result = drive(url, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait(60)
+        print(f"workers={workers:<2} throughput={result['throughput']:8.1f} turns/s  "
+              f"turns={result['turns']} errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: bench-action-workers-v1
+# version: 3.1.0
+# file: benchmarks/bench_action_workers.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
@@ -0,0 +1,103 @@
+# AUTO-ATC Playbook v3 - Benchmark del índice del catálogo
+# Compara CatalogIndex contra el filtrado lineal por substring con catálogos sintéticos
+#
+#   python benchmarks/bench_catalog_index.py --sizes 10000 100000
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from catalog_index import CatalogIndex
+
+BRANDS = ["Dell", "HP", "Lenovo", "Apple", "Samsung", "Sony", "LG", "Xiaomi", "Motorola", "Asus", "Acer", "Philips"]
+KINDS = {
+    "computadoras": ["Laptop", "Notebook", "Desktop", "Monitor", "Teclado", "Mouse"],
+    "celulares": ["Smartphone", "Celular", "Funda", "Cargador", "Protector"],
+    "audio": ["Auriculares", "Parlante", "Barra de sonido", "Micrófono"],
+    "tv": ["Smart TV", "Televisor", "Proyector", "Soporte"],
+    "hogar": ["Heladera", "Lavarropas", "Microondas", "Aspiradora", "Cafetera"],
+}
+ADJECTIVES = ["inalámbrico", "portátil", "premium", "compacto", "gamer", "ultradelgado", "económico", "táctil"]
+QUERIES = ["laptop dell", "precio iphone", "auriculares sony", "smart tv samsung", "cafetera", "micro",
+           "heladera lg", "notebook gamer", "cargador", "televisor 55"]
+
+
+def make_catalog(size, seed=42):
+    rng = random.Random(seed)
+    products = []
+    for i in range(1, size + 1):
+        category = rng.choice(list(KINDS))
+        kind = rng.choice(KINDS[category])
+        brand = rng.choice(BRANDS)
+        name = f"{kind} {brand} {rng.choice(ADJECTIVES)} {rng.randint(10, 9999)}"
+        products.append({
+            "id": i,
+            "sku": f"SKU-{i:07d}",
+            "name": name,
+            "description": f"{kind} {brand} {' '.join(rng.sample(ADJECTIVES, 3))}, garantía {rng.randint(1, 3)} años",
+            "category": category,
+            "price": round(rng.uniform(10, 3000), 2),
+            "is_active": True,
+        })
+    return products
+
+
+def linear_search(products, query, limit=3):
+    # Estrategia anterior de _get_mock_kb_results
+    q = query.lower()
+    return [p for p in products if q in p["name"].lower() or q in p["category"]][:limit]
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    p99 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.99))]
+    return statistics.median(samples_ms), p99
+
+
+def timed(fn, queries, rounds):
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice del catálogo")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'build s':>8} {'index p50 ms':>13} {'index p99 ms':>13} {'linear p50 ms':>14} {'linear p99 ms':>14}")
+    for size in args.sizes:
+        products = make_catalog(size)
+
+        start = time.perf_counter()
+        index = CatalogIndex()
+        index.build(products)
+        build_s = time.perf_counter() - start
+
+        idx_p50, idx_p99 = timed(lambda q: index.search(q, 3), QUERIES, args.rounds)
+        lin_p50, lin_p99 = timed(lambda q: linear_search(products, q, 3), QUERIES, max(1, args.rounds // 4))
+        print(f"{size:>9} {build_s:>8.2f} {idx_p50:>13.3f} {idx_p99:>13.3f} {lin_p50:>14.3f} {lin_p99:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: bench-catalog-index-v1
+# version: 3.1.0
+# file: benchmarks/bench_catalog_index.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
@@ -0,0 +1,109 @@
+# AUTO-ATC Playbook v3 - Benchmark del store de embeddings cuantizados
+# Arma un store sintético y mide tiempo de apertura, latencia de búsqueda (p50/p99),
+# memoria residente y tamaño en disco frente a fuerza bruta en float32 en RAM
+#
+#   python benchmarks/bench_embedding_store.py --rows 1000000 --dim 384 --dtype int8
+
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from embedding_store import EmbeddingStore, EmbeddingStoreWriter
+
+
+def rss_mb():
+    """RSS actual (Linux: /proc/self/statm); si no está, el máximo de getrusage"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build(path, rows, dim, dtype, seed=42):
+    """Vectores con estructura de clusters (como una KB real) generados por bloques"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    writer = EmbeddingStoreWriter(path, dim, dtype)
+    for start in range(0, rows, 10000):
+        count = min(10000, rows - start)
+        block = centers[rng.integers(0, 256, count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+        for i, vector in enumerate(block):
+            writer.add(vector, {"title": f"chunk {start + i}", "language": "es"})
+    return writer.close()
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2] * 1000, ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del store de embeddings cuantizados")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--dtype", choices=("int8", "float16"), default="int8")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--path", help="store existente o destino (por defecto un temporal)")
+    parser.add_argument("--compare", action="store_true", help="incluir fuerza bruta float32 en RAM")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.gettempdir(), f"bench_{args.rows}_{args.dim}_{args.dtype}.store")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        build(path, args.rows, args.dim, args.dtype)
+        print(f"build: {time.perf_counter() - start:.1f}s")
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    store = EmbeddingStore(path)
+    print(f"open: {(time.perf_counter() - start) * 1000:.2f}ms  rows={store.count} dim={store.dim} "
+          f"dtype={store.dtype} file={os.path.getsize(path) / 2**20:.0f}MB")
+
+    rng = np.random.default_rng(1)
+    queries = [store.vectors[i].astype(np.float32) + 0.1 * rng.standard_normal(store.dim).astype(np.float32)
+               for i in rng.integers(0, store.count, args.queries)]
+    store.search(queries[0], args.limit)  # primera pasada: páginas del archivo a cache
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search(query, args.limit, language="es")
+        timings.append(time.perf_counter() - start)
+    p50, p99 = percentiles(timings)
+    print(f"mmap {store.dtype}: p50={p50:.1f}ms p99={p99:.1f}ms  rss +{rss_mb() - baseline:.0f}MB "
+          f"(páginas del archivo, compartibles entre procesos)")
+
+    if args.compare:
+        dense = np.empty((store.count, store.dim), dtype=np.float32)
+        np.copyto(dense, store.vectors, casting="unsafe")
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            scores = dense @ query
+            top = np.argpartition(scores, -args.limit)[-args.limit:]
+            top[np.argsort(-scores[top])]
+            timings.append(time.perf_counter() - start)
+        p50, p99 = percentiles(timings)
+        print(f"float32 en RAM: p50={p50:.1f}ms p99={p99:.1f}ms  matriz {dense.nbytes / 2**20:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: bench-embedding-store-v1
+# version: 3.1.0
+# file: benchmarks/bench_embedding_store.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
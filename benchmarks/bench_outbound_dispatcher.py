@@ -0,0 +1,83 @@
+# AUTO-ATC Playbook v3 - Benchmark del dispatcher de respuestas salientes
+# Compara el envío previo (un "Create Message" por utter_message, conexión nueva por
+# request, como el nodo HTTP de n8n) contra OutboundDispatcher (un request por turno,
+# sesiones keep-alive, workers por shard) sobre el stub local de Chatwoot
+#
+#   python benchmarks/bench_outbound_dispatcher.py --turns 500 --messages-per-turn 3 --latency-ms 5
+
+import os
+import sys
+import time
+import argparse
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from metrics import MetricsRegistry
+from outbound_dispatcher import OutboundDispatcher
+from stub_servers import chatwoot_stub
+
+
+def make_turns(count, messages_per_turn, conversations):
+    return [(turn % conversations, [{"text": f"mensaje {i} del turno {turn}"} for i in range(messages_per_turn)])
+            for turn in range(count)]
+
+
+def per_message(url, turns):
+    """Envío previo: un POST por mensaje, sin reutilizar la conexión"""
+    for conversation, messages in turns:
+        for message in messages:
+            requests.post(f"{url}/public/api/v1/inboxes/1/contacts/src/conversations/{conversation}/messages",
+                          json={"content": message["text"]}, headers={"Connection": "close"}, timeout=10)
+
+
+def dispatched(url, turns, workers):
+    dispatcher = OutboundDispatcher(url, inbox_id="1", workers=workers, rate_per_second=1e6, burst=1000,
+                                    registry=MetricsRegistry()).start()
+    for conversation, messages in turns:
+        dispatcher.submit(conversation, messages, contact_source_id="src")
+    dispatcher.drain(300)
+    dispatcher.stop()
+    return dispatcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del dispatcher de respuestas salientes")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--messages-per-turn", type=int, default=3)
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    turns = make_turns(args.turns, args.messages_per_turn, args.conversations)
+    with chatwoot_stub(latency=args.latency_ms / 1000) as stub:
+        start = time.perf_counter()
+        per_message(stub.url, turns)
+        old = time.perf_counter() - start
+        old_requests = len(stub.requests)
+
+        stub.requests.clear()
+        start = time.perf_counter()
+        stats = dispatched(stub.url, turns, args.workers)
+        new = time.perf_counter() - start
+
+    print(f"por mensaje:  {old_requests:>6} requests  {old:6.2f}s  {args.turns / old:8.1f} turnos/s")
+    print(f"dispatcher:   {stats['requests']:>6} requests  {new:6.2f}s  {args.turns / new:8.1f} turnos/s  "
+          f"({old / new:.1f}x, {stats['coalesced']} mensajes unidos, {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: bench-outbound-dispatcher-v1
+# version: 3.1.0
+# file: benchmarks/bench_outbound_dispatcher.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
@@ -0,0 +1,91 @@
+# AUTO-ATC Playbook v3 - Benchmark del enmascarado de PII
+# Compara PIIMasker (un regex compilado, una pasada; y mask_batch sobre el lote
+# completo) contra un re.sub secuencial por patrón sobre mensajes sintéticos
+#
+#   python benchmarks/bench_pii.py --messages 100000
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from pii import PIIMasker
+
+WORDS = ["hola", "quiero", "cotizar", "laptop", "dell", "precio", "envío", "stock", "gracias", "por", "favor",
+         "3", "unidades", "1299.00", "modelo", "XPS13", "garantía", "factura", "mañana", "2026-10-17"]
+PII = ["ana.perez@example.com", "099 123 456", "+598 99 123 456", "(02) 2901 1234", "1.234.567-8",
+       "4111 1111 1111 1111", "20-12345678-9", "1234567"]
+
+# Estrategia secuencial: un patrón y un re.sub por tipo, en el orden de prioridad
+SEQUENTIAL = [
+    (r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+", "[EMAIL]"),
+    (r"\b(?:\d[ -]?){12,18}\d\b", "[CARD]"),
+    (r"\b(?:\d{2}-\d{8}-\d|\d{1,2}\.\d{3}\.\d{3}(?:-\d)?|\d{7}-\d)\b", "[DOC]"),
+    (r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,4}\)[ .-]?)?\d{2,4}(?:[ .-]?\d{2,4}){1,4}(?!\w)", "[PHONE]"),
+    (r"\b\d{6,}\b", "[NUM]"),
+]
+
+
+def make_messages(count, pii_ratio=0.3, seed=42):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(4, 30))
+        if rng.random() < pii_ratio:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(PII))
+        messages.append(" ".join(words))
+    return messages
+
+
+def sequential_mask(patterns, text):
+    for pattern, token in patterns:
+        text = pattern.sub(token, text)
+    return text
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del enmascarado de PII")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--pii-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    patterns = [(re.compile(pattern), token) for pattern, token in SEQUENTIAL]
+    masker = PIIMasker()
+    messages = make_messages(args.messages, args.pii_ratio)
+
+    results = [
+        ("sequential re.sub", *timed(lambda: [sequential_mask(patterns, m) for m in messages])),
+        ("single pass", *timed(lambda: [masker.mask(m) for m in messages])),
+        ("single pass batch", *timed(lambda: masker.mask_batch(messages))),
+    ]
+    baseline = results[0][1]
+    print(f"{'strategy':<20} {'seconds':>8} {'msgs/s':>11} {'speedup':>8}")
+    for name, seconds, _ in results:
+        print(f"{name:<20} {seconds:8.3f} {len(messages) / seconds:11.0f} {baseline / seconds:8.2f}x")
+    differing = sum(1 for a, b in zip(results[0][2], results[2][2]) if a != b)
+    print(f"\n{differing} of {len(messages)} messages differ between sequential and single pass "
+          f"(Luhn, dates, prices and short numbers are only handled by the single pass)")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: bench-pii-v1
+# version: 3.1.0
+# file: benchmarks/bench_pii.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
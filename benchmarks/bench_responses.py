@@ -0,0 +1,82 @@
+# AUTO-ATC Playbook v3 - Benchmark de las plantillas de respuesta
+# Compara el listado por concatenación (`response +=`) contra ListingTemplate (bloques
+# memoizados + join) con 10 y 50 resultados, y el horario por datetime.now() contra
+# BusinessSchedule cacheado
+#
+#   python benchmarks/bench_responses.py --iterations 20000
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from bench_catalog_index import make_catalog
+from catalog_index import CatalogIndex
+from responses import BusinessSchedule, ListingTemplate, parse_hours
+
+
+def concatenated(results):
+    """Formato previo de ActionSearchProduct"""
+    response = "Encontré los siguientes productos:\n\n"
+    for i, product in enumerate(results, 1):
+        response += f"{i}. {product['title']}\n"
+        response += f"   {product['content']}\n\n"
+    return response
+
+
+def business_hours_now():
+    """Cálculo previo de ActionCheckBusinessHours en cada turno"""
+    now = datetime.now()
+    is_open = now.weekday() < 5 and 9 <= now.hour < 18
+    if is_open:
+        return is_open, "¡Hola! Estamos disponibles para atenderte."
+    return is_open, ("Hola! Actualmente estamos fuera de horario laboral. Nuestro horario es de lunes a "
+                     "viernes de 9:00 a 18:00. ¿Te gustaría dejar un mensaje?")
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las plantillas de respuesta")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50])
+    args = parser.parse_args()
+
+    catalog = [CatalogIndex._to_result(product) for product in make_catalog(max(args.sizes) * 4)]
+    for size in args.sizes:
+        results = catalog[:size]
+        template = ListingTemplate()
+        assert template.render(results) == concatenated(results)
+        old = per_call_us(lambda: concatenated(results), args.iterations)
+        warm = per_call_us(lambda: template.render(results), args.iterations)
+        cold = per_call_us(lambda: ListingTemplate().render(results), max(1, args.iterations // 10))
+        print(f"listado {size:>3} items: concatenación={old:7.2f}us  plantilla fría={cold:7.2f}us  "
+              f"plantilla memoizada={warm:7.2f}us  ({old / warm:.1f}x)")
+
+    schedule = BusinessSchedule(parse_hours("mon-fri 09:00-18:00"))
+    old = per_call_us(business_hours_now, args.iterations)
+    cached = per_call_us(schedule.status_text, args.iterations)
+    print(f"horario laboral: datetime.now()={old:6.2f}us  calendario cacheado={cached:6.2f}us  "
+          f"({old / cached:.1f}x, {schedule.evaluations} evaluación/es)")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: bench-responses-v1
+# version: 3.1.0
+# file: benchmarks/bench_responses.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
@@ -0,0 +1,123 @@
+# AUTO-ATC Playbook v3 - Load test de acciones sync vs async
+# Simula N remitentes concurrentes registrando cotizaciones contra stubs locales
+#
+#   python benchmarks/loadtest_async_actions.py --senders 200 --sheets-latency 0.05 --db-latency 0.005
+#
+# Postgres se reemplaza por una espera de --db-latency y Google Sheets por un
+# servidor HTTP local con --sheets-latency (las filas salen en lotes desde
+# sheets_writer, fuera del turno). El modo sync reproduce lo que hace rasa_sdk
+# con un `run` bloqueante: cada acción ocupa el event loop completo.
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from stub_servers import sheets_stub
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def report(label, latencies, elapsed):
+    ms = [l * 1000 for l in latencies]
+    print(f"{label:<6} senders={len(ms):<5} throughput={len(ms) / elapsed:8.1f} turns/s  "
+          f"p50={statistics.median(ms):8.1f} ms  p99={percentile(ms, 0.99):8.1f} ms")
+
+
+def make_tracker(i):
+    from rasa_sdk import Tracker
+    slots = {"producto": "Laptop Dell", "cantidad": None, "sku": None, "email": f"cliente{i}@example.com", "telefono": "099123456"}
+    return Tracker(f"sender-{i}", slots, {"text": "cotizar laptop"}, [], False, None, {}, None)
+
+
+async def run_turns(action, senders, is_async):
+    from rasa_sdk.executor import CollectingDispatcher
+
+    latencies = []
+    # Todos los remitentes llegan juntos: la latencia de cada turno incluye la
+    # espera en cola, como la vería el usuario
+    arrived = time.perf_counter()
+
+    async def turn(i):
+        if is_async:
+            await action.run(CollectingDispatcher(), make_tracker(i), {})
+        else:
+            action.run(CollectingDispatcher(), make_tracker(i), {})
+        latencies.append(time.perf_counter() - arrived)
+
+    await asyncio.gather(*(turn(i) for i in range(senders)))
+    return latencies, time.perf_counter() - arrived
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test de acciones sync vs async")
+    parser.add_argument("--senders", type=int, default=200)
+    parser.add_argument("--sheets-latency", type=float, default=0.05)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    with sheets_stub(latency=args.sheets_latency) as sheets:
+        os.environ.update({
+            "GOOGLE_SHEET_ID": "loadtest",
+            "GOOGLE_API_KEY": "loadtest",
+            "SHEETS_API_URL": sheets.url,
+            "SHEETS_SPOOL_PATH": os.path.join(tempfile.mkdtemp(), "sheets_outbox.jsonl"),
+            "CATALOG_INDEX_ENABLED": "true",
+        })
+        import actions
+        import actions_async
+
+        catalog = [{"id": 1, "sku": "DELL-XPS13", "name": "Laptop Dell XPS 13", "description": "Intel i7",
+                    "category": "computadoras", "price": 1299}]
+        actions.db_manager.catalog_index.build(catalog)
+        actions.db_manager.refresh_catalog_index = lambda force=False: True
+
+        # Stub de Postgres: misma latencia para ambas variantes
+        def save_quote_sync(conversation_id, product_data):
+            time.sleep(args.db_latency)
+            return True
+
+        async def save_quote_async(conversation_id, product_data):
+            await asyncio.sleep(args.db_latency)
+            return True
+
+        actions.db_manager.save_quote = save_quote_sync
+        actions_async.async_db_manager.save_quote = save_quote_async
+
+        async def both():
+            sync_lat, sync_elapsed = await run_turns(actions.ActionRegisterQuote(), args.senders, False)
+            async_lat, async_elapsed = await run_turns(actions_async.AsyncActionRegisterQuote(), args.senders, True)
+            await actions_async.async_db_manager.aclose()
+            return sync_lat, sync_elapsed, async_lat, async_elapsed
+
+        sync_lat, sync_elapsed, async_lat, async_elapsed = asyncio.run(both())
+        report("sync", sync_lat, sync_elapsed)
+        report("async", async_lat, async_elapsed)
+
+        from sheets_writer import get_sheets_writer
+        get_sheets_writer().stop()
+        rows = sum(len(r["body"]["values"]) for r in sheets.requests)
+        print(f"sheets requests received: {len(sheets.requests)} ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: loadtest-async-actions-v1
+# version: 3.1.0
+# file: benchmarks/loadtest_async_actions.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
@@ -0,0 +1,319 @@
+# AUTO-ATC Playbook v3 - Load test del camino del orquestador
+# Reproduce WF_MAIN_orchestrator_v4 (webhook de Chatwoot -> parse + PII -> detalle de la
+# conversación -> Rasa -> TEI + Qdrant -> respuesta a Chatwoot + fila en Sheets) a una tasa
+# fija y reporta throughput y percentiles de latencia por etapa
+#
+#   python benchmarks/loadtest_orchestrator.py --synthetic 2000 --rate 100 --concurrency 64
+#   python benchmarks/loadtest_orchestrator.py --payloads grabados.jsonl --speed 2
+#   python benchmarks/loadtest_orchestrator.py --rasa-url http://localhost:5005 --max-p99-ms 800
+#
+# Cada servicio sin URL explícita se levanta como stub local (tests/stub_servers.py) con la
+# latencia indicada; los stubs comparten proceso con el generador, así que por encima de
+# unos cientos de requests/s conviene apuntar a servicios reales. `--payloads` acepta un
+# JSONL con un webhook de Chatwoot por línea, o líneas {"offset_ms": ..., "payload": {...}}
+# para respetar los tiempos de la grabación.
+# El workflow consulta Qdrant con `$json.embed` sin calcularlo; acá el embedding de la
+# consulta se pide a TEI antes de la búsqueda, como en rasa/embeddings.py.
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+import httpx
+
+from stub_servers import chatwoot_stub, qdrant_stub, rasa_stub, sheets_stub, tei_stub
+
+STAGES = ("parse_mask", "chatwoot_details", "whatsapp_template", "rasa", "tei_embed", "qdrant_search",
+          "compose", "chatwoot_reply", "sheets_append", "end_to_end")
+
+MESSAGES = [
+    "Hola, quiero cotizar una laptop Dell", "¿Cuánto sale el iPhone 15 Pro?", "precio auriculares sony",
+    "Necesito 3 notebooks para la oficina, mi mail es compras@example.com", "¿Tienen stock del SKU DELL-XPS13?",
+    "Mi número es 099123456, llámenme por favor", "quiero hablar con un asesor", "gracias!",
+]
+
+_NUMBER = re.compile(r"\b\d{6,}\b")
+_EMAIL = re.compile(r"([\w.-]+)@([\w.-]+)")
+
+
+# ==========================================
+# PAYLOADS
+# ==========================================
+
+def synthetic_payloads(count: int, conversations: int = 100, seed: int = 42) -> Iterator[Tuple[Optional[float], Dict]]:
+    """Webhooks `message_created` de Chatwoot con mensajes de clientes típicos"""
+    rng = random.Random(seed)
+    for i in range(count):
+        conversation = rng.randrange(conversations) + 1
+        yield None, {
+            "event": "message_created",
+            "id": 100000 + i,
+            "message_type": "incoming",
+            "content": rng.choice(MESSAGES),
+            "conversation": {"id": conversation},
+            "sender": {"id": 5000 + conversation, "phone_number": f"+5989{conversation:07d}"},
+            "meta": {"channel": "Channel::Whatsapp"},
+            "account": {"id": 1},
+        }
+
+
+def recorded_payloads(path: str) -> Iterator[Tuple[Optional[float], Dict]]:
+    """Webhooks grabados: (offset en segundos o None, payload) por línea del JSONL"""
+    with open(path, "r", encoding="utf-8") as stream:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "payload" in record:
+                offset = record.get("offset_ms")
+                yield (offset / 1000.0 if offset is not None else None), record["payload"]
+            else:
+                yield None, record
+
+
+def parse_and_mask(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Nodo `Fn Parse+PII Mask` del workflow"""
+    body = event.get("content") or (event.get("message") or {}).get("content") or ""
+    return {
+        "source": event,
+        "channel": (event.get("meta") or {}).get("channel") or event.get("channel"),
+        "conversation_id": (event.get("conversation") or {}).get("id") or event.get("conversation_id"),
+        "contact_id": (event.get("contact") or {}).get("id") or (event.get("sender") or {}).get("id"),
+        "body_masked": _EMAIL.sub("[EMAIL]", _NUMBER.sub("[NUM]", body)),
+    }
+
+
+def compose_answer(rasa_messages: List[Dict[str, Any]], hits: List[Dict[str, Any]]) -> str:
+    """Nodo `Fn Compose Answer` del workflow"""
+    text = (rasa_messages[0].get("text") if rasa_messages else "") or ""
+    picks = []
+    for hit in hits[:3]:
+        payload = hit.get("payload") or {}
+        if payload.get("title"):
+            picks.append(payload["title"] + (f" - ${payload['price']}" if payload.get("price") else ""))
+    return text + ("\n\nSugerencias:\n" + "\n".join(picks) if picks else "")
+
+
+# ==========================================
+# REPLAY
+# ==========================================
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class StageStats:
+    """Latencias (s) y errores por etapa"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.errors: Dict[str, int] = {stage: 0 for stage in STAGES}
+
+    @contextlib.contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors[stage] += 1
+            raise
+        finally:
+            self.latencies[stage].append(time.perf_counter() - start)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        stages = {}
+        for stage in STAGES:
+            samples = self.latencies[stage]
+            if not samples:
+                continue
+            ms = [s * 1000 for s in samples]
+            stages[stage] = {
+                "count": len(ms), "errors": self.errors[stage],
+                "p50_ms": round(percentile(ms, 0.50), 2), "p90_ms": round(percentile(ms, 0.90), 2),
+                "p99_ms": round(percentile(ms, 0.99), 2), "max_ms": round(max(ms), 2),
+            }
+        completed = len(self.latencies["end_to_end"]) - self.errors["end_to_end"]
+        return {"elapsed_s": round(elapsed, 3), "completed": completed, "failed": self.errors["end_to_end"],
+                "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0, "stages": stages}
+
+
+class OrchestratorReplay:
+    """Ejecuta el camino del orquestador por cada webhook contra las URLs dadas"""
+
+    def __init__(self, urls: Dict[str, str], client: httpx.AsyncClient, collection: str = "products",
+                 account_id: int = 1, inbox_id: int = 1, timeout: float = 30.0):
+        self.urls = urls
+        self.client = client
+        self.collection = collection
+        self.account_id = account_id
+        self.inbox_id = inbox_id
+        self.timeout = timeout
+        self.stats = StageStats()
+
+    async def _request(self, stage: str, method: str, url: str, **kwargs) -> Any:
+        with self.stats.measure(stage):
+            response = await self.client.request(method, url, timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response.json()
+
+    async def handle(self, event: Dict[str, Any], scheduled_at: float) -> None:
+        """Un webhook completo; end_to_end cuenta desde la llegada programada (incluye la espera)"""
+        try:
+            await self._orchestrate(event)
+        except Exception:
+            self.stats.errors["end_to_end"] += 1  # la etapa que falló ya registró su error
+        finally:
+            self.stats.latencies["end_to_end"].append(time.perf_counter() - scheduled_at)
+
+    async def _orchestrate(self, event: Dict[str, Any]) -> None:
+        with self.stats.measure("parse_mask"):
+            parsed = parse_and_mask(event)
+        details = await self._request(
+            "chatwoot_details", "GET",
+            f"{self.urls['chatwoot']}/api/v1/accounts/{self.account_id}/conversations/{parsed['conversation_id']}")
+
+        if details.get("can_reply") is False:
+            # Fuera de la ventana de 24h: template de WhatsApp y registro en Sheets
+            await self._request("whatsapp_template", "POST", f"{self.urls['chatwoot']}/messages",
+                                json={"messaging_product": "whatsapp", "to": str(parsed["contact_id"]), "type": "template"})
+            await self._sheets(parsed, "")
+            return
+
+        rasa_messages = await self._request(
+            "rasa", "POST", f"{self.urls['rasa']}/webhooks/rest/webhook",
+            json={"sender": str(parsed["contact_id"]), "message": parsed["body_masked"]})
+        vectors = await self._request("tei_embed", "POST", f"{self.urls['tei']}/embeddings",
+                                      json={"inputs": [parsed["body_masked"]], "truncate": True})
+        vector = vectors[0] if isinstance(vectors, list) else (vectors.get("embeddings") or [[]])[0]
+        search = await self._request(
+            "qdrant_search", "POST", f"{self.urls['qdrant']}/collections/{self.collection}/points/search",
+            json={"vector": vector, "top": 5, "with_payload": True,
+                  "filter": {"must": [{"key": "language", "match": {"value": "es"}}]}})
+        with self.stats.measure("compose"):
+            reply = compose_answer(rasa_messages, search.get("result") or [])
+
+        # n8n envía la respuesta y la fila de Sheets en paralelo
+        await asyncio.gather(
+            self._request("chatwoot_reply", "POST",
+                          f"{self.urls['chatwoot']}/public/api/v1/inboxes/{self.inbox_id}/contacts/"
+                          f"{parsed['contact_id']}/conversations/{parsed['conversation_id']}/messages",
+                          json={"content": reply}),
+            self._sheets(parsed, reply),
+        )
+
+    async def _sheets(self, parsed: Dict[str, Any], reply: str) -> None:
+        await self._request("sheets_append", "POST",
+                            f"{self.urls['sheets']}/v4/spreadsheets/loadtest/values/Interacciones!A:Z:append",
+                            params={"valueInputOption": "RAW"},
+                            json={"values": [[parsed["contact_id"], reply, time.time()]]})
+
+    async def replay(self, payloads, rate: float = 50.0, concurrency: int = 64, speed: float = 1.0) -> Dict[str, Any]:
+        """Lazo abierto: cada webhook llega en su offset grabado / `speed` o, sin offset, a
+        `rate`/s; con hasta `concurrency` en vuelo, la espera por lugar suma a end_to_end"""
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = []
+        started = time.perf_counter()
+
+        async def run(event, scheduled_at):
+            async with semaphore:
+                await self.handle(event, scheduled_at)
+
+        for i, (offset, event) in enumerate(payloads):
+            if offset is not None:
+                scheduled_at = started + offset / speed
+            else:
+                scheduled_at = started + (i / rate if rate > 0 else 0.0)
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run(event, scheduled_at)))
+        await asyncio.gather(*tasks)
+        return self.stats.summary(time.perf_counter() - started)
+
+
+def check_budget(summary: Dict[str, Any], max_p99_ms: float) -> Optional[str]:
+    """Motivo de falla si el p99 end_to_end supera el presupuesto o hubo webhooks fallidos"""
+    p99 = summary["stages"].get("end_to_end", {}).get("p99_ms", 0.0)
+    if p99 > max_p99_ms or summary["failed"]:
+        return f"end_to_end p99 {p99:.1f} ms (max {max_p99_ms:.1f} ms), {summary['failed']} failed"
+    return None
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(f"completed={summary['completed']} failed={summary['failed']} elapsed={summary['elapsed_s']}s "
+          f"throughput={summary['throughput_rps']} webhooks/s")
+    print(f"{'stage':<18} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, row in summary["stages"].items():
+        print(f"{stage:<18} {row['count']:>7} {row['errors']:>7} {row['p50_ms']:>9.1f} {row['p90_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test del camino webhook de Chatwoot -> Rasa -> Qdrant -> respuesta")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=1000, help="cantidad de webhooks sintéticos")
+    source.add_argument("--payloads", help="JSONL de webhooks grabados")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=50.0, help="webhooks/s para payloads sin offset_ms (0 = todos juntos)")
+    parser.add_argument("--speed", type=float, default=1.0, help="factor de aceleración de los offset_ms grabados")
+    parser.add_argument("--concurrency", type=int, default=64)
+    for service, latency in (("chatwoot", 0.01), ("rasa", 0.05), ("tei", 0.01), ("qdrant", 0.005), ("sheets", 0.05)):
+        parser.add_argument(f"--{service}-url", help=f"{service} real (por defecto, stub local)")
+        parser.add_argument(f"--{service}-latency", type=float, default=latency, help="latencia del stub (s)")
+    parser.add_argument("--can-reply", choices=("true", "false"), default="true", help="respuesta del stub de Chatwoot")
+    parser.add_argument("--json", help="guardar el resumen en este archivo")
+    parser.add_argument("--max-p99-ms", type=float, help="salir con código 1 si el p99 end_to_end lo supera")
+    args = parser.parse_args()
+
+    factories = {"chatwoot": lambda **kw: chatwoot_stub(can_reply=args.can_reply == "true", **kw),
+                 "rasa": rasa_stub, "tei": tei_stub, "qdrant": qdrant_stub, "sheets": sheets_stub}
+    payloads = recorded_payloads(args.payloads) if args.payloads else synthetic_payloads(args.synthetic, args.conversations)
+
+    with contextlib.ExitStack() as stack:
+        urls = {}
+        for service, factory in factories.items():
+            url = getattr(args, f"{service}_url")
+            if url is None:
+                url = stack.enter_context(factory(latency=getattr(args, f"{service}_latency"))).url
+            urls[service] = url.rstrip("/")
+
+        async def run():
+            limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(limits=limits) as client:
+                return await OrchestratorReplay(urls, client).replay(payloads, args.rate, args.concurrency, args.speed)
+
+        summary = asyncio.run(run())
+
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    failure = check_budget(summary, args.max_p99_ms) if args.max_p99_ms is not None else None
+    if failure:
+        print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: loadtest-orchestrator-v1
+# version: 3.1.0
+# file: benchmarks/loadtest_orchestrator.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: benchmarks
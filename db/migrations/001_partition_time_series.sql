@@ -0,0 +1,176 @@
+-- AUTO-ATC Playbook v3 - Migración: particionado mensual de messages, performance_metrics y error_logs
+-- Para bases creadas con el schema.sql anterior (tablas sin particionar). Las bases nuevas ya nacen particionadas.
+--
+--   psql -U atc_user -d atc_db -v ON_ERROR_STOP=1 -f db/migrations/001_partition_time_series.sql
+--
+-- Corre en una sola transacción: copia las filas a particiones mensuales (desde el mes
+-- más viejo hasta dos meses adelante) y borra la tabla original. Toma un lock exclusivo
+-- sobre las tres tablas mientras copia; ejecutar en una ventana de mantenimiento.
+-- Después, programar `python rasa/partition_maintenance.py` (p. ej. diario) para crear
+-- las particiones siguientes y quitar las vencidas.
+
+BEGIN;
+
+-- Misma función que db/schema.sql
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, part_column TEXT, for_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound DATE := date_trunc('month', for_month)::date;
+    upper_bound DATE := (date_trunc('month', for_month) + interval '1 month')::date;
+    partition_name TEXT := parent || '_p' || to_char(for_month, 'YYYYMM');
+    default_name TEXT := parent || '_default';
+    has_rows BOOLEAN := false;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF to_regclass(default_name) IS NOT NULL THEN
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                       default_name, part_column, lower_bound, part_column, upper_bound)
+            INTO has_rows;
+    END IF;
+
+    IF has_rows THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent);
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                       default_name, part_column, lower_bound, part_column, upper_bound, partition_name);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, partition_name, lower_bound, upper_bound);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, parent, lower_bound, upper_bound);
+    END IF;
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+-- Particiones mensuales de `parent` desde el mes de la fila más vieja de `source` hasta dos meses adelante
+CREATE FUNCTION pg_temp.create_partitions_for(source TEXT, parent TEXT, part_column TEXT)
+RETURNS VOID AS $$
+DECLARE
+    first_month DATE;
+    current_month DATE;
+BEGIN
+    EXECUTE format('SELECT date_trunc(''month'', min(%I))::date FROM %I', part_column, source) INTO first_month;
+    current_month := COALESCE(first_month, date_trunc('month', now())::date);
+    WHILE current_month <= (date_trunc('month', now()) + interval '2 months')::date LOOP
+        PERFORM create_monthly_partition(parent, part_column, current_month);
+        current_month := (current_month + interval '1 month')::date;
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+-- ------------------------------------------
+-- messages
+-- ------------------------------------------
+
+LOCK TABLE messages IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE messages RENAME TO messages_unpartitioned;
+ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_pkey TO messages_unpartitioned_pkey;
+ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_external_message_id_key TO messages_unpartitioned_external_message_id_key;
+-- La secuencia de id se conserva (los ids siguen donde estaban)
+ALTER SEQUENCE messages_id_seq OWNED BY NONE;
+
+CREATE TABLE messages (
+  id BIGINT NOT NULL DEFAULT nextval('messages_id_seq'),
+  conversation_id BIGINT REFERENCES conversations(id) ON DELETE CASCADE,
+  external_message_id TEXT,
+  direction TEXT NOT NULL,
+  message_type TEXT DEFAULT 'text',
+  content TEXT,
+  metadata JSONB DEFAULT '{}',
+  created_at TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, created_at),
+  UNIQUE (external_message_id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
+SELECT pg_temp.create_partitions_for('messages_unpartitioned', 'messages', 'created_at');
+
+INSERT INTO messages (id, conversation_id, external_message_id, direction, message_type, content, metadata, created_at)
+SELECT id, conversation_id, external_message_id, direction, message_type, content, metadata, COALESCE(created_at, now())
+FROM messages_unpartitioned;
+
+DROP TABLE messages_unpartitioned;
+ALTER SEQUENCE messages_id_seq OWNED BY messages.id;
+
+CREATE INDEX idx_messages_conversation_id ON messages(conversation_id);
+CREATE INDEX idx_messages_direction ON messages(direction);
+CREATE INDEX idx_messages_created_at ON messages(created_at);
+CREATE INDEX idx_messages_content_gin ON messages USING gin(to_tsvector('spanish', content));
+
+-- ------------------------------------------
+-- performance_metrics
+-- ------------------------------------------
+
+LOCK TABLE performance_metrics IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE performance_metrics RENAME TO performance_metrics_unpartitioned;
+ALTER TABLE performance_metrics_unpartitioned RENAME CONSTRAINT performance_metrics_pkey TO performance_metrics_unpartitioned_pkey;
+ALTER SEQUENCE performance_metrics_id_seq OWNED BY NONE;
+
+CREATE TABLE performance_metrics (
+  id BIGINT NOT NULL DEFAULT nextval('performance_metrics_id_seq'),
+  metric_name TEXT NOT NULL,
+  metric_value DECIMAL(10,4),
+  metric_unit TEXT,
+  metadata JSONB DEFAULT '{}',
+  recorded_at TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+CREATE TABLE performance_metrics_default PARTITION OF performance_metrics DEFAULT;
+SELECT pg_temp.create_partitions_for('performance_metrics_unpartitioned', 'performance_metrics', 'recorded_at');
+
+INSERT INTO performance_metrics (id, metric_name, metric_value, metric_unit, metadata, recorded_at)
+SELECT id, metric_name, metric_value, metric_unit, metadata, COALESCE(recorded_at, now())
+FROM performance_metrics_unpartitioned;
+
+DROP TABLE performance_metrics_unpartitioned;
+ALTER SEQUENCE performance_metrics_id_seq OWNED BY performance_metrics.id;
+
+CREATE INDEX idx_performance_metrics_name ON performance_metrics(metric_name);
+CREATE INDEX idx_performance_metrics_recorded_at ON performance_metrics(recorded_at);
+
+-- ------------------------------------------
+-- error_logs
+-- ------------------------------------------
+
+LOCK TABLE error_logs IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE error_logs RENAME TO error_logs_unpartitioned;
+ALTER TABLE error_logs_unpartitioned RENAME CONSTRAINT error_logs_pkey TO error_logs_unpartitioned_pkey;
+ALTER SEQUENCE error_logs_id_seq OWNED BY NONE;
+
+CREATE TABLE error_logs (
+  id BIGINT NOT NULL DEFAULT nextval('error_logs_id_seq'),
+  error_type TEXT NOT NULL,
+  error_message TEXT,
+  stack_trace TEXT,
+  context JSONB DEFAULT '{}',
+  resolved BOOLEAN DEFAULT false,
+  created_at TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE error_logs_default PARTITION OF error_logs DEFAULT;
+SELECT pg_temp.create_partitions_for('error_logs_unpartitioned', 'error_logs', 'created_at');
+
+INSERT INTO error_logs (id, error_type, error_message, stack_trace, context, resolved, created_at)
+SELECT id, error_type, error_message, stack_trace, context, resolved, COALESCE(created_at, now())
+FROM error_logs_unpartitioned;
+
+DROP TABLE error_logs_unpartitioned;
+ALTER SEQUENCE error_logs_id_seq OWNED BY error_logs.id;
+
+CREATE INDEX idx_error_logs_type ON error_logs(error_type);
+CREATE INDEX idx_error_logs_resolved ON error_logs(resolved);
+CREATE INDEX idx_error_logs_created_at ON error_logs(created_at);
+
+COMMIT;
+
+-- EXPORT_SEAL v1
+-- project: auto-atc
+-- prompt_id: db-migration-partitions-v1
+-- version: 3.1.0
+-- file: db/migrations/001_partition_time_series.sql
+-- lang: sql
+-- created_at: 2026-10-17T00:00:00Z
+-- author: auto-atc-setup
+-- origin: db-impl
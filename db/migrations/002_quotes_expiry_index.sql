@@ -0,0 +1,25 @@
+-- AUTO-ATC Playbook v3 - Migración: índice de vencimiento de cotizaciones
+-- Índice parcial (solo cotizaciones abiertas) sobre (status, valid_until, id) para el
+-- barrido por keyset de rasa/quote_sweeper.py y las consultas de vencidas por estado.
+--
+--   psql -U atc_user -d atc_db -v ON_ERROR_STOP=1 -f db/migrations/002_quotes_expiry_index.sql
+--
+-- CONCURRENTLY no bloquea escrituras sobre quotes, pero no corre dentro de una
+-- transacción: ejecutar el archivo sin BEGIN/COMMIT ni --single-transaction. Si la
+-- creación se interrumpe queda un índice INVALID; borrarlo y volver a correr.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quotes_open_valid_until
+    ON quotes (status, valid_until, id)
+    WHERE status IN ('draft', 'sent');
+
+ANALYZE quotes;
+
+-- EXPORT_SEAL v1
+-- project: auto-atc
+-- prompt_id: db-migration-quotes-expiry-v1
+-- version: 3.1.0
+-- file: db/migrations/002_quotes_expiry_index.sql
+-- lang: sql
+-- created_at: 2026-10-17T00:00:00Z
+-- author: auto-atc-setup
+-- origin: db-impl
@@ -0,0 +1,105 @@
+-- AUTO-ATC Playbook v3 - Migración: tablas de rollups de analítica
+-- Crea rollup_watermarks, metrics_rollup_hourly/_daily, quotes_rollup_daily,
+-- interactions_rollup_daily y las funciones de histograma que usa rasa/analytics_rollups.py.
+--
+--   psql -U atc_user -d atc_db -v ON_ERROR_STOP=1 -f db/migrations/003_analytics_rollups.sql
+--
+-- Solo crea objetos nuevos (no toca las tablas crudas). Después, cargar la historia con
+-- `python rasa/analytics_rollups.py refresh` (procesa por lotes desde el id 0) y dejar el
+-- refresco periódico a ANALYTICS_ROLLUP_INTERVAL o a un cron.
+
+BEGIN;
+
+-- Mismas definiciones que db/schema.sql
+
+-- Agregados incrementales de performance_metrics, quotes e interactions
+-- (rasa/analytics_rollups.py); cada fuente avanza desde su marca de agua (último id procesado)
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  name TEXT PRIMARY KEY,
+  last_id BIGINT NOT NULL DEFAULT 0,
+  rows_processed BIGINT NOT NULL DEFAULT 0,
+  refreshed_at TIMESTAMP
+);
+
+-- Métricas por hora y por día (bucket = inicio de la hora/día); histogram son los conteos
+-- por bucket de HISTOGRAM_BOUNDS (percentiles sin volver a las filas crudas)
+CREATE TABLE IF NOT EXISTS metrics_rollup_hourly (
+  bucket TIMESTAMP NOT NULL,
+  metric_name TEXT NOT NULL,
+  action TEXT NOT NULL DEFAULT '',
+  step TEXT NOT NULL DEFAULT '',
+  samples BIGINT NOT NULL,
+  value_sum DOUBLE PRECISION NOT NULL,
+  value_min DOUBLE PRECISION,
+  value_max DOUBLE PRECISION,
+  histogram BIGINT[] NOT NULL,
+  PRIMARY KEY (metric_name, bucket, action, step)
+);
+CREATE TABLE IF NOT EXISTS metrics_rollup_daily (LIKE metrics_rollup_hourly INCLUDING ALL);
+
+-- Cotizaciones por producto y día (fecha de creación)
+CREATE TABLE IF NOT EXISTS quotes_rollup_daily (
+  day DATE NOT NULL,
+  product TEXT NOT NULL,
+  quotes BIGINT NOT NULL,
+  units NUMERIC(14,2) NOT NULL,
+  amount NUMERIC(14,2) NOT NULL,
+  PRIMARY KEY (day, product)
+);
+
+-- Interacciones por día (product = '') y menciones por producto
+CREATE TABLE IF NOT EXISTS interactions_rollup_daily (
+  day DATE NOT NULL,
+  product TEXT NOT NULL,
+  interactions BIGINT NOT NULL,
+  PRIMARY KEY (day, product)
+);
+
+-- Serie de un producto (la PK ordena por día)
+CREATE INDEX IF NOT EXISTS idx_quotes_rollup_day_product ON quotes_rollup_daily(product, day);
+
+-- Suma un conteo en la celda `cell` (0..size-1) de un histograma
+CREATE OR REPLACE FUNCTION rollup_histogram_step(state BIGINT[], cell INTEGER, n BIGINT, size INTEGER)
+RETURNS BIGINT[] AS $$
+BEGIN
+    IF state IS NULL THEN
+        state := array_fill(0::bigint, ARRAY[size]);
+    END IF;
+    state[cell + 1] := state[cell + 1] + n;
+    RETURN state;
+END;
+$$ language 'plpgsql' IMMUTABLE;
+
+-- Suma celda a celda de dos histogramas
+CREATE OR REPLACE FUNCTION rollup_histogram_merge(a BIGINT[], b BIGINT[])
+RETURNS BIGINT[] AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE ARRAY(SELECT COALESCE(x, 0) + COALESCE(y, 0) FROM unnest(a, b) WITH ORDINALITY AS t(x, y, i) ORDER BY i)
+    END
+$$ language 'sql' IMMUTABLE;
+
+-- rollup_histogram(celda, conteo, tamaño): histograma a partir de conteos por celda
+CREATE OR REPLACE AGGREGATE rollup_histogram(INTEGER, BIGINT, INTEGER) (
+    SFUNC = rollup_histogram_step,
+    STYPE = BIGINT[]
+);
+
+-- rollup_histogram_sum(histograma): suma de histogramas (horas -> día, días -> rango)
+CREATE OR REPLACE AGGREGATE rollup_histogram_sum(BIGINT[]) (
+    SFUNC = rollup_histogram_merge,
+    STYPE = BIGINT[]
+);
+
+COMMIT;
+
+-- EXPORT_SEAL v1
+-- project: auto-atc
+-- prompt_id: db-migration-analytics-rollups-v1
+-- version: 3.1.0
+-- file: db/migrations/003_analytics_rollups.sql
+-- lang: sql
+-- created_at: 2026-10-17T00:00:00Z
+-- author: auto-atc-setup
+-- origin: db-impl
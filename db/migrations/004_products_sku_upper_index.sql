@@ -0,0 +1,24 @@
+-- AUTO-ATC Playbook v3 - Migración: índice de SKU sin distinguir mayúsculas
+-- Índice de expresión sobre upper(sku) para el atajo de SKU exacto de la búsqueda
+-- híbrida (rasa/hybrid_search.py compara upper(sku) con el SKU normalizado).
+--
+--   psql -U atc_user -d atc_db -v ON_ERROR_STOP=1 -f db/migrations/004_products_sku_upper_index.sql
+--
+-- CONCURRENTLY no bloquea escrituras sobre products, pero no corre dentro de una
+-- transacción: ejecutar el archivo sin BEGIN/COMMIT ni --single-transaction. Si la
+-- creación se interrumpe queda un índice INVALID; borrarlo y volver a correr.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_sku_upper
+    ON products (upper(sku));
+
+ANALYZE products;
+
+-- EXPORT_SEAL v1
+-- project: auto-atc
+-- prompt_id: db-migration-products-sku-upper-v1
+-- version: 3.1.0
+-- file: db/migrations/004_products_sku_upper_index.sql
+-- lang: sql
+-- created_at: 2026-10-17T00:00:00Z
+-- author: auto-atc-setup
+-- origin: db-impl
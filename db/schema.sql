@@ -32,17 +32,22 @@ CREATE TABLE IF NOT EXISTS conversations (
   closed_at TIMESTAMP
 );
 
--- Tabla de mensajes
+-- Tabla de mensajes (particionada por mes de created_at, ver PARTICIONES MENSUALES)
 CREATE TABLE IF NOT EXISTS messages (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   conversation_id BIGINT REFERENCES conversations(id) ON DELETE CASCADE,
-  external_message_id TEXT UNIQUE, -- ID de WhatsApp/Chatwoot
+  external_message_id TEXT, -- ID de WhatsApp/Chatwoot
   direction TEXT NOT NULL, -- inbound, outbound
   message_type TEXT DEFAULT 'text', -- text, image, file, location
   content TEXT,
   metadata JSONB DEFAULT '{}',
-  created_at TIMESTAMP DEFAULT now()
-);
+  created_at TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, created_at),
+  -- La clave única debe incluir created_at; los entrantes se registran con la hora del
+  -- evento de usuario (message_log.user_event_time) para que el mismo id choque siempre
+  UNIQUE (external_message_id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE IF NOT EXISTS messages_default PARTITION OF messages DEFAULT;
 
 -- Tabla de productos/servicios para knowledge base
 CREATE TABLE IF NOT EXISTS products (
@@ -121,25 +126,113 @@ CREATE TABLE IF NOT EXISTS interactions(
   created_at TIMESTAMP DEFAULT now()
 );
 
--- Tabla de métricas de rendimiento
+-- Tabla de métricas de rendimiento (particionada por mes de recorded_at)
 CREATE TABLE IF NOT EXISTS performance_metrics (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   metric_name TEXT NOT NULL,
   metric_value DECIMAL(10,4),
   metric_unit TEXT,
   metadata JSONB DEFAULT '{}',
-  recorded_at TIMESTAMP DEFAULT now()
-);
+  recorded_at TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+CREATE TABLE IF NOT EXISTS performance_metrics_default PARTITION OF performance_metrics DEFAULT;
 
--- Tabla de logs de errores
+-- Tabla de logs de errores (particionada por mes de created_at)
 CREATE TABLE IF NOT EXISTS error_logs (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   error_type TEXT NOT NULL,
   error_message TEXT,
   stack_trace TEXT,
   context JSONB DEFAULT '{}',
   resolved BOOLEAN DEFAULT false,
-  created_at TIMESTAMP DEFAULT now()
+  created_at TIMESTAMP NOT NULL DEFAULT now(),
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE IF NOT EXISTS error_logs_default PARTITION OF error_logs DEFAULT;
+
+-- ==========================================
+-- ROLLUPS DE ANALÍTICA
+-- ==========================================
+
+-- Agregados incrementales de performance_metrics, quotes e interactions
+-- (rasa/analytics_rollups.py); cada fuente avanza desde su marca de agua (último id procesado)
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  name TEXT PRIMARY KEY,
+  last_id BIGINT NOT NULL DEFAULT 0,
+  rows_processed BIGINT NOT NULL DEFAULT 0,
+  refreshed_at TIMESTAMP
+);
+
+-- Métricas por hora y por día (bucket = inicio de la hora/día); histogram son los conteos
+-- por bucket de HISTOGRAM_BOUNDS (percentiles sin volver a las filas crudas)
+CREATE TABLE IF NOT EXISTS metrics_rollup_hourly (
+  bucket TIMESTAMP NOT NULL,
+  metric_name TEXT NOT NULL,
+  action TEXT NOT NULL DEFAULT '',
+  step TEXT NOT NULL DEFAULT '',
+  samples BIGINT NOT NULL,
+  value_sum DOUBLE PRECISION NOT NULL,
+  value_min DOUBLE PRECISION,
+  value_max DOUBLE PRECISION,
+  histogram BIGINT[] NOT NULL,
+  PRIMARY KEY (metric_name, bucket, action, step)
+);
+CREATE TABLE IF NOT EXISTS metrics_rollup_daily (LIKE metrics_rollup_hourly INCLUDING ALL);
+
+-- Cotizaciones por producto y día (fecha de creación)
+CREATE TABLE IF NOT EXISTS quotes_rollup_daily (
+  day DATE NOT NULL,
+  product TEXT NOT NULL,
+  quotes BIGINT NOT NULL,
+  units NUMERIC(14,2) NOT NULL,
+  amount NUMERIC(14,2) NOT NULL,
+  PRIMARY KEY (day, product)
+);
+
+-- Interacciones por día (product = '') y menciones por producto
+CREATE TABLE IF NOT EXISTS interactions_rollup_daily (
+  day DATE NOT NULL,
+  product TEXT NOT NULL,
+  interactions BIGINT NOT NULL,
+  PRIMARY KEY (day, product)
+);
+
+-- Serie de un producto (la PK ordena por día)
+CREATE INDEX IF NOT EXISTS idx_quotes_rollup_day_product ON quotes_rollup_daily(product, day);
+
+-- Suma un conteo en la celda `cell` (0..size-1) de un histograma
+CREATE OR REPLACE FUNCTION rollup_histogram_step(state BIGINT[], cell INTEGER, n BIGINT, size INTEGER)
+RETURNS BIGINT[] AS $$
+BEGIN
+    IF state IS NULL THEN
+        state := array_fill(0::bigint, ARRAY[size]);
+    END IF;
+    state[cell + 1] := state[cell + 1] + n;
+    RETURN state;
+END;
+$$ language 'plpgsql' IMMUTABLE;
+
+-- Suma celda a celda de dos histogramas
+CREATE OR REPLACE FUNCTION rollup_histogram_merge(a BIGINT[], b BIGINT[])
+RETURNS BIGINT[] AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE ARRAY(SELECT COALESCE(x, 0) + COALESCE(y, 0) FROM unnest(a, b) WITH ORDINALITY AS t(x, y, i) ORDER BY i)
+    END
+$$ language 'sql' IMMUTABLE;
+
+-- rollup_histogram(celda, conteo, tamaño): histograma a partir de conteos por celda
+CREATE OR REPLACE AGGREGATE rollup_histogram(INTEGER, BIGINT, INTEGER) (
+    SFUNC = rollup_histogram_step,
+    STYPE = BIGINT[]
+);
+
+-- rollup_histogram_sum(histograma): suma de histogramas (horas -> día, días -> rango)
+CREATE OR REPLACE AGGREGATE rollup_histogram_sum(BIGINT[]) (
+    SFUNC = rollup_histogram_merge,
+    STYPE = BIGINT[]
 );
 
 -- ==========================================
@@ -165,15 +258,19 @@ CREATE INDEX IF NOT EXISTS idx_messages_content_gin ON messages USING gin(to_tsv
 
 -- Products indexes
 CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+CREATE INDEX IF NOT EXISTS idx_products_sku_upper ON products(upper(sku)); -- búsqueda por SKU sin distinguir mayúsculas
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
 CREATE INDEX IF NOT EXISTS idx_products_name_gin ON products USING gin(to_tsvector('spanish', name));
 CREATE INDEX IF NOT EXISTS idx_products_description_gin ON products USING gin(to_tsvector('spanish', description));
+CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products(updated_at); -- refresco incremental del índice del catálogo
 
 -- Quotes indexes
 CREATE INDEX IF NOT EXISTS idx_quotes_conversation_id ON quotes(conversation_id);
 CREATE INDEX IF NOT EXISTS idx_quotes_user_id ON quotes(user_id);
 CREATE INDEX IF NOT EXISTS idx_quotes_status ON quotes(status);
 CREATE INDEX IF NOT EXISTS idx_quotes_created_at ON quotes(created_at);
+-- Cotizaciones abiertas por vencimiento: barrido por keyset de rasa/quote_sweeper.py
+CREATE INDEX IF NOT EXISTS idx_quotes_open_valid_until ON quotes(status, valid_until, id) WHERE status IN ('draft', 'sent');
 
 -- KB Documents indexes
 CREATE INDEX IF NOT EXISTS idx_kb_documents_category ON kb_documents(category);
@@ -214,6 +311,103 @@ CREATE TRIGGER update_products_updated_at BEFORE UPDATE ON products FOR EACH ROW
 CREATE TRIGGER update_quotes_updated_at BEFORE UPDATE ON quotes FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_kb_documents_updated_at BEFORE UPDATE ON kb_documents FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- ==========================================
+-- NOTIFICACIÓN DE CAMBIOS DEL CATÁLOGO
+-- ==========================================
+
+-- Avisa por pg_notify('catalog_changes') los cambios de precio/stock/estado de products;
+-- el action server los aplica a su snapshot en memoria (rasa/catalog_snapshot.py)
+CREATE OR REPLACE FUNCTION notify_product_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    row_data products%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    -- Cambios que no afectan al snapshot (descripción, metadata, updated_at) no se notifican
+    IF TG_OP = 'UPDATE'
+       AND NEW.sku IS NOT DISTINCT FROM OLD.sku
+       AND NEW.name IS NOT DISTINCT FROM OLD.name
+       AND NEW.price IS NOT DISTINCT FROM OLD.price
+       AND NEW.currency IS NOT DISTINCT FROM OLD.currency
+       AND NEW.stock_quantity IS NOT DISTINCT FROM OLD.stock_quantity
+       AND NEW.is_active IS NOT DISTINCT FROM OLD.is_active THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_notify('catalog_changes', json_build_object(
+        'op', TG_OP,
+        'id', row_data.id,
+        'sku', row_data.sku,
+        'name', row_data.name,
+        'price', row_data.price,
+        'currency', row_data.currency,
+        'stock_quantity', row_data.stock_quantity,
+        'is_active', row_data.is_active
+    )::text);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER notify_products_change AFTER INSERT OR UPDATE OR DELETE ON products FOR EACH ROW EXECUTE FUNCTION notify_product_change();
+
+-- ==========================================
+-- PARTICIONES MENSUALES
+-- ==========================================
+
+-- Crea la partición mensual <parent>_pYYYYMM que contiene `for_month`. Si la partición
+-- default ya tiene filas de ese mes, las mueve a la nueva tabla antes de adjuntarla.
+-- Devuelve el nombre creado o NULL si ya existía. La usan db/migrations y
+-- rasa/partition_maintenance.py (que además quita las particiones vencidas).
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, part_column TEXT, for_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound DATE := date_trunc('month', for_month)::date;
+    upper_bound DATE := (date_trunc('month', for_month) + interval '1 month')::date;
+    partition_name TEXT := parent || '_p' || to_char(for_month, 'YYYYMM');
+    default_name TEXT := parent || '_default';
+    has_rows BOOLEAN := false;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF to_regclass(default_name) IS NOT NULL THEN
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                       default_name, part_column, lower_bound, part_column, upper_bound)
+            INTO has_rows;
+    END IF;
+
+    IF has_rows THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, parent);
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                       default_name, part_column, lower_bound, part_column, upper_bound, partition_name);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, partition_name, lower_bound, upper_bound);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, parent, lower_bound, upper_bound);
+    END IF;
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+-- Mes en curso y los dos siguientes; el resto lo crea partition_maintenance.py
+DO $$
+DECLARE
+    offset_months INTEGER;
+BEGIN
+    FOR offset_months IN 0..2 LOOP
+        PERFORM create_monthly_partition('messages', 'created_at', (date_trunc('month', now()) + make_interval(months => offset_months))::date);
+        PERFORM create_monthly_partition('performance_metrics', 'recorded_at', (date_trunc('month', now()) + make_interval(months => offset_months))::date);
+        PERFORM create_monthly_partition('error_logs', 'created_at', (date_trunc('month', now()) + make_interval(months => offset_months))::date);
+    END LOOP;
+END $$;
+
 # EXPORT_SEAL v1
 # project: auto-atc
 # prompt_id: db-schema-v3
@@ -0,0 +1,336 @@
+# AUTO-ATC Playbook v3 - Action server multi-proceso (pre-fork)
+# Un supervisor abre el puerto y lanza N workers que aceptan del mismo socket; cada
+# worker importa las acciones y hace su warm-up, y los caches de embeddings, resultados
+# mostrados y candidatos vectoriales viven en un servidor de caches compartido
+#
+#   python rasa/action_workers.py --workers 4 --port 5055 --actions actions
+#
+# Señales del supervisor: SIGHUP = recarga escalonada (un worker nuevo por vez,
+# el viejo termina sus requests en vuelo); SIGTERM/SIGINT = apagado ordenado.
+# También recarga cuando cambia alguno de los archivos de --watch (por defecto
+# KB_LOCAL_STORE), p.ej. al exportar un store de embeddings nuevo.
+
+import os
+import sys
+import time
+import signal
+import socket
+import inspect
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# WORKER
+# ==========================================
+
+def build_app(actions_module: str):
+    """App de rasa_sdk para el módulo de acciones (create_app cambió de firma entre versiones)"""
+    from rasa_sdk import endpoint
+
+    if "action_executor" in inspect.signature(endpoint.create_app).parameters:
+        from rasa_sdk.executor import ActionExecutor
+        executor = ActionExecutor()
+        executor.register_package(actions_module)
+        return endpoint.create_app(executor)
+    return endpoint.create_app(action_package_name=actions_module)
+
+
+def signal_ready(actions_module: str, ready_fd: int, timeout: float) -> None:
+    """Avisa al supervisor (pipe) cuando termina el warm-up del módulo, si tiene uno"""
+    def target():
+        warmup = getattr(sys.modules.get(actions_module), "warmup", None)
+        if warmup is not None and hasattr(warmup, "ready"):
+            warmup.ready.wait(timeout)
+        try:
+            os.write(ready_fd, b"1")
+            os.close(ready_fd)
+        except OSError:
+            pass
+
+    threading.Thread(target=target, name="worker-ready", daemon=True).start()
+
+
+def run_worker(actions_module: str, sock_fd: int, ready_fd: int, ready_timeout: float) -> None:
+    """Proceso worker: sirve el webhook de rasa_sdk sobre el socket heredado"""
+    sock = socket.socket(fileno=sock_fd)
+    app = build_app(actions_module)
+    signal_ready(actions_module, ready_fd, ready_timeout)
+
+    from sanic import Sanic
+    options = {"sock": sock, "access_log": False, "motd": False}
+    if "single_process" in inspect.signature(Sanic.run).parameters:
+        options["single_process"] = True  # Sanic >= 22.9: sin su propio manager de procesos
+    app.run(**options)
+
+
+# ==========================================
+# SUPERVISOR
+# ==========================================
+
+class Worker:
+    """Proceso worker, el pipe por el que avisa que está listo y su banco de puertos de métricas"""
+
+    def __init__(self, slot: int, process: subprocess.Popen, ready_fd: int, bank: int = 0):
+        self.slot = slot
+        self.bank = bank
+        self.process = process
+        self.ready_fd = ready_fd
+        self.started_at = time.monotonic()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """True cuando el worker avisó que terminó el warm-up (False si murió o venció el plazo)"""
+        import select
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.process.poll() is None:
+            readable, _, _ = select.select([self.ready_fd], [], [], min(0.5, max(0.0, deadline - time.monotonic())))
+            if readable:
+                return os.read(self.ready_fd, 1) == b"1"
+        return False
+
+    def close(self) -> None:
+        try:
+            os.close(self.ready_fd)
+        except OSError:
+            pass
+
+
+class ActionWorkerSupervisor:
+    """Pre-fork: un socket, N workers, servidor de caches compartido y recargas escalonadas.
+
+    Los workers son subprocesos (no fork del supervisor) para no heredar
+    hilos ni conexiones. Un worker que muere se reemplaza después de
+    `restart_delay` segundos. En la recarga cada worker nuevo tiene que
+    avisar que terminó el warm-up antes de terminar al viejo, así siempre
+    hay `workers` procesos aceptando conexiones.
+    """
+
+    def __init__(self, workers: int, host: str = "0.0.0.0", port: int = 5055, actions_module: str = "actions",
+                 backlog: int = 1024, ready_timeout: float = 120.0, stop_timeout: float = 30.0,
+                 restart_delay: float = 1.0, watch: Optional[List[str]] = None, watch_interval: float = 5.0,
+                 shared_caches: bool = True, metrics_port: int = 0):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.actions_module = actions_module
+        self.backlog = backlog
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.restart_delay = restart_delay
+        self.watch = [path for path in (watch or []) if path]
+        self.watch_interval = watch_interval
+        self.shared_caches = shared_caches
+        self.metrics_port = metrics_port
+        self.sock: Optional[socket.socket] = None
+        self.cache_manager = None
+        self.cache_env: Dict[str, str] = {}
+        self._workers: Dict[int, Worker] = {}
+        self._stopping = threading.Event()
+        self._reload = threading.Event()
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self.reloads = 0
+        self.restarts = 0
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        self.port = sock.getsockname()[1]
+        return sock
+
+    def start_caches(self) -> None:
+        from shared_cache import ENV_ADDRESS, ENV_AUTHKEY, start_cache_server
+        address = os.path.join(tempfile.mkdtemp(prefix="action-caches-"), "caches.sock")
+        authkey = os.urandom(16)
+        self.cache_manager = start_cache_server(address, authkey)
+        self.cache_env = {ENV_ADDRESS: address, ENV_AUTHKEY: authkey.hex()}
+
+    def metrics_port_for(self, slot: int, bank: int) -> int:
+        """Puerto de /metrics y /ready: METRICS_PORT + slot en el banco 0, + workers + slot en el 1.
+
+        En la recarga el worker nuevo usa el otro banco, así puede abrir su puerto
+        mientras el viejo sigue sirviendo el suyo hasta que el nuevo está listo.
+        """
+        return self.metrics_port + bank * self.workers + slot if self.metrics_port else 0
+
+    def spawn(self, slot: int, bank: int = 0) -> Worker:
+        read_fd, write_fd = os.pipe()
+        env = dict(os.environ, ACTION_WORKER_ID=str(slot), ACTION_SERVER_PORT=str(self.port), **self.cache_env)
+        env["METRICS_PORT"] = str(self.metrics_port_for(slot, bank))
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--actions", self.actions_module,
+                   "--sock-fd", str(self.sock.fileno()), "--ready-fd", str(write_fd),
+                   "--ready-timeout", str(self.ready_timeout)]
+        process = subprocess.Popen(command, env=env, pass_fds=(self.sock.fileno(), write_fd),
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        os.close(write_fd)
+        logger.info(f"Worker {slot} started (pid {process.pid}, metrics port {env['METRICS_PORT']})")
+        return Worker(slot, process, read_fd, bank)
+
+    def stop_worker(self, worker: Worker) -> None:
+        """SIGTERM (Sanic termina los requests en vuelo) y SIGKILL si no sale en `stop_timeout`"""
+        if worker.process.poll() is None:
+            worker.process.terminate()
+            try:
+                worker.process.wait(self.stop_timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Worker {worker.slot} (pid {worker.process.pid}) did not stop; killing")
+                worker.process.kill()
+                worker.process.wait()
+        worker.close()
+
+    def start(self) -> None:
+        self.sock = self.bind()
+        if self.shared_caches:
+            self.start_caches()
+        for slot in range(self.workers):
+            self._workers[slot] = self.spawn(slot)
+        self._mtimes = {path: self._mtime(path) for path in self.watch}
+        logger.info(f"Action server listening on {self.host}:{self.port} with {self.workers} workers")
+
+    def reload(self) -> None:
+        """Recarga escalonada: reemplaza un worker por vez cuando el nuevo está listo
+        (el nuevo toma el otro banco de puertos de métricas)"""
+        self.reloads += 1
+        for slot in sorted(self._workers):
+            if self._stopping.is_set():
+                return
+            old = self._workers[slot]
+            new = self.spawn(slot, 1 - old.bank)
+            if not new.wait_ready(self.ready_timeout):
+                logger.warning(f"Worker {slot} replacement not ready after {self.ready_timeout:.0f}s; keeping it anyway")
+            self._workers[slot] = new
+            self.stop_worker(old)
+        logger.info("Rolling reload finished")
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _watched_changed(self) -> bool:
+        changed = False
+        for path in self.watch:
+            mtime = self._mtime(path)
+            if mtime != self._mtimes.get(path):
+                logger.info(f"{path} changed; reloading workers")
+                self._mtimes[path] = mtime
+                changed = True
+        return changed
+
+    def supervise(self, interval: float = 0.5) -> None:
+        """Bucle del supervisor: reinicia workers caídos, atiende recargas y cambios de archivos"""
+        next_watch = time.monotonic() + self.watch_interval
+        while not self._stopping.is_set():
+            if self._reload.is_set():
+                self._reload.clear()
+                self.reload()
+            if self.watch and time.monotonic() >= next_watch:
+                next_watch = time.monotonic() + self.watch_interval
+                if self._watched_changed():
+                    self.reload()
+            for slot, worker in list(self._workers.items()):
+                code = worker.process.poll()
+                if code is not None and not self._stopping.is_set():
+                    logger.error(f"Worker {slot} (pid {worker.process.pid}) exited with {code}; restarting")
+                    worker.close()
+                    self.restarts += 1
+                    time.sleep(self.restart_delay)
+                    self._workers[slot] = self.spawn(slot, worker.bank)
+            self._stopping.wait(interval)
+
+    def request_reload(self) -> None:
+        self._reload.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def shutdown(self) -> None:
+        """Apaga todos los workers en paralelo, luego los caches y el socket"""
+        self._stopping.set()
+        for worker in self._workers.values():
+            if worker.process.poll() is None:
+                worker.process.terminate()
+        for worker in self._workers.values():
+            self.stop_worker(worker)
+        self._workers.clear()
+        if self.cache_manager is not None:
+            self.cache_manager.shutdown()
+            self.cache_manager = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def pids(self) -> List[int]:
+        return [worker.process.pid for _, worker in sorted(self._workers.items())]
+
+    def run(self) -> None:
+        """start + supervise hasta SIGTERM/SIGINT; SIGHUP pide una recarga"""
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+        signal.signal(signal.SIGHUP, lambda *_: self.request_reload())
+        self.start()
+        try:
+            self.supervise()
+        finally:
+            self.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Action server multi-proceso (pre-fork)")
+    parser.add_argument("--actions", default=os.getenv("ACTIONS_MODULE", "actions"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ACTION_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--host", default=os.getenv("SANIC_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ACTION_SERVER_PORT", "5055")))
+    parser.add_argument("--watch", action="append", default=None,
+                        help="archivo cuyo cambio dispara una recarga (repetible; por defecto KB_LOCAL_STORE)")
+    parser.add_argument("--no-shared-caches", action="store_true", help="caches locales en cada worker")
+    # Uso interno: el supervisor lanza los workers con estos argumentos
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--sock-fd", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--ready-fd", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--ready-timeout", type=float, default=float(os.getenv("ACTION_WORKER_READY_TIMEOUT", "120")),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "info").upper(),
+                        format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s")
+    if args.worker:
+        run_worker(args.actions, args.sock_fd, args.ready_fd, args.ready_timeout)
+        return
+
+    ActionWorkerSupervisor(
+        args.workers,
+        host=args.host,
+        port=args.port,
+        actions_module=args.actions,
+        ready_timeout=args.ready_timeout,
+        stop_timeout=float(os.getenv("ACTION_WORKER_STOP_TIMEOUT", "30")),
+        watch=args.watch if args.watch is not None else [os.getenv("KB_LOCAL_STORE", "")],
+        watch_interval=float(os.getenv("ACTION_WORKERS_WATCH_INTERVAL", "5")),
+        shared_caches=not args.no_shared_caches,
+        metrics_port=int(os.getenv("METRICS_PORT", "0")),
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: action-workers-v1
+# version: 3.1.0
+# file: rasa/action_workers.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,293 @@
+# AUTO-ATC Playbook v3 - Acciones async de Rasa
+# Variantes async de ActionSearchProduct / ActionRegisterQuote con clientes async de BD y HTTP
+#
+# Modo async del action server (en lugar de `--actions actions`):
+#   python -m rasa_sdk --actions actions_async
+# El módulo importa `actions` y re-registra las dos acciones con el mismo nombre,
+# así un solo proceso mantiene cientos de conversaciones en vuelo sin bloquear
+# el event loop en Postgres o Qdrant. Google Sheets ya no está en el turno:
+# las filas se encolan en el spool de sheets_writer.
+
+import os
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Text
+
+import httpx
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import ActionRegisterQuote, ActionSearchProduct, DatabaseManager, db_manager, log_transcript
+from embeddings import TEIEmbedder, normalize_query
+from hybrid_search import extract_sku, reciprocal_rank_fusion
+from metrics import instrument_action, record_error, step
+from pii import sanitize
+from shared_cache import SharedTTLCache
+
+try:
+    import asyncpg
+except ImportError:  # asyncpg es opcional: sin él se usa el pool psycopg2 en un hilo
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+INSERT_QUOTE_SQL = """
+    INSERT INTO quotes (conversation_id, status, products, total_amount, currency, valid_until, created_at)
+    VALUES ($1::text::bigint, 'draft', $2::jsonb, $3, $4, $5, now())
+"""
+
+
+class AsyncDatabaseManager:
+    """Fachada async sobre DatabaseManager.
+
+    Reutiliza la validación, el índice del catálogo y el cache de embeddings
+    del manager sync; solo cambia el I/O: asyncpg para Postgres (si está
+    instalado), AsyncQdrantClient para Qdrant y httpx para TEI.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.pg_pool_max = int(os.getenv("DB_POOL_MAX", "10"))
+        self._pg_pool = None
+        self._qdrant = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._init_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------
+    # Clientes (creación perezosa dentro del event loop)
+    # ------------------------------------------
+
+    def _lock(self) -> asyncio.Lock:
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        return self._init_lock
+
+    async def get_pg_pool(self):
+        if asyncpg is None:
+            return None
+        if self._pg_pool is None:
+            async with self._lock():
+                if self._pg_pool is None:
+                    self._pg_pool = await asyncpg.create_pool(self.db.dsn, min_size=1, max_size=self.pg_pool_max)
+        return self._pg_pool
+
+    @property
+    def qdrant(self):
+        if self._qdrant is None:
+            from qdrant_client import AsyncQdrantClient
+            self._qdrant = AsyncQdrantClient(url=self.db.qdrant_url)
+        return self._qdrant
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10.0)
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._pg_pool is not None:
+            await self._pg_pool.close()
+        if self._http is not None:
+            await self._http.aclose()
+        if self._qdrant is not None:
+            await self._qdrant.close()
+
+    # ------------------------------------------
+    # Caches
+    # ------------------------------------------
+
+    @staticmethod
+    async def _offload(cache, fn, *args):
+        """Llama `fn` sin bloquear el loop: con el cache compartido entre workers cada
+        get/put es un round-trip IPC (BaseManager) y va a un hilo; el local es en memoria"""
+        if isinstance(cache, SharedTTLCache):
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def remember_results(self, sender_id: str, results: List[Dict]) -> None:
+        await self._offload(self.db.shown_results, self.db.remember_results, sender_id, results)
+
+    async def resolve_shown_product(self, sender_id: str, producto: str, sku: str = None,
+                                    shown: Optional[List[Dict]] = None) -> Optional[Dict]:
+        return await self._offload(self.db.shown_results, self.db.resolve_shown_product, sender_id, producto, sku, shown)
+
+    # ------------------------------------------
+    # Knowledge base
+    # ------------------------------------------
+
+    async def embed_query(self, query: str) -> List[float]:
+        """Embedding cacheado; TEI se consulta con httpx sin bloquear el loop"""
+        key = normalize_query(query)
+        cache = self.db.embedding_cache
+        vector = await self._offload(cache, cache.get, key)
+        if vector is None:
+            embedder = self.db.embedder
+            if isinstance(embedder, TEIEmbedder):
+                response = await self.http.post(embedder.url, json={"inputs": [key], "truncate": True}, timeout=embedder.timeout)
+                response.raise_for_status()
+                vector = TEIEmbedder._parse(response.json())[0]
+            else:
+                vector = embedder.embed(key)
+            await self._offload(cache, cache.put, key, vector)
+        return vector
+
+    async def search_knowledge_base(self, query: str, limit: int = 3) -> List[Dict]:
+        """Misma semántica que DatabaseManager.search_knowledge_base, sin bloquear"""
+        try:
+            sku = extract_sku(query)
+            if sku:
+                # find_by_sku puede refrescar el índice o consultar Postgres: en un hilo
+                product = await asyncio.to_thread(self.db.find_by_sku, sku)
+                if product:
+                    return [product]
+
+            # Mismas fuentes que HybridRetriever; las pendientes al vencer el presupuesto se cancelan
+            retriever = self.db.retriever
+            if retriever.fast_path is not None:
+                fast = await asyncio.to_thread(retriever.try_fast_path, query, limit)
+                if fast is not None:
+                    return fast
+            tasks = [
+                asyncio.ensure_future(asyncio.to_thread(self.db._search_catalog, query, limit)),
+                asyncio.ensure_future(asyncio.to_thread(self.db._fulltext_search, query, limit)),
+                asyncio.ensure_future(self._vector_candidates(query, limit)),
+            ]
+            done, pending = await asyncio.wait(tasks, timeout=retriever.budget)
+            for task in pending:
+                task.cancel()
+            result_lists = []
+            for task in tasks:
+                if task not in done:
+                    continue
+                if task.exception() is not None:
+                    logger.warning(f"Search source failed: {task.exception()}")
+                elif task.result():
+                    result_lists.append(task.result())
+            return self.db._mock_fallback(reciprocal_rank_fusion(result_lists, limit, retriever.rrf_k), query, limit)
+
+        except Exception as e:
+            logger.error(f"Error searching knowledge base: {e}")
+            record_error("kb_search")
+            return []
+
+    async def _vector_candidates(self, query: str, limit: int) -> List[Dict]:
+        """Mismo breaker, timeout adaptativo, hedging y cache degradado que la variante sync"""
+        if self.db.kb_local_store_path:
+            # Búsqueda en el store local: CPU (numpy libera el GIL en el producto), fuera del loop
+            vector = await self.embed_query(query)
+            payloads = await asyncio.to_thread(self.db.local_store.search_payloads, vector, limit, self.db.kb_language)
+            return [self.db._payload_to_result(payload) for payload in payloads]
+        key = (normalize_query(query), limit)
+        try:
+            results = await self.db.qdrant_dependency.acall(self._qdrant_candidates, query, limit,
+                                                            hedge=self.db.kb_hedged_reads)
+        except Exception as e:
+            return await self._offload(self.db.vector_fallback_cache, self.db.vector_fallback, key, e)
+        cache = self.db.vector_fallback_cache
+        await self._offload(cache, cache.put, key, results)
+        return results
+
+    async def _qdrant_candidates(self, query: str, limit: int) -> List[Dict]:
+        self.db._kb_collection_missing = not await self.qdrant.collection_exists(self.db.kb_collection)
+        if self.db._kb_collection_missing:
+            return []
+
+        vector = await self.embed_query(query)
+        response = await self.qdrant.query_points(
+            collection_name=self.db.kb_collection,
+            query=vector,
+            query_filter=self.db._kb_filter(),
+            limit=limit,
+            with_payload=True,
+        )
+        return [self.db._hit_to_result(hit) for hit in response.points]
+
+    # ------------------------------------------
+    # Persistencia
+    # ------------------------------------------
+
+    async def save_quote(self, conversation_id: str, product_data: Dict) -> bool:
+        """Guarda cotización con asyncpg, o con el pool sync en un hilo si no está instalado.
+        Mismo breaker y timeout adaptativo de Postgres que la variante sync"""
+        try:
+            pool = await self.get_pg_pool()
+            if pool is None:
+                return await asyncio.to_thread(self.db.save_quote, conversation_id, product_data)
+            params = self.db.quote_params(conversation_id, product_data)
+            with self.db.postgres_dependency.guard() as timeout:
+                await pool.execute(INSERT_QUOTE_SQL, *params, timeout=timeout)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving quote: {e}")
+            record_error("db_write")
+            return False
+
+
+# Instancia global del manager async (comparte estado con db_manager)
+async_db_manager = AsyncDatabaseManager(db_manager)
+
+
+class AsyncActionSearchProduct(ActionSearchProduct):
+    """Busca productos en la knowledge base (async)"""
+
+    @instrument_action
+    @log_transcript
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        user_query = tracker.latest_message.get('text', '')
+
+        with step("validation"):
+            valid = db_manager.validate_input(user_query)
+        if not valid:
+            dispatcher.utter_message(text="Lo siento, no pude entender tu búsqueda. ¿Puedes ser más específico?")
+            return []
+
+        with step("kb_search"):
+            results = await async_db_manager.search_knowledge_base(sanitize(user_query))
+        await async_db_manager.remember_results(tracker.sender_id, results)
+        return self._respond(dispatcher, tracker, results)
+
+
+class AsyncActionRegisterQuote(ActionRegisterQuote):
+    """Registra una cotización completa (async)"""
+
+    @instrument_action
+    @log_transcript
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        with step("validation"):
+            invalid = self._validate_slots(dispatcher, tracker)
+        if invalid is not None:
+            return invalid
+
+        quote_data = self._build_quote_data(tracker)
+
+        # Precio desde lo que el usuario acaba de ver; la KB solo si no hay match
+        product = await async_db_manager.resolve_shown_product(
+            tracker.sender_id, quote_data["producto"], quote_data["sku"], tracker.get_slot("search_results"))
+        if product is None:
+            with step("kb_search"):
+                kb_results = await async_db_manager.search_knowledge_base(quote_data["producto"], limit=1)
+            product = kb_results[0] if kb_results else None
+        self._apply_price(quote_data, product)
+
+        # Guardar en base de datos
+        with step("db_write"):
+            saved = await async_db_manager.save_quote(tracker.sender_id, quote_data)
+        if saved:
+            # Integración con Google Sheets (opcional)
+            with step("sheets"):
+                self._save_to_google_sheets(quote_data)
+            return self._confirm(dispatcher, tracker)
+        else:
+            dispatcher.utter_message(text="Lo siento, hubo un error al registrar tu cotización. Por favor intenta de nuevo.")
+            return []
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: rasa-actions-async-v1
+# version: 3.1.0
+# file: rasa/actions_async.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,326 @@
+# AUTO-ATC Playbook v3 - Índice invertido del catálogo de productos
+# Búsqueda en memoria sobre products.name/description/category con plegado de tildes y prefijos
+
+import re
+import bisect
+import heapq
+import logging
+import threading
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from embeddings import fold_accents
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Palabras vacías frecuentes en consultas de clientes
+STOPWORDS = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los", "me", "mi",
+    "o", "para", "por", "que", "quiero", "se", "sin", "su", "un", "una", "unos", "unas", "y",
+})
+
+# Peso de cada campo al puntuar una coincidencia
+FIELD_WEIGHTS = (("name", 3.0), ("category", 2.0), ("description", 1.0))
+
+# Prefijos más cortos no se expanden (evita recorrer medio vocabulario con "a")
+MIN_PREFIX_LEN = 3
+MAX_PREFIX_EXPANSIONS = 64
+MAX_QUERY_TOKENS = 6
+PREFIX_CACHE_SIZE = 1024
+
+PRODUCT_COLUMNS = "id, sku, name, description, category, price, currency, stock_quantity, is_active, updated_at"
+
+
+def _stem(token: str) -> str:
+    # Plural simple: "laptops" -> "laptop", "celulares" -> "celulare" (prefijo de "celular...")
+    return token[:-1] if len(token) > 4 and token.endswith("s") else token
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Tokens en minúsculas, sin tildes, sin plural simple y sin palabras vacías"""
+    if not text:
+        return []
+    return [_stem(t) for t in _TOKEN_RE.findall(fold_accents(text.lower())) if t not in STOPWORDS]
+
+
+class CatalogIndex:
+    """Índice invertido token -> productos, separado por campo, sobre el catálogo.
+
+    Se carga una vez desde `products` y se refresca de forma incremental
+    con `updated_at`. Cada token guarda un set de productos por campo
+    (nombre, categoría, descripción) más la unión, así una búsqueda
+    resuelve intersecciones de sets en C en lugar de recorrer el catálogo.
+    Gana el producto que cubre todos los tokens y, entre ellos, el de
+    mejor peso de campo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        # token -> [set por campo de FIELD_WEIGHTS..., set con todos]
+        self._postings: Dict[str, List[Set[int]]] = {}
+        self._vocab: List[str] = []
+        self._skus: Dict[str, int] = {}
+        self._prefix_cache: Dict[str, List[Set[int]]] = {}
+        self.watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ------------------------------------------
+    # Mantenimiento del índice
+    # ------------------------------------------
+
+    @staticmethod
+    def _to_result(product: Dict[str, Any]) -> Dict[str, Any]:
+        """Formato de resultado de search_knowledge_base"""
+        price = product.get("price")
+        return {
+            "title": product.get("name") or "",
+            "content": product.get("description") or "",
+            "category": product.get("category") or "",
+            "price": float(price) if price is not None else 0.0,
+            "sku": product.get("sku"),
+        }
+
+    @staticmethod
+    def _terms(product: Dict[str, Any]) -> Dict[str, int]:
+        """token -> índice del campo de mayor peso donde aparece"""
+        terms: Dict[str, int] = {}
+        for tier, (field, _weight) in enumerate(FIELD_WEIGHTS):
+            for token in tokenize(product.get(field)):
+                terms.setdefault(token, tier)
+        return terms
+
+    @staticmethod
+    def _add_postings(postings: Dict[str, List[Set[int]]], product_id: int, terms: Dict[str, int]) -> List[str]:
+        new_tokens = []
+        for token, tier in terms.items():
+            sets = postings.get(token)
+            if sets is None:
+                sets = postings[token] = [set() for _ in range(len(FIELD_WEIGHTS) + 1)]
+                new_tokens.append(token)
+            sets[tier].add(product_id)
+            sets[-1].add(product_id)
+        return new_tokens
+
+    def upsert(self, product: Dict[str, Any]) -> None:
+        """Agrega o reemplaza un producto; si está inactivo lo quita"""
+        product_id = product["id"]
+        if product.get("is_active") is False:
+            self.remove(product_id)
+            return
+
+        terms = self._terms(product)
+        with self._lock:
+            self._prefix_cache.clear()
+            self._unindex(product_id)
+            self._docs[product_id] = self._to_result(product)
+            self._doc_terms[product_id] = terms
+            if product.get("sku"):
+                self._skus[product["sku"].upper()] = product_id
+            for token in self._add_postings(self._postings, product_id, terms):
+                bisect.insort(self._vocab, token)
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            self._prefix_cache.clear()
+            self._unindex(product_id)
+            self._docs.pop(product_id, None)
+
+    def _unindex(self, product_id: int) -> None:
+        previous = self._docs.get(product_id)
+        if previous and previous.get("sku"):
+            self._skus.pop(previous["sku"].upper(), None)
+        # Los tokens sin productos quedan en el vocabulario; no aportan resultados
+        for token, tier in self._doc_terms.pop(product_id, {}).items():
+            sets = self._postings.get(token)
+            if sets is not None:
+                sets[tier].discard(product_id)
+                sets[-1].discard(product_id)
+
+    def build(self, products: Iterable[Dict[str, Any]]) -> None:
+        """Reconstruye el índice completo (carga inicial)"""
+        docs, doc_terms, postings, skus = {}, {}, {}, {}
+        for product in products:
+            if product.get("is_active") is False:
+                continue
+            product_id = product["id"]
+            terms = self._terms(product)
+            docs[product_id] = self._to_result(product)
+            doc_terms[product_id] = terms
+            if product.get("sku"):
+                skus[product["sku"].upper()] = product_id
+            self._add_postings(postings, product_id, terms)
+        with self._lock:
+            self._docs, self._doc_terms, self._postings, self._skus = docs, doc_terms, postings, skus
+            self._vocab = sorted(postings)
+            self._prefix_cache = {}
+
+    # ------------------------------------------
+    # Carga desde PostgreSQL
+    # ------------------------------------------
+
+    @staticmethod
+    def _fetch(conn, since: Optional[datetime]) -> List[Dict[str, Any]]:
+        with conn.cursor() as cur:
+            if since is None:
+                cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM products WHERE is_active")
+            else:
+                # >= : filas con el mismo updated_at que el watermark pueden
+                # haberse confirmado después de la última lectura; upsert es idempotente
+                cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM products WHERE updated_at >= %s", (since,))
+            columns = [c[0] for c in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def _advance_watermark(self, rows: List[Dict[str, Any]]) -> None:
+        stamps = [r["updated_at"] for r in rows if r.get("updated_at") is not None]
+        if stamps:
+            latest = max(stamps)
+            if self.watermark is None or latest > self.watermark:
+                self.watermark = latest
+
+    def load(self, conn) -> int:
+        """Carga completa desde la tabla products"""
+        rows = self._fetch(conn, None)
+        self.build(rows)
+        self._advance_watermark(rows)
+        logger.info(f"Catalog index loaded: {len(self._docs)} products, {len(self._vocab)} terms")
+        return len(rows)
+
+    def refresh(self, conn) -> int:
+        """Aplica los cambios desde el último watermark (carga completa si no hay)"""
+        if self.watermark is None:
+            return self.load(conn)
+        rows = self._fetch(conn, self.watermark)
+        for row in rows:
+            self.upsert(row)
+        self._advance_watermark(rows)
+        return len(rows)
+
+    # ------------------------------------------
+    # Búsqueda
+    # ------------------------------------------
+
+    def _resolve(self, token: str) -> Optional[List[Set[int]]]:
+        """Sets por campo del token exacto más los términos que lo tienen como prefijo"""
+        exact = self._postings.get(token)
+        if len(token) < MIN_PREFIX_LEN:
+            return exact if exact and exact[-1] else None
+
+        cached = self._prefix_cache.get(token)
+        if cached is not None:
+            return cached
+
+        expansions = [exact] if exact else []
+        start = bisect.bisect_left(self._vocab, token)
+        for term in self._vocab[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                expansions.append(self._postings[term])
+        expansions = [sets for sets in expansions if sets[-1]]
+        if not expansions:
+            return None
+        if len(expansions) == 1:
+            return expansions[0]
+        # Un producto cuenta en el mejor campo en que aparezca alguna expansión
+        merged = [set().union(*(sets[i] for sets in expansions)) for i in range(len(FIELD_WEIGHTS) + 1)]
+        for i in range(1, len(FIELD_WEIGHTS)):
+            merged[i] -= set().union(*merged[:i])
+        # Las uniones de prefijos son caras y las queries se repiten: se memorizan
+        if len(self._prefix_cache) >= PREFIX_CACHE_SIZE:
+            self._prefix_cache.clear()
+        self._prefix_cache[token] = merged
+        return merged
+
+    @staticmethod
+    def _score(product_id: int, resolved: Sequence[List[Set[int]]]) -> float:
+        score = 0.0
+        for sets in resolved:
+            for tier, (_field, weight) in enumerate(FIELD_WEIGHTS):
+                if product_id in sets[tier]:
+                    score += weight
+                    break
+        return score
+
+    def _top(self, resolved: Sequence[List[Set[int]]], limit: int) -> List[Tuple[float, int]]:
+        """Mejores (puntaje, producto) entre los que contienen todos los tokens"""
+        if len(resolved) == 1:
+            # Un solo token: se recorren los campos por peso sin puntuar todo
+            best: List[Tuple[float, int]] = []
+            for tier, (_field, weight) in enumerate(FIELD_WEIGHTS):
+                if len(best) >= limit:
+                    break
+                best.extend((weight, pid) for pid in heapq.nsmallest(limit - len(best), resolved[0][tier]))
+            return best
+
+        # Intersección empezando por el set más chico
+        ordered = sorted(resolved, key=lambda sets: len(sets[-1]))
+        candidates = ordered[0][-1] & ordered[1][-1]
+        for sets in ordered[2:]:
+            candidates &= sets[-1]
+            if not candidates:
+                return []
+
+        # Atajo habitual: suficientes productos con todos los tokens en el nombre
+        if len(candidates) > limit:
+            in_names = candidates
+            for sets in ordered:
+                in_names = in_names & sets[0]
+            if len(in_names) >= limit:
+                top_score = FIELD_WEIGHTS[0][1] * len(resolved)
+                return [(top_score, pid) for pid in heapq.nsmallest(limit, in_names)]
+
+        scored = [(self._score(pid, resolved), pid) for pid in candidates]
+        return heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+
+    def get_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
+        """Producto por SKU exacto (sin distinguir mayúsculas)"""
+        with self._lock:
+            product_id = self._skus.get(sku.upper())
+            return dict(self._docs[product_id]) if product_id is not None else None
+
+    def search(self, query: str, limit: int = 3, complete_only: bool = False) -> List[Dict[str, Any]]:
+        """Productos ordenados por tokens de la query cubiertos y peso de campo.
+
+        Con `complete_only` solo vuelven productos que coinciden (exacto o por
+        prefijo) con todos los tokens de la query.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+        if not tokens:
+            return []
+
+        with self._lock:
+            resolved = [sets for sets in map(self._resolve, tokens) if sets is not None]
+            # Al menos la mitad de los tokens deben coincidir con algún producto
+            min_coverage = len(tokens) if complete_only else max(1, (len(tokens) + 1) // 2)
+            if len(resolved) < min_coverage:
+                return []
+
+            # Primero cobertura total; si no hay, subconjuntos de tokens cada vez menores
+            for size in range(len(resolved), min_coverage - 1, -1):
+                found: Dict[int, float] = {}
+                for subset in combinations(resolved, size):
+                    for score, pid in self._top(subset, limit):
+                        if score > found.get(pid, -1.0):
+                            found[pid] = score
+                if found:
+                    best = heapq.nlargest(limit, found, key=lambda pid: (found[pid], -pid))
+                    return [dict(self._docs[pid]) for pid in best]
+            return []
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: catalog-index-v1
+# version: 3.1.0
+# file: rasa/catalog_index.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
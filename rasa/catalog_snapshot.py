@@ -0,0 +1,202 @@
+# AUTO-ATC Playbook v3 - Snapshot de precios y stock del catálogo
+# Copia compacta en memoria de products (precio, moneda, stock) por SKU y nombre,
+# mantenida al día con LISTEN/NOTIFY sobre el canal del trigger de db/schema.sql
+
+import json
+import select
+import logging
+import threading
+from typing import Any, Dict, NamedTuple, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+from embeddings import fold_accents, normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Canal de pg_notify del trigger notify_product_change (db/schema.sql)
+CATALOG_CHANNEL = "catalog_changes"
+
+SNAPSHOT_SQL = """
+    SELECT id, sku, name, price, currency, stock_quantity
+    FROM products
+    WHERE is_active
+"""
+
+
+class ProductPrice(NamedTuple):
+    id: int
+    sku: Optional[str]
+    name: str
+    price: float
+    currency: str
+    stock: int
+
+
+def _name_key(name: Optional[str]) -> str:
+    return fold_accents(normalize_query(name or ""))
+
+
+def _entry(product_id, sku, name, price, currency, stock) -> ProductPrice:
+    return ProductPrice(
+        int(product_id),
+        sku,
+        name or "",
+        float(price) if price is not None else 0.0,
+        currency or "USD",
+        int(stock or 0),
+    )
+
+
+class CatalogSnapshot:
+    """Precio y stock de los productos activos con búsqueda O(1) por SKU o nombre.
+
+    `load` hace la carga completa; `apply` aplica el payload JSON de una
+    notificación. Las lecturas no toman lock: cada cambio reemplaza entradas
+    inmutables en los dicts.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[int, ProductPrice] = {}
+        self._by_sku: Dict[str, ProductPrice] = {}
+        self._by_name: Dict[str, ProductPrice] = {}
+        self._lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.notifications = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self, conn) -> int:
+        """Carga completa de los productos activos"""
+        with conn.cursor() as cur:
+            cur.execute(SNAPSHOT_SQL)
+            rows = cur.fetchall()
+        by_id, by_sku, by_name = {}, {}, {}
+        for row in rows:
+            entry = _entry(*row)
+            by_id[entry.id] = entry
+            if entry.sku:
+                by_sku[entry.sku.upper()] = entry
+            by_name.setdefault(_name_key(entry.name), entry)
+        with self._lock:
+            self._by_id, self._by_sku, self._by_name = by_id, by_sku, by_name
+        self.loaded.set()
+        logger.info(f"Catalog snapshot loaded: {len(by_id)} products")
+        return len(by_id)
+
+    def _remove(self, product_id: int) -> None:
+        previous = self._by_id.pop(product_id, None)
+        if previous is None:
+            return
+        if previous.sku and self._by_sku.get(previous.sku.upper()) is previous:
+            del self._by_sku[previous.sku.upper()]
+        key = _name_key(previous.name)
+        if self._by_name.get(key) is previous:
+            del self._by_name[key]
+
+    def apply(self, payload: str) -> None:
+        """Aplica una notificación {"op", "id", "sku", "name", "price", "currency", "stock_quantity", "is_active"}"""
+        change = json.loads(payload)
+        product_id = int(change["id"])
+        with self._lock:
+            self._remove(product_id)
+            if change.get("op") != "DELETE" and change.get("is_active", True):
+                entry = _entry(product_id, change.get("sku"), change.get("name"), change.get("price"),
+                               change.get("currency"), change.get("stock_quantity"))
+                self._by_id[product_id] = entry
+                if entry.sku:
+                    self._by_sku[entry.sku.upper()] = entry
+                self._by_name[_name_key(entry.name)] = entry
+            self.notifications += 1
+
+    def lookup(self, sku: Optional[str] = None, name: Optional[str] = None) -> Optional[ProductPrice]:
+        """Entrada por SKU exacto o, si no hay, por nombre normalizado"""
+        if sku and sku != "N/A":
+            entry = self._by_sku.get(sku.upper())
+            if entry is not None:
+                return entry
+        if name:
+            return self._by_name.get(_name_key(name))
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"products": len(self._by_id), "loaded": self.loaded.is_set(), "notifications": self.notifications}
+
+
+class SnapshotListener:
+    """Hilo con una conexión dedicada que escucha `CATALOG_CHANNEL`.
+
+    Hace LISTEN antes de la carga completa, así ningún cambio queda entre
+    la carga y la primera notificación. Si la conexión se cae, reconecta y
+    recarga (las notificaciones no se encolan para sesiones desconectadas).
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, dsn: str, channel: str = CATALOG_CHANNEL,
+                 poll_interval: float = 5.0, reconnect_delay: float = 5.0, connect=psycopg2.connect):
+        self.snapshot = snapshot
+        self.dsn = dsn
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self._connect = connect
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel}")
+                self.snapshot.load(conn)
+                self._listen(conn)
+            except Exception as e:
+                logger.warning(f"Catalog snapshot listener error: {e}; reconnecting in {self.reconnect_delay}s")
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, conn) -> None:
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    self.snapshot.apply(notify.payload)
+                except (ValueError, KeyError) as e:
+                    # Payload ilegible: recargar para no quedar con un precio viejo
+                    logger.warning(f"Invalid catalog notification ({e}); reloading snapshot")
+                    self.snapshot.load(conn)
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: catalog-snapshot-v1
+# version: 3.1.0
+# file: rasa/catalog_snapshot.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
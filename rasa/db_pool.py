@@ -0,0 +1,277 @@
+# AUTO-ATC Playbook v3 - Pool de conexiones PostgreSQL
+# Pool acotado y thread-safe con health checks, vida máxima por conexión y estadísticas
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """No se obtuvo una conexión del pool dentro del timeout"""
+
+
+class _PooledConnection:
+    """Conexión física más los metadatos que usa el pool"""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Pool de conexiones psycopg2 acotado a `maxconn` conexiones simultáneas.
+
+    Las conexiones se abren bajo demanda (el import no toca la red), se validan
+    con `SELECT 1` si estuvieron ociosas más de `health_check_interval` segundos
+    y se reciclan al superar `max_lifetime`. Si el pool está agotado, el
+    llamador espera hasta `acquire_timeout` segundos antes de `PoolTimeout`.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        maxconn: int = 10,
+        max_idle: Optional[int] = None,
+        max_lifetime: float = 1800.0,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 5.0,
+        connect: Callable[[str], Any] = psycopg2.connect,
+    ):
+        if maxconn < 1:
+            raise ValueError("maxconn must be >= 1")
+        self.dsn = dsn
+        self.maxconn = maxconn
+        self.max_idle = max_idle if max_idle is not None else maxconn
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: List[_PooledConnection] = []
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._opening = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_check_failures": 0,
+            "expired": 0,
+        }
+
+    # ------------------------------------------
+    # API pública
+    # ------------------------------------------
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Obtiene una conexión; bloquea si el pool está lleno"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.pool.PoolError("connection pool is closed")
+
+                candidate = self._idle.pop() if self._idle else None
+                if candidate is None:
+                    if len(self._in_use) + self._opening < self.maxconn:
+                        self._opening += 1
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            self._record_wait(start, waited)
+                            raise PoolTimeout(f"no connection available after {timeout:.2f}s")
+                        waited = True
+                        self._cond.wait(remaining)
+                        continue
+                else:
+                    # Reservamos el cupo mientras se valida fuera del lock
+                    self._opening += 1
+
+            # Fuera del lock: validar o abrir (operaciones de red)
+            pooled = self._validate(candidate) if candidate is not None else None
+            if pooled is None:
+                try:
+                    pooled = _PooledConnection(self._connect(self.dsn))
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["connections_created"] += 1
+
+            with self._cond:
+                self._opening -= 1
+                self._in_use[id(pooled.conn)] = pooled
+                self._stats["checkouts"] += 1
+                self._record_wait(start, waited)
+            return pooled.conn
+
+    def putconn(self, conn: Any, discard: bool = False) -> None:
+        """Devuelve una conexión al pool (o la descarta si está rota)"""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+        if pooled is None:
+            raise psycopg2.pool.PoolError("trying to put unkeyed connection")
+
+        if not discard and not self._closed:
+            discard = not self._reset(pooled)
+
+        with self._cond:
+            if discard or self._closed or len(self._idle) >= self.max_idle:
+                self._stats["connections_discarded"] += 1
+                self._close_quietly(pooled)
+            else:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    def prewarm(self, count: int) -> int:
+        """Abre hasta `count` conexiones y las deja ociosas (warm-up); devuelve cuántas"""
+        conns = []
+        try:
+            for _ in range(min(count, self.maxconn)):
+                conns.append(self.getconn())
+        finally:
+            for conn in conns:
+                self.putconn(conn)
+        return len(conns)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager: presta una conexión y la devuelve al salir.
+
+        Si el bloque lanza una excepción se hace rollback antes de devolverla.
+        """
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot de contadores del pool"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["in_use"] = len(self._in_use)
+            snapshot["idle"] = len(self._idle)
+            snapshot["size"] = len(self._in_use) + len(self._idle)
+            snapshot["maxconn"] = self.maxconn
+        checkouts = snapshot["checkouts"]
+        snapshot["wait_time_avg"] = snapshot["wait_time_total"] / checkouts if checkouts else 0.0
+        return snapshot
+
+    def closeall(self) -> None:
+        """Cierra las conexiones ociosas; las prestadas se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    # ------------------------------------------
+    # Internos
+    # ------------------------------------------
+
+    def _record_wait(self, start: float, waited: bool) -> None:
+        # Se llama con el lock tomado
+        if not waited:
+            return
+        elapsed = time.monotonic() - start
+        self._stats["waits"] += 1
+        self._stats["wait_time_total"] += elapsed
+        if elapsed > self._stats["wait_time_max"]:
+            self._stats["wait_time_max"] = elapsed
+
+    def _validate(self, pooled: _PooledConnection) -> Optional[_PooledConnection]:
+        """Devuelve la conexión si sigue sana, o None si hubo que descartarla"""
+        now = time.monotonic()
+        reason = None
+
+        if pooled.conn.closed:
+            reason = "closed"
+        elif self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            reason = "expired"
+        elif self.health_check_interval is not None and now - pooled.last_used > self.health_check_interval:
+            try:
+                with pooled.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                pooled.conn.rollback()
+            except Exception as e:
+                logger.warning(f"Pooled connection failed health check: {e}")
+                reason = "health_check"
+
+        if reason is None:
+            return pooled
+
+        with self._cond:
+            self._stats["connections_discarded"] += 1
+            if reason == "expired":
+                self._stats["expired"] += 1
+            elif reason == "health_check":
+                self._stats["health_check_failures"] += 1
+        self._close_quietly(pooled)
+        return None
+
+    def _reset(self, pooled: _PooledConnection) -> bool:
+        """Deja la conexión sin transacción abierta; False si no es reutilizable"""
+        conn = pooled.conn
+        if conn.closed:
+            return False
+        try:
+            status = conn.get_transaction_status()
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding pooled connection after failed reset: {e}")
+            return False
+
+    @staticmethod
+    def _close_quietly(pooled: _PooledConnection) -> None:
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: db-pool-v1
+# version: 3.1.0
+# file: rasa/db_pool.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
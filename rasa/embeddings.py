@@ -0,0 +1,114 @@
+# AUTO-ATC Playbook v3 - Embeddings para búsqueda vectorial
+# Embedders intercambiables (TEI por HTTP o hashing local determinístico) y normalización de queries
+
+import os
+import re
+import math
+import hashlib
+import logging
+import unicodedata
+from typing import List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fold_accents(text: str) -> str:
+    """Quita tildes y diacríticos: 'cámara' -> 'camara'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_query(query: str) -> str:
+    """Clave canónica de una consulta: minúsculas y espacios colapsados"""
+    return _WHITESPACE_RE.sub(" ", query.strip().lower())
+
+
+class HashingEmbedder:
+    """Embedder local y determinístico basado en feature hashing.
+
+    No requiere red ni modelos: sirve para tests y desarrollo. Proyecta
+    tokens y trigramas de caracteres a `dim` posiciones con signo y
+    normaliza a norma 1, así queries parecidas quedan cerca en coseno.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(fold_accents(text.lower()))
+        features = list(tokens)
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+
+class TEIEmbedder:
+    """Cliente HTTP de Text Embeddings Inference (mismo endpoint que WF_KB_ingest_v2)"""
+
+    def __init__(self, base_url: str, path: str = "/embeddings", timeout: float = 5.0):
+        self.url = base_url.rstrip("/") + path
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @staticmethod
+    def _parse(data) -> List[List[float]]:
+        # TEI nativo devuelve [[...], ...]; la variante compatible OpenAI
+        # devuelve {"embeddings"|"data": [{"embedding": [...]}, ...]}
+        if isinstance(data, dict):
+            items = data.get("embeddings") or data.get("data") or []
+            return [item["embedding"] if isinstance(item, dict) else item for item in items]
+        return data
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = self.session.post(self.url, json={"inputs": texts, "truncate": True}, timeout=self.timeout)
+        response.raise_for_status()
+        vectors = self._parse(response.json())
+        if len(vectors) != len(texts):
+            raise ValueError(f"TEI returned {len(vectors)} embeddings for {len(texts)} inputs")
+        return vectors
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
+
+
+def create_embedder(kind: Optional[str] = None):
+    """Crea el embedder configurado por KB_EMBEDDER (tei | hashing)"""
+    tei_url = os.getenv("TEI_URL")
+    kind = (kind or os.getenv("KB_EMBEDDER") or ("tei" if tei_url else "hashing")).lower()
+
+    if kind == "tei":
+        if not tei_url:
+            raise ValueError("KB_EMBEDDER=tei requires TEI_URL")
+        return TEIEmbedder(tei_url, timeout=float(os.getenv("TEI_TIMEOUT", "5")))
+    if kind == "hashing":
+        return HashingEmbedder(dim=int(os.getenv("KB_EMBEDDING_DIM", "384")))
+    raise ValueError(f"Unknown embedder: {kind}")
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: embeddings-v1
+# version: 3.1.0
+# file: rasa/embeddings.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,206 @@
+# AUTO-ATC Playbook v3 - Búsqueda híbrida léxica + vectorial
+# Fuentes en paralelo con presupuesto de latencia, fusión por reciprocal-rank
+# fusion (RRF) y ruta directa por SKU
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# SKU exacto: segmentos alfanuméricos separados por guiones con al menos un dígito
+# ("DELL-XPS13", "sku: TV-55"); "wi-fi" no es SKU
+SKU_PATTERN = re.compile(r'^\s*(?:sku\s*[:#]?\s*)?((?=\S*\d)[a-z0-9]+(?:[-_./][a-z0-9]+)+)\s*$', re.IGNORECASE)
+
+# Constante k de RRF (valor habitual de la literatura; amortigua el peso del primer puesto)
+RRF_K = 60
+
+# Las expresiones to_tsvector('spanish', <columna>) son idénticas a las de los índices
+# GIN de db/schema.sql; con otra expresión PostgreSQL no usaría el índice. La query
+# se arma con OR entre términos para no exigir que aparezcan todas las palabras.
+FULLTEXT_PRODUCTS_SQL = """
+    WITH q AS (SELECT replace(plainto_tsquery('spanish', %(query)s)::text, '&', '|')::tsquery AS query)
+    SELECT p.name, p.description, p.category, p.price, p.sku,
+           ts_rank(to_tsvector('spanish', p.name), q.query) * 2
+             + ts_rank(to_tsvector('spanish', coalesce(p.description, '')), q.query) AS rank
+    FROM products p, q
+    WHERE p.is_active
+      AND (to_tsvector('spanish', p.name) @@ q.query OR to_tsvector('spanish', p.description) @@ q.query)
+    ORDER BY rank DESC
+    LIMIT %(limit)s
+"""
+
+FULLTEXT_KB_DOCUMENTS_SQL = """
+    WITH q AS (SELECT replace(plainto_tsquery('spanish', %(query)s)::text, '&', '|')::tsquery AS query)
+    SELECT d.title, left(d.content, 500), d.category,
+           ts_rank(to_tsvector('spanish', d.title), q.query) * 2
+             + ts_rank(to_tsvector('spanish', coalesce(d.content, '')), q.query) AS rank
+    FROM kb_documents d, q
+    WHERE d.is_active
+      AND (to_tsvector('spanish', d.title) @@ q.query OR to_tsvector('spanish', d.content) @@ q.query)
+    ORDER BY rank DESC
+    LIMIT %(limit)s
+"""
+
+# extract_sku devuelve el SKU en mayúsculas: compara con upper(sku), que usa el
+# índice de expresión idx_products_sku_upper
+PRODUCT_BY_SKU_SQL = """
+    SELECT name, description, category, price, sku FROM products WHERE upper(sku) = %s AND is_active LIMIT 1
+"""
+
+
+def extract_sku(query: str) -> Optional[str]:
+    """SKU si la query es solo un código de producto, o None"""
+    match = SKU_PATTERN.match(query or "")
+    return match.group(1).upper() if match else None
+
+
+def _product_result(row) -> Dict[str, Any]:
+    name, description, category, price, sku = row[:5]
+    return {
+        "title": name or "",
+        "content": description or "",
+        "category": category or "",
+        "price": float(price) if price is not None else 0.0,
+        "sku": sku,
+    }
+
+
+def product_by_sku(conn, sku: str) -> Optional[Dict[str, Any]]:
+    with conn.cursor() as cur:
+        cur.execute(PRODUCT_BY_SKU_SQL, (sku,))
+        row = cur.fetchone()
+    return _product_result(row) if row else None
+
+
+def fulltext_search(conn, query: str, limit: int, include_products: bool = True) -> List[Dict[str, Any]]:
+    """Full-text en kb_documents (y products) ordenado por ts_rank"""
+    ranked = []
+    with conn.cursor() as cur:
+        if include_products:
+            cur.execute(FULLTEXT_PRODUCTS_SQL, {"query": query, "limit": limit})
+            ranked.extend((row[5], _product_result(row)) for row in cur.fetchall())
+        cur.execute(FULLTEXT_KB_DOCUMENTS_SQL, {"query": query, "limit": limit})
+        for title, content, category, rank in cur.fetchall():
+            ranked.append((rank, {"title": title or "", "content": content or "", "category": category or "", "price": 0.0}))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return [result for _, result in ranked[:limit]]
+
+
+def _result_key(result: Dict[str, Any]) -> str:
+    # Los hits de Qdrant no traen SKU: el título es la clave común a todas las fuentes
+    return (result.get("title") or "").strip().lower()
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Dict[str, Any]]], limit: int, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """score(d) = sum(1 / (k + rank)) sobre las listas donde aparece d.
+
+    Un mismo resultado en varias fuentes se deduplica por título; se conserva
+    la versión de la primera fuente que lo trajo.
+    """
+    scores: Dict[str, float] = {}
+    first_seen: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            key = _result_key(result)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(key, result)
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [first_seen[key] for key in ordered[:limit]]
+
+
+class HybridRetriever:
+    """Ejecuta las fuentes en paralelo y fusiona lo que terminó dentro del presupuesto.
+
+    `sources` es un dict ordenado nombre -> fn(query, limit) -> resultados.
+    Una fuente que falla o no termina a tiempo se omite (su hilo sigue hasta
+    terminar, pero el resultado se descarta); las demás responden igual.
+
+    `fast_path` (opcional, misma firma) corre antes, en el hilo que llama: si
+    ya trae `limit` resultados se devuelven sin lanzar las fuentes. Pensado
+    para el índice del catálogo en memoria con coincidencia completa.
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[str, int], List[Dict[str, Any]]]],
+                 budget: float = 0.3, max_workers: int = 8, rrf_k: int = RRF_K,
+                 fast_path: Optional[Callable[[str, int], List[Dict[str, Any]]]] = None):
+        self.sources = sources
+        self.budget = budget
+        self.rrf_k = rrf_k
+        self.fast_path = fast_path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid-search")
+        self._lock = threading.Lock()
+        self._stats = {name: {"calls": 0, "timeouts": 0, "errors": 0, "empty": 0} for name in sources}
+        self._fast_path_stats = {"calls": 0, "hits": 0, "errors": 0}
+
+    def try_fast_path(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Resultados del camino rápido si alcanzan `limit`, o None para buscar en todas las fuentes"""
+        if self.fast_path is None:
+            return None
+        outcome = "calls"
+        results = None
+        try:
+            found = self.fast_path(query, limit) or []
+            if len(found) >= limit:
+                results, outcome = found[:limit], "hits"
+        except Exception as e:
+            outcome = "errors"
+            logger.warning(f"Search fast path failed: {e}")
+        with self._lock:
+            self._fast_path_stats["calls"] += 1
+            if outcome != "calls":
+                self._fast_path_stats[outcome] += 1
+        return results
+
+    def search(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
+        fast = self.try_fast_path(query, limit)
+        if fast is not None:
+            return fast
+
+        deadline = time.monotonic() + self.budget
+        futures = {name: self._executor.submit(source, query, limit) for name, source in self.sources.items()}
+        wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+
+        result_lists = []
+        for name, future in futures.items():
+            outcome = "calls"
+            if not future.done():
+                outcome = "timeouts"
+                logger.warning(f"Search source {name} exceeded {self.budget * 1000:.0f}ms budget; skipped")
+            elif future.exception() is not None:
+                outcome = "errors"
+                logger.warning(f"Search source {name} failed: {future.exception()}")
+            else:
+                results = future.result() or []
+                if results:
+                    result_lists.append(results)
+                else:
+                    outcome = "empty"
+            with self._lock:
+                self._stats[name]["calls"] += 1
+                if outcome != "calls":
+                    self._stats[name][outcome] += 1
+
+        return reciprocal_rank_fusion(result_lists, limit, self.rrf_k)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Llamadas, timeouts, errores y respuestas vacías por fuente (y uso del camino rápido)"""
+        with self._lock:
+            snapshot = {name: dict(counts) for name, counts in self._stats.items()}
+            if self.fast_path is not None:
+                snapshot["fast_path"] = dict(self._fast_path_stats)
+            return snapshot
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: hybrid-search-v1
+# version: 3.1.0
+# file: rasa/hybrid_search.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,309 @@
+# AUTO-ATC Playbook v3 - Ingestión de la knowledge base
+# Pipeline en streaming: documentos -> chunks por oraciones con solapamiento ->
+# embeddings por lote -> upserts por lote a Qdrant con concurrencia acotada
+#
+# Reemplaza el camino lento de WF_KB_ingest_v2 (un request a TEI y un upsert
+# con wait=true por cada chunk de 800 caracteres):
+#   python rasa/kb_ingest.py documentos.jsonl --collection products
+# Cada línea del JSONL es un documento: {"id", "title", "text", "category", "language", ...}
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from qdrant_client import models
+
+from embeddings import create_embedder
+from pii import PIIMasker
+
+logger = logging.getLogger(__name__)
+
+# Namespace de los ids de punto: el mismo (doc_id, chunk) siempre cae en el mismo punto
+POINT_NAMESPACE = uuid.UUID("6f1c4a52-3d0e-4b8f-9a57-2b1d8e0c7a31")
+
+# Fin de oración seguido de espacio, o salto de párrafo
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\n\s*\n')
+WORD = re.compile(r'\S+')
+
+# Campos del documento que no se copian al payload
+_DOCUMENT_FIELDS = {"id", "text"}
+
+
+# ==========================================
+# LECTURA Y CHUNKING
+# ==========================================
+
+def read_jsonl(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Documentos de un JSONL, uno por línea, sin cargar el archivo completo"""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            logger.warning(f"Skipping invalid JSON on line {number}")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence and sentence.strip()]
+
+
+def chunk_text(text: str, max_tokens: int = 200, overlap_tokens: int = 40) -> List[str]:
+    """Agrupa oraciones hasta `max_tokens` palabras; cada chunk repite las últimas
+    oraciones del anterior (hasta `overlap_tokens` palabras). Una oración más
+    larga que `max_tokens` se corta por palabras con el mismo solapamiento."""
+    if overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be smaller than max_tokens")
+
+    chunks: List[str] = []
+    current: List[List[str]] = []  # oraciones (como listas de palabras) del chunk en curso
+    size = 0
+
+    def emit():
+        chunks.append(" ".join(" ".join(words) for words in current))
+
+    for sentence in split_sentences(text):
+        words = WORD.findall(sentence)
+        if len(words) > max_tokens:
+            if current:
+                emit()
+                current, size = [], 0
+            step = max_tokens - overlap_tokens
+            for start in range(0, len(words), step):
+                chunks.append(" ".join(words[start:start + max_tokens]))
+                if start + max_tokens >= len(words):
+                    break
+            continue
+
+        if size + len(words) > max_tokens and current:
+            emit()
+            # Solapamiento: conservar las últimas oraciones que entren en overlap_tokens
+            kept: List[List[str]] = []
+            kept_size = 0
+            for previous in reversed(current):
+                if kept_size + len(previous) > overlap_tokens:
+                    break
+                kept.insert(0, previous)
+                kept_size += len(previous)
+            current, size = kept, kept_size
+
+        current.append(words)
+        size += len(words)
+
+    if current:
+        emit()
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(doc_id: str, chunk_index: int) -> str:
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{doc_id}:{chunk_index}"))
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+
+class KBIngestor:
+    """Ingesta documentos en una colección de Qdrant.
+
+    `embedder` necesita `embed_batch(texts)` (TEIEmbedder en producción,
+    HashingEmbedder en tests) y `client` la API de QdrantClient
+    (`QdrantClient(":memory:")` sirve como stand-in local). Los chunks cuyo
+    hash coincide con el guardado en el payload no se re-embeben ni se suben.
+    Con `masker`, los chunks de cada documento se enmascaran (PII) en una
+    pasada antes de calcular el hash y embeber.
+    """
+
+    def __init__(
+        self,
+        client,
+        embedder,
+        collection: str = "products",
+        max_tokens: int = 200,
+        overlap_tokens: int = 40,
+        batch_size: int = 32,
+        concurrency: int = 4,
+        default_language: str = "es",
+        masker: Optional[PIIMasker] = None,
+    ):
+        self.client = client
+        self.embedder = embedder
+        self.collection = collection
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.default_language = default_language
+        self.masker = masker
+        self._collection_ready = False
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {"documents": 0, "chunks": 0, "unchanged": 0, "embedded": 0,
+                "upserted": 0, "batches": 0, "pruned_documents": 0, "seconds": 0.0}
+
+    def _ensure_collection(self, dim: int) -> None:
+        if self._collection_ready:
+            return
+        if not self.client.collection_exists(self.collection):
+            self.client.create_collection(
+                self.collection,
+                vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+            )
+        self._collection_ready = True
+
+    def _chunks(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Chunks con payload listo para Qdrant; poda los chunks sobrantes de cada documento"""
+        for document in documents:
+            text = document.get("text") or ""
+            doc_id = str(document.get("id") or document.get("source") or content_hash(text))
+            metadata = {k: v for k, v in document.items() if k not in _DOCUMENT_FIELDS}
+            metadata.setdefault("language", self.default_language)
+
+            pieces = chunk_text(text, self.max_tokens, self.overlap_tokens)
+            if self.masker is not None:
+                pieces = self.masker.mask_batch(pieces)
+            self.stats["documents"] += 1
+            for index, piece in enumerate(pieces):
+                payload = dict(metadata)
+                payload.update({
+                    "doc_id": doc_id,
+                    "chunk_index": index,
+                    "content": piece,
+                    "content_hash": content_hash(piece),
+                })
+                self.stats["chunks"] += 1
+                yield {"id": point_id(doc_id, index), "payload": payload}
+            self._prune(doc_id, len(pieces))
+
+    def _prune(self, doc_id: str, keep: int) -> None:
+        """Borra los chunks de una versión anterior más larga del documento"""
+        if not self._collection_ready:
+            return
+        self.client.delete(
+            self.collection,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="doc_id", match=models.MatchValue(value=doc_id)),
+                models.FieldCondition(key="chunk_index", range=models.Range(gte=keep)),
+            ])),
+            wait=False,
+        )
+        self.stats["pruned_documents"] += 1
+
+    def _process_batch(self, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Filtra chunks sin cambios, embebe el resto en una llamada y los sube en un upsert"""
+        changed = batch
+        if self._collection_ready:
+            stored = self.client.retrieve(self.collection, ids=[chunk["id"] for chunk in batch],
+                                          with_payload=["content_hash"], with_vectors=False)
+            hashes = {str(point.id): (point.payload or {}).get("content_hash") for point in stored}
+            changed = [chunk for chunk in batch if hashes.get(chunk["id"]) != chunk["payload"]["content_hash"]]
+        if not changed:
+            return {"unchanged": len(batch), "embedded": 0, "upserted": 0}
+
+        vectors = self.embedder.embed_batch([chunk["payload"]["content"] for chunk in changed])
+        self._ensure_collection(len(vectors[0]))
+        self.client.upsert(
+            self.collection,
+            points=[models.PointStruct(id=chunk["id"], vector=vector, payload=chunk["payload"])
+                    for chunk, vector in zip(changed, vectors)],
+            wait=True,
+        )
+        return {"unchanged": len(batch) - len(changed), "embedded": len(changed), "upserted": len(changed)}
+
+    def ingest(self, documents: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Procesa un stream de documentos; a lo sumo `concurrency` lotes en vuelo"""
+        start = time.perf_counter()
+        self.stats = self._empty_stats()
+        self._collection_ready = self.client.collection_exists(self.collection)
+
+        def collect(done):
+            for future in done:
+                for key, value in future.result().items():
+                    self.stats[key] += value
+                self.stats["batches"] += 1
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = set()
+            batch: List[Dict[str, Any]] = []
+            for chunk in self._chunks(documents):
+                batch.append(chunk)
+                if len(batch) < self.batch_size:
+                    continue
+                if not self._collection_ready and not in_flight:
+                    # El primer lote crea la colección antes de paralelizar
+                    collect([executor.submit(self._process_batch, batch)])
+                else:
+                    if len(in_flight) >= self.concurrency:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    in_flight.add(executor.submit(self._process_batch, batch))
+                batch = []
+            if batch:
+                in_flight.add(executor.submit(self._process_batch, batch))
+            collect(wait(in_flight)[0])
+
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        return dict(self.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta de documentos a la knowledge base (Qdrant)")
+    parser.add_argument("path", help="JSONL con un documento por línea ('-' para stdin)")
+    parser.add_argument("--collection", default=os.getenv("QDRANT_COLLECTION", "products"))
+    parser.add_argument("--max-tokens", type=int, default=int(os.getenv("KB_CHUNK_TOKENS", "200")))
+    parser.add_argument("--overlap", type=int, default=int(os.getenv("KB_CHUNK_OVERLAP", "40")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("KB_INGEST_BATCH_SIZE", "32")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("KB_INGEST_CONCURRENCY", "4")))
+    parser.add_argument("--mask-pii", action="store_true", default=os.getenv("KB_MASK_PII", "false").lower() == "true",
+                        help="enmascarar emails, teléfonos, documentos y tarjetas de los chunks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from qdrant_client import QdrantClient
+
+    ingestor = KBIngestor(
+        QdrantClient(url=os.getenv("QDRANT_URL", "http://qdrant:6333")),
+        create_embedder(),
+        collection=args.collection,
+        max_tokens=args.max_tokens,
+        overlap_tokens=args.overlap,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        default_language=os.getenv("KB_LANGUAGE", "es"),
+        masker=PIIMasker() if args.mask_pii else None,
+    )
+    if args.path == "-":
+        stats = ingestor.ingest(read_jsonl(sys.stdin))
+    else:
+        with open(args.path, "r", encoding="utf-8") as stream:
+            stats = ingestor.ingest(read_jsonl(stream))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: kb-ingest-v1
+# version: 3.1.0
+# file: rasa/kb_ingest.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,411 @@
+# AUTO-ATC Playbook v3 - Registro write-behind de mensajes
+# Cola en memoria que vuelca users, conversations y messages por lotes (upserts + COPY)
+
+import io
+import os
+import json
+import time
+import atexit
+import random
+import asyncio
+import logging
+import functools
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+
+from pii import PIIMasker
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+UPSERT_USERS_SQL = """
+    INSERT INTO users (external_id, platform) VALUES %s
+    ON CONFLICT (external_id) DO UPDATE SET updated_at = now()
+    RETURNING external_id, id
+"""
+UPSERT_CONVERSATIONS_SQL = """
+    INSERT INTO conversations (user_id, external_conversation_id, platform) VALUES %s
+    ON CONFLICT (external_conversation_id) DO UPDATE SET updated_at = now()
+    RETURNING external_conversation_id, id
+"""
+MESSAGE_COLUMNS = "conversation_id, external_message_id, direction, message_type, content, metadata, created_at"
+COPY_MESSAGES_SQL = f"COPY messages ({MESSAGE_COLUMNS}) FROM STDIN"
+# Sin columnas de conflicto: en la tabla particionada la unicidad es (external_message_id, created_at).
+# Por eso created_at de un mensaje entrante sale del evento de usuario del tracker (igual en todos
+# los workers y tras un reinicio) y no de la hora en que se encoló
+INSERT_MESSAGES_SQL = f"""
+    INSERT INTO messages ({MESSAGE_COLUMNS}) VALUES %s
+    ON CONFLICT DO NOTHING
+"""
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class LoggedMessage(NamedTuple):
+    user_external_id: str
+    conversation_external_id: str
+    platform: str
+    direction: str
+    message_type: str
+    content: Optional[str]
+    external_message_id: Optional[str]
+    metadata: Dict[str, Any]
+    created_at: datetime
+
+
+def _copy_field(value: Any) -> str:
+    """Campo en formato text de COPY (\\N = NULL)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\x00", "").translate(_COPY_ESCAPES)
+
+
+class MessageLogWriter:
+    """Persiste mensajes entrantes/salientes fuera del turno del usuario.
+
+    `log` encola y vuelve enseguida. Un hilo de fondo vuelca hasta
+    `batch_size` mensajes por transacción, cada `batch_size` mensajes o cada
+    `flush_interval_ms`: un upsert multi-fila de los users y conversations
+    que todavía no tienen id conocido y un `COPY` de los mensajes. Si un
+    mensaje ya existe (reintento de un lote que sí llegó a escribirse), el
+    lote se reescribe con un INSERT multi-fila `ON CONFLICT DO NOTHING`.
+    Con la cola llena, `log` espera hasta `enqueue_timeout` y luego
+    descarta el mensaje (contado en stats). Con `masker`, el contenido de
+    cada lote se enmascara (PII) en una sola pasada antes de escribirse.
+    """
+
+    def __init__(
+        self,
+        get_connection: Callable,
+        batch_size: int = 200,
+        flush_interval_ms: int = 1000,
+        max_queue: int = 10000,
+        enqueue_timeout: float = 0.05,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        id_cache_size: int = 10000,
+        masker: Optional[PIIMasker] = None,
+    ):
+        self._get_connection = get_connection
+        self.masker = masker
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # external_id -> id de users / conversations ya confirmados en la BD
+        self._user_ids = TTLCache(maxsize=id_cache_size, ttl=86400)
+        self._conversation_ids = TTLCache(maxsize=id_cache_size, ttl=86400)
+        # external_message_id ya encolados (Rasa ve el mismo mensaje entrante en cada acción del turno)
+        self._seen_message_ids = TTLCache(maxsize=id_cache_size, ttl=3600)
+
+        self._cond = threading.Condition()
+        self._pending: Deque[LoggedMessage] = deque()
+        self._oldest_at: Optional[float] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"enqueued": 0, "flushed": 0, "dropped": 0, "duplicates": 0,
+                       "batches": 0, "failures": 0, "failed_rows": 0}
+
+    # ------------------------------------------
+    # API pública
+    # ------------------------------------------
+
+    def log(self, sender_id: str, direction: str, content: Optional[str], platform: str = "rasa",
+            message_type: str = "text", external_message_id: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None, user_external_id: Optional[str] = None,
+            created_at: Optional[datetime] = None) -> bool:
+        """Encola un mensaje de la conversación `sender_id`; False si se descartó.
+
+        Con `external_message_id`, pasar `created_at` determinístico (la hora del
+        mensaje): la base solo descarta el duplicado si coinciden los dos.
+        """
+        message = LoggedMessage(
+            user_external_id or sender_id, sender_id, platform or "rasa", direction, message_type or "text",
+            content, external_message_id, metadata or {}, created_at or datetime.now(),
+        )
+        self.start()
+        with self._cond:
+            if self._duplicate(external_message_id):
+                return True
+            if len(self._pending) >= self.max_queue:
+                # Backpressure: espera corta a que el hilo libere lugar, nunca bloquea el turno
+                self._cond.notify_all()
+                deadline = time.monotonic() + self.enqueue_timeout
+                while len(self._pending) >= self.max_queue and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if len(self._pending) >= self.max_queue:
+                    self._stats["dropped"] += 1
+                    return False
+                if self._duplicate(external_message_id):  # otro hilo lo encoló durante la espera
+                    return True
+            self._pending.append(message)
+            if external_message_id:
+                # Se marca recién encolado: uno descartado por backpressure se puede reintentar
+                self._seen_message_ids.put(external_message_id, True)
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            self._stats["enqueued"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _duplicate(self, external_message_id: Optional[str]) -> bool:
+        """True si el mensaje ya se encoló (llamar con `_cond` tomado)"""
+        if external_message_id and self._seen_message_ids.get(external_message_id):
+            self._stats["duplicates"] += 1
+            return True
+        return False
+
+    def flush(self) -> int:
+        """Escribe un lote ahora; devuelve mensajes escritos (0 si falló o no había)"""
+        with self._cond:
+            batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+        if not batch:
+            return 0
+
+        try:
+            users, conversations = self._write_batch(batch)
+        except Exception as e:
+            with self._cond:
+                self._stats["failures"] += 1
+                self._failures += 1
+                if self._failures >= self.max_retries:
+                    logger.error(f"Dropping {len(batch)} messages after {self._failures} failed flushes: {e}")
+                    self._stats["failed_rows"] += len(batch)
+                    self._ack(len(batch))
+                    return 0
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (self._failures - 1)))
+                self._retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                logger.warning(f"Error flushing message log: {e}; retrying in {delay:.1f}s")
+            return 0
+
+        # Los ids se cachean tras el commit (un rollback invalidaría los recién creados)
+        for external_id, user_id in users.items():
+            self._user_ids.put(external_id, user_id)
+        for external_id, conversation_id in conversations.items():
+            self._conversation_ids.put(external_id, conversation_id)
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["flushed"] += len(batch)
+            self._ack(len(batch))
+        return len(batch)
+
+    def start(self) -> "MessageLogWriter":
+        if self._thread is None:
+            with self._cond:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="message-log", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Vacía la cola antes de salir (hasta `timeout` segundos)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            if self._pending:
+                logger.warning(f"Message log stopped with {len(self._pending)} unwritten messages")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["pending"] = len(self._pending)
+        return snapshot
+
+    # ------------------------------------------
+    # Escritura
+    # ------------------------------------------
+
+    def _write_batch(self, batch: List[LoggedMessage]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Una transacción: upserts de users/conversations nuevos y COPY de los mensajes"""
+        with self._get_connection() as conn:
+            try:
+                result = self._write(conn, batch, use_copy=True)
+            except psycopg2.errors.UniqueViolation:
+                # Algún external_message_id ya estaba escrito (reintento tras un timeout)
+                conn.rollback()
+                result = self._write(conn, batch, use_copy=False)
+            conn.commit()
+        return result
+
+    def _write(self, conn, batch: List[LoggedMessage], use_copy: bool) -> Tuple[Dict[str, int], Dict[str, int]]:
+        with conn.cursor() as cur:
+            users = self._resolve_ids(cur, UPSERT_USERS_SQL, self._user_ids, (
+                (m.user_external_id, (m.user_external_id, m.platform)) for m in batch))
+            conversations = self._resolve_ids(cur, UPSERT_CONVERSATIONS_SQL, self._conversation_ids, (
+                (m.conversation_external_id, (users[m.user_external_id], m.conversation_external_id, m.platform))
+                for m in batch))
+
+            contents = [m.content for m in batch]
+            if self.masker is not None:
+                contents = self.masker.mask_batch(contents)
+            rows = [(
+                conversations[m.conversation_external_id],
+                m.external_message_id,
+                m.direction,
+                m.message_type,
+                content,
+                json.dumps(m.metadata, ensure_ascii=False, default=str),
+                m.created_at,
+            ) for m, content in zip(batch, contents)]
+            if use_copy:
+                buffer = io.StringIO("".join("\t".join(map(_copy_field, row)) + "\n" for row in rows))
+                cur.copy_expert(COPY_MESSAGES_SQL, buffer)
+            else:
+                psycopg2.extras.execute_values(cur, INSERT_MESSAGES_SQL, rows, page_size=self.batch_size)
+        return users, conversations
+
+    @staticmethod
+    def _resolve_ids(cur, upsert_sql: str, known: TTLCache, candidates: Iterable[Tuple[str, tuple]]) -> Dict[str, int]:
+        """{external_id: id} del lote: del cache, o con un upsert multi-fila de las claves sin id"""
+        ids: Dict[str, int] = {}
+        missing: Dict[str, tuple] = {}
+        for key, row in candidates:
+            if key in ids or key in missing:
+                continue
+            row_id = known.get(key)
+            if row_id is None:
+                missing[key] = row
+            else:
+                ids[key] = row_id
+        if missing:
+            returned = psycopg2.extras.execute_values(cur, upsert_sql, list(missing.values()), fetch=True)
+            ids.update((external_id, row_id) for external_id, row_id in returned)
+        return ids
+
+    def _ack(self, count: int) -> None:
+        # Se llama con el lock tomado
+        for _ in range(count):
+            self._pending.popleft()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._oldest_at = time.monotonic() if self._pending else None
+        self._cond.notify_all()
+
+    def _due(self) -> float:
+        """Segundos hasta el próximo volcado (0 = ya); se llama con el lock tomado"""
+        if not self._pending:
+            return self.flush_interval
+        now = time.monotonic()
+        if self._retry_at > now and not self._stopping:
+            return self._retry_at - now
+        if self._stopping or len(self._pending) >= self.batch_size:
+            return 0.0
+        return max(0.0, self._oldest_at + self.flush_interval - now)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                wait = self._due()
+                while wait > 0 and not (self._stopping and not self._pending):
+                    self._cond.wait(wait)
+                    wait = self._due()
+                if self._stopping and not self._pending:
+                    return
+            self.flush()
+
+
+def message_log_from_env(get_connection: Callable) -> Optional[MessageLogWriter]:
+    """Crea el writer salvo con MESSAGE_LOG_ENABLED=false (el hilo arranca con el primer mensaje)"""
+    if os.getenv("MESSAGE_LOG_ENABLED", "true").lower() != "true":
+        return None
+    return MessageLogWriter(
+        get_connection,
+        batch_size=int(os.getenv("MESSAGE_LOG_BATCH_SIZE", "200")),
+        flush_interval_ms=int(os.getenv("MESSAGE_LOG_FLUSH_INTERVAL_MS", "1000")),
+        max_queue=int(os.getenv("MESSAGE_LOG_MAX_QUEUE", "10000")),
+        enqueue_timeout=float(os.getenv("MESSAGE_LOG_ENQUEUE_TIMEOUT_MS", "50")) / 1000,
+        masker=PIIMasker() if os.getenv("MESSAGE_LOG_MASK_PII", "true").lower() == "true" else None,
+    )
+
+
+def user_event_time(tracker, message_id: Optional[str] = None) -> Optional[datetime]:
+    """Hora del último evento de usuario del tracker (el del `message_id`, si se indica)"""
+    for event in reversed(tracker.events or []):
+        if event.get("event") != "user":
+            continue
+        if message_id and event.get("message_id") not in (None, message_id):
+            continue
+        timestamp = event.get("timestamp")
+        return datetime.fromtimestamp(timestamp) if timestamp else None
+    return None
+
+
+def log_turn(writer: Optional[MessageLogWriter], action_name: str, dispatcher, tracker, already_sent: int = 0) -> None:
+    """Encola el mensaje entrante del turno y las respuestas que la acción agregó al dispatcher"""
+    if writer is None:
+        return
+    try:
+        latest = tracker.latest_message or {}
+        platform = tracker.get_latest_input_channel() or "rasa"
+        if latest.get("text"):
+            intent = (latest.get("intent") or {}).get("name")
+            message_id = latest.get("message_id")
+            writer.log(tracker.sender_id, "inbound", latest["text"], platform,
+                       external_message_id=message_id, metadata={"intent": intent},
+                       created_at=user_event_time(tracker, message_id))
+        for message in dispatcher.messages[already_sent:]:
+            content = message.get("text") or message.get("template") or message.get("response")
+            message_type = "text" if message.get("text") else ("image" if message.get("image") else "template")
+            writer.log(tracker.sender_id, "outbound", content, platform, message_type=message_type,
+                       metadata={"action": action_name})
+    except Exception as e:
+        logger.warning(f"Could not log messages for {action_name}: {e}")
+
+
+def transcribe(get_writer: Callable[[], Optional[MessageLogWriter]]) -> Callable:
+    """Decorador para `Action.run` (sync o async) que registra el turno en `messages`"""
+    def decorator(run: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(run):
+            @functools.wraps(run)
+            async def async_wrapper(action, dispatcher, tracker, domain):
+                already_sent = len(dispatcher.messages)
+                try:
+                    return await run(action, dispatcher, tracker, domain)
+                finally:
+                    log_turn(get_writer(), action.name(), dispatcher, tracker, already_sent)
+            return async_wrapper
+
+        @functools.wraps(run)
+        def wrapper(action, dispatcher, tracker, domain):
+            already_sent = len(dispatcher.messages)
+            try:
+                return run(action, dispatcher, tracker, domain)
+            finally:
+                log_turn(get_writer(), action.name(), dispatcher, tracker, already_sent)
+        return wrapper
+    return decorator
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: message-log-v1
+# version: 3.1.0
+# file: rasa/message_log.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
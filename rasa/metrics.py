@@ -0,0 +1,316 @@
+# AUTO-ATC Playbook v3 - Métricas de las acciones custom
+# Histogramas de latencia por acción y sub-paso, contadores de errores,
+# endpoints /metrics (formato Prometheus) y /ready, y volcado batch a performance_metrics
+
+import os
+import time
+import json
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2.extras
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores de los buckets, en segundos
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Acción en curso (por hilo y por tarea async) para atribuir los sub-pasos
+_current_action: contextvars.ContextVar = contextvars.ContextVar("current_action", default="unknown")
+
+
+class Histogram:
+    """Histograma acumulado (para Prometheus) más una ventana que se vacía en cada volcado"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "window_counts", "window_count", "window_sum", "window_max")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.reset_window()
+
+    def reset_window(self) -> None:
+        self.window_counts = [0] * (len(self.buckets) + 1)
+        self.window_count = 0
+        self.window_sum = 0.0
+        self.window_max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        i = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.window_counts[i] += 1
+        self.window_count += 1
+        self.window_sum += seconds
+        if seconds > self.window_max:
+            self.window_max = seconds
+
+    def window_quantile(self, q: float) -> float:
+        """Cuantil aproximado de la ventana (límite superior del bucket; max si cae en +Inf)"""
+        if not self.window_count:
+            return 0.0
+        target = q * self.window_count
+        seen = 0
+        for i, count in enumerate(self.window_counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.window_max
+        return self.window_max
+
+
+class MetricsRegistry:
+    """Latencias por (acción, paso) y errores por (acción, paso), seguros entre hilos"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._window_errors: Dict[Tuple[str, str], int] = {}
+        # cache -> [hits, misses] acumulados y de la ventana
+        self._cache: Dict[str, List[int]] = {}
+        self._window_cache: Dict[str, List[int]] = {}
+        self._window_started = time.time()
+
+    def observe(self, action: str, step: str, seconds: float) -> None:
+        key = (action, step)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def record_error(self, step: str = "run", action: Optional[str] = None) -> None:
+        key = (action or _current_action.get(), step)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+            self._window_errors[key] = self._window_errors.get(key, 0) + 1
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """Cuenta un acierto o fallo de un cache de aplicación"""
+        index = 0 if hit else 1
+        with self._lock:
+            for counts in (self._cache, self._window_cache):
+                counts.setdefault(cache, [0, 0])[index] += 1
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Aciertos, fallos y tasa de aciertos acumulados por cache"""
+        with self._lock:
+            return {
+                cache: {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+                for cache, (hits, misses) in self._cache.items()
+            }
+
+    @contextmanager
+    def step(self, name: str):
+        """Mide un sub-paso de la acción en curso; una excepción cuenta como error del paso"""
+        action = _current_action.get()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_error(name, action)
+            raise
+        finally:
+            self.observe(action, name, time.perf_counter() - start)
+
+    def instrument(self, run: Callable) -> Callable:
+        """Decorador para `Action.run` (sync o async): latencia total y errores por acción"""
+        if asyncio.iscoroutinefunction(run):
+            @functools.wraps(run)
+            async def async_wrapper(action, *args, **kwargs):
+                name = action.name()
+                token = _current_action.set(name)
+                start = time.perf_counter()
+                try:
+                    return await run(action, *args, **kwargs)
+                except Exception:
+                    self.record_error("run", name)
+                    raise
+                finally:
+                    self.observe(name, "run", time.perf_counter() - start)
+                    _current_action.reset(token)
+            return async_wrapper
+
+        @functools.wraps(run)
+        def wrapper(action, *args, **kwargs):
+            name = action.name()
+            token = _current_action.set(name)
+            start = time.perf_counter()
+            try:
+                return run(action, *args, **kwargs)
+            except Exception:
+                self.record_error("run", name)
+                raise
+            finally:
+                self.observe(name, "run", time.perf_counter() - start)
+                _current_action.reset(token)
+        return wrapper
+
+    # ------------------------------------------
+    # Exportación
+    # ------------------------------------------
+
+    def render_prometheus(self) -> str:
+        """Texto en formato de exposición de Prometheus"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            errors = sorted(self._errors.items())
+            lines = [
+                "# HELP rasa_action_duration_seconds Latencia de las acciones custom por paso",
+                "# TYPE rasa_action_duration_seconds histogram",
+            ]
+            for (action, step), histogram in histograms:
+                labels = f'action="{action}",step="{step}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'rasa_action_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'rasa_action_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"rasa_action_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"rasa_action_duration_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# HELP rasa_action_errors_total Errores de las acciones custom por paso")
+            lines.append("# TYPE rasa_action_errors_total counter")
+            for (action, step), count in errors:
+                lines.append(f'rasa_action_errors_total{{action="{action}",step="{step}"}} {count}')
+            lines.append("# HELP rasa_cache_lookups_total Consultas a caches de aplicación por resultado")
+            lines.append("# TYPE rasa_cache_lookups_total counter")
+            for cache, (hits, misses) in sorted(self._cache.items()):
+                lines.append(f'rasa_cache_lookups_total{{cache="{cache}",result="hit"}} {hits}')
+                lines.append(f'rasa_cache_lookups_total{{cache="{cache}",result="miss"}} {misses}')
+        return "\n".join(lines) + "\n"
+
+    def drain_rows(self) -> List[tuple]:
+        """Filas agregadas de la ventana para performance_metrics; reinicia la ventana"""
+        now = time.time()
+        rows = []
+        with self._lock:
+            window = round(now - self._window_started, 3)
+            for (action, step), histogram in sorted(self._histograms.items()):
+                if not histogram.window_count:
+                    continue
+                metadata = json.dumps({"action": action, "step": step, "window_seconds": window})
+                rows.append(("action_latency_avg", histogram.window_sum / histogram.window_count * 1000, "ms", metadata))
+                rows.append(("action_latency_p95", histogram.window_quantile(0.95) * 1000, "ms", metadata))
+                rows.append(("action_latency_max", histogram.window_max * 1000, "ms", metadata))
+                rows.append(("action_calls", histogram.window_count, "count", metadata))
+                histogram.reset_window()
+            for (action, step), count in sorted(self._window_errors.items()):
+                metadata = json.dumps({"action": action, "step": step, "window_seconds": window})
+                rows.append(("action_errors", count, "count", metadata))
+            for cache, (hits, misses) in sorted(self._window_cache.items()):
+                metadata = json.dumps({"cache": cache, "lookups": hits + misses, "window_seconds": window})
+                rows.append(("cache_hit_rate", hits / (hits + misses) * 100, "percent", metadata))
+            self._window_errors = {}
+            self._window_cache = {}
+            self._window_started = now
+        return rows
+
+    def flush_to_db(self, get_connection: Callable) -> int:
+        """Inserta la ventana en performance_metrics con un solo INSERT multi-fila"""
+        rows = self.drain_rows()
+        if not rows:
+            return 0
+        try:
+            with get_connection() as conn:
+                with conn.cursor() as cur:
+                    psycopg2.extras.execute_values(cur, """
+                        INSERT INTO performance_metrics (metric_name, metric_value, metric_unit, metadata)
+                        VALUES %s
+                    """, rows)
+                conn.commit()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error flushing performance metrics: {e}")
+            return 0
+
+
+# Registro global usado por las acciones
+metrics = MetricsRegistry()
+instrument_action = metrics.instrument
+step = metrics.step
+record_error = metrics.record_error
+record_cache = metrics.record_cache
+
+
+def start_metrics_server(port: int, registry: MetricsRegistry = metrics, host: str = "0.0.0.0",
+                         readiness: Optional[Callable[[], Dict[str, Any]]] = None) -> ThreadingHTTPServer:
+    """Sirve GET /metrics (y GET /ready si se pasa `readiness`) en un hilo de fondo"""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                status, content_type = 200, "text/plain; version=0.0.4; charset=utf-8"
+                body = registry.render_prometheus().encode("utf-8")
+            elif path == "/ready" and readiness is not None:
+                # 503 hasta que termine el warm-up, para que el orquestador no envíe tráfico
+                state = readiness()
+                status, content_type = (200 if state.get("ready") else 503), "application/json"
+                body = json.dumps(state).encode("utf-8")
+            else:
+                self.send_error(404)
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Prometheus hace scrape cada pocos segundos: sin logs por request
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on {host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start_metrics_flusher(get_connection: Callable, interval: float, registry: MetricsRegistry = metrics) -> threading.Event:
+    """Vuelca la ventana a performance_metrics cada `interval` segundos; devuelve el evento de parada"""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            registry.flush_to_db(get_connection)
+
+    threading.Thread(target=loop, name="metrics-flusher", daemon=True).start()
+    return stop
+
+
+def start_from_env(get_connection: Callable, readiness: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+    """Inicia endpoint y volcado según METRICS_PORT / METRICS_FLUSH_INTERVAL (0 = desactivado)"""
+    port = int(os.getenv("METRICS_PORT", "0"))
+    interval = float(os.getenv("METRICS_FLUSH_INTERVAL", "0"))
+    try:
+        if port:
+            start_metrics_server(port, readiness=readiness)
+        if interval > 0:
+            start_metrics_flusher(get_connection, interval)
+    except Exception as e:
+        logger.error(f"Error starting metrics: {e}")
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: metrics-v1
+# version: 3.1.0
+# file: rasa/metrics.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,617 @@
+# AUTO-ATC Playbook v3 - Dispatcher de respuestas salientes
+# Junta los mensajes de un turno (varios utter_message) en un solo "Create Message" de
+# Chatwoot, mantiene el orden por conversación con un worker por shard, limita la tasa por
+# número de WhatsApp (token bucket), reutiliza sesiones keep-alive por host y manda una
+# fila por interacción al escritor batch de Sheets
+#
+#   python rasa/outbound_dispatcher.py --port 5056
+#
+#   POST /turns      {"conversation_id", "contact_source_id", "messages": [<respuesta de Rasa>], ...}
+#   POST /templates  {"conversation_id", "to", "template", "language", "parameters", ...}
+#   GET  /stats
+
+import os
+import json
+import time
+import atexit
+import random
+import logging
+import zlib
+import argparse
+import threading
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import MetricsRegistry, metrics
+from resilience import CircuitOpenError, Dependency, dependency_from_env
+from sheets_writer import SheetsBatchWriter
+
+logger = logging.getLogger(__name__)
+
+TEXT = "text"
+TEMPLATE = "template"
+
+
+# ==========================================
+# COALESCENCIA
+# ==========================================
+
+def message_text(message: Mapping[str, Any]) -> str:
+    """Texto de un mensaje de Rasa: texto, imagen (URL) y botones como opciones"""
+    lines = []
+    if message.get("text"):
+        lines.append(message["text"].strip())
+    if message.get("image"):
+        lines.append(message["image"])
+    for button in message.get("buttons") or []:
+        if button.get("title"):
+            lines.append(f"- {button['title']}")
+    return "\n".join(line for line in lines if line)
+
+
+def coalesce(texts: Sequence[str], separator: str = "\n\n", max_chars: int = 4096) -> List[str]:
+    """Une los textos de un turno en la menor cantidad de mensajes de hasta `max_chars`.
+
+    Se corta solo entre mensajes (nunca a mitad de uno); un texto que por sí
+    solo supera el límite sale en su propio mensaje. Los vacíos y los
+    repetidos seguidos se descartan.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    previous = None
+    for text in texts:
+        if not text or text == previous:
+            continue
+        previous = text
+        extra = len(text) + (len(separator) if current else 0)
+        if current and size + extra > max_chars:
+            chunks.append(separator.join(current))
+            current, size, extra = [], 0, len(text)
+        current.append(text)
+        size += extra
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+# ==========================================
+# LÍMITE DE TASA Y SESIONES
+# ==========================================
+
+class TokenBucket:
+    """Token bucket: `rate` envíos por segundo con ráfagas de hasta `burst`.
+
+    `reserve` toma un token y devuelve cuánto esperar antes de usarlo (0 si
+    había uno disponible); los turnos siguientes quedan agendados detrás.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class SessionPool:
+    """Una requests.Session por host (esquema + host + puerto) con keep-alive"""
+
+    def __init__(self, pool_size: int = 8):
+        self.pool_size = pool_size
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount(key, adapter)
+                    self._sessions[key] = session
+        return session
+
+    def hosts(self) -> List[str]:
+        return sorted(self._sessions)
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# ==========================================
+# DISPATCHER
+# ==========================================
+
+class OutboundDispatcher:
+    """Envía las respuestas del bot fuera del turno, en orden por conversación.
+
+    Cada conversación cae siempre en el mismo shard (crc32 del id) y cada
+    shard tiene un solo hilo, que atiende sus conversaciones por turnos y
+    hace un intento por vez. Una conversación que tiene que esperar (rate
+    limit del número, backoff de un reintento) queda con su hora de listo y
+    el hilo sigue con las demás: nunca duerme por una sola conversación. Los
+    envíos de una conversación no se adelantan entre sí y los turnos que se
+    acumulan mientras espera se juntan en el próximo envío. Los 5xx, 429
+    (respetando Retry-After) y errores de red se reintentan con backoff y un
+    4xx descarta el envío.
+
+    La cola es en memoria: los turnos aceptados (202) que no se enviaron se
+    pierden si el proceso se reinicia. `stop` intenta vaciarla antes de salir.
+    """
+
+    def __init__(
+        self,
+        chatwoot_url: str,
+        inbox_id: str,
+        waba_url: Optional[str] = None,
+        waba_token: Optional[str] = None,
+        workers: int = 4,
+        rate_per_second: float = 20.0,
+        burst: int = 20,
+        max_chars: int = 4096,
+        separator: str = "\n\n",
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 10.0,
+        sessions: Optional[SessionPool] = None,
+        dependencies: Optional[Dict[str, Dependency]] = None,
+        sheets: Optional[SheetsBatchWriter] = None,
+        registry: MetricsRegistry = metrics,
+    ):
+        self.chatwoot_url = chatwoot_url.rstrip("/")
+        self.inbox_id = str(inbox_id)
+        self.waba_url = waba_url.rstrip("/") if waba_url else None
+        self.waba_token = waba_token
+        self.workers = max(1, workers)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_chars = max_chars
+        self.separator = separator
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.sessions = sessions or SessionPool(pool_size=self.workers)
+        self.dependencies = dependencies or {}
+        self.sheets = sheets
+        self.registry = registry
+
+        self._cond = threading.Condition()
+        # Por shard: conversación -> {"turns": sin planificar, "sends": envíos en curso, "ready_at"},
+        # en el orden en que se las atiende
+        self._conversations: List["OrderedDict[str, Dict[str, Any]]"] = [OrderedDict() for _ in range(self.workers)]
+        self._queued = 0
+        self._inflight = 0
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats = {"turns": 0, "messages": 0, "requests": 0, "coalesced": 0, "retries": 0,
+                       "failed_turns": 0, "rate_limited_seconds": 0.0}
+
+    # ------------------------------------------
+    # API pública
+    # ------------------------------------------
+
+    def shard(self, conversation_id: Any) -> int:
+        return zlib.crc32(str(conversation_id).encode("utf-8")) % self.workers
+
+    def submit(self, conversation_id: Any, messages: Sequence[Mapping[str, Any]], contact_source_id: str,
+               number: Optional[str] = None, contact_id: Optional[str] = None) -> int:
+        """Encola la respuesta de un turno (lista de mensajes de Rasa); devuelve el shard"""
+        texts = [message_text(message) for message in messages]
+        return self._enqueue(str(conversation_id), {
+            "kind": TEXT, "texts": [text for text in texts if text], "contact_source_id": str(contact_source_id),
+            "number": number or f"inbox:{self.inbox_id}", "contact_id": contact_id or contact_source_id,
+        })
+
+    def submit_template(self, conversation_id: Any, to: str, template: str, language: str = "es",
+                        parameters: Sequence[str] = (), number: Optional[str] = None,
+                        contact_id: Optional[str] = None) -> int:
+        """Encola un template de WhatsApp (fuera de la ventana de 24 h), en orden con los textos"""
+        if not self.waba_url:
+            raise ValueError("WABA_PROVIDER_URL is not configured")
+        return self._enqueue(str(conversation_id), {
+            "kind": TEMPLATE, "to": to, "template": template, "language": language,
+            "parameters": list(parameters), "number": number or f"inbox:{self.inbox_id}",
+            "contact_id": contact_id or to,
+        })
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """Espera a que no queden turnos pendientes ni en vuelo"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queued or self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def start(self) -> "OutboundDispatcher":
+        if not self._threads:
+            self._stopping = False
+            self._threads = [threading.Thread(target=self._run, args=(shard,), name=f"outbound-{shard}", daemon=True)
+                             for shard in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Envía lo pendiente (hasta `timeout`) y detiene los workers"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["queued"] = self._queued
+            snapshot["inflight"] = self._inflight
+        snapshot["rate_limited_seconds"] = round(snapshot["rate_limited_seconds"], 3)
+        snapshot["hosts"] = self.sessions.hosts()
+        snapshot["numbers"] = len(self._buckets)
+        return snapshot
+
+    # ------------------------------------------
+    # Cola por shard
+    # ------------------------------------------
+
+    def _enqueue(self, conversation_id: str, turn: Dict[str, Any]) -> int:
+        shard = self.shard(conversation_id)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Outbound dispatcher is stopping")
+            state = self._conversations[shard].get(conversation_id)
+            if state is None:
+                state = self._conversations[shard][conversation_id] = {"turns": [], "sends": deque(), "ready_at": 0.0}
+            state["turns"].append(turn)
+            self._queued += 1
+            self._stats["turns"] += 1
+            self._cond.notify_all()
+        return shard
+
+    def _next_ready(self, conversations: "OrderedDict[str, Dict[str, Any]]"):
+        """(conversación lista, None) o (None, segundos hasta la próxima); con el lock tomado"""
+        now = time.monotonic()
+        next_at = None
+        for conversation_id, state in conversations.items():
+            if state["ready_at"] <= now:
+                return conversation_id, None
+            next_at = state["ready_at"] if next_at is None else min(next_at, state["ready_at"])
+        return None, None if next_at is None else next_at - now
+
+    def _run(self, shard: int) -> None:
+        conversations = self._conversations[shard]
+        while True:
+            with self._cond:
+                conversation_id, wait = self._next_ready(conversations)
+                while conversation_id is None:
+                    if not conversations and self._stopping:
+                        return
+                    self._cond.wait(wait)
+                    conversation_id, wait = self._next_ready(conversations)
+                state = conversations[conversation_id]
+                conversations.move_to_end(conversation_id)
+                turns = []
+                if not state["sends"]:
+                    # Lo que llegó mientras se enviaba lo anterior sale junto, detrás
+                    turns, state["turns"] = state["turns"], []
+                    self._queued -= len(turns)
+                    self._inflight += len(turns)
+            try:
+                if turns:
+                    state["sends"].extend(self._plan(conversation_id, turns))
+                if state["sends"]:
+                    self._step(state)
+            except Exception as e:  # un envío roto no puede matar al worker del shard
+                logger.error(f"Outbound delivery for conversation {conversation_id} failed: {e}")
+                while state["sends"]:
+                    self._drop(state)
+            finally:
+                with self._cond:
+                    if not state["sends"] and not state["turns"]:
+                        del conversations[conversation_id]
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _groups(turns: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Turnos de texto seguidos al mismo contacto y número se envían juntos"""
+        groups: List[List[Dict[str, Any]]] = []
+        for turn in turns:
+            last = groups[-1][-1] if groups else None
+            if (last is not None and turn["kind"] == TEXT and last["kind"] == TEXT
+                    and turn["contact_source_id"] == last["contact_source_id"] and turn["number"] == last["number"]):
+                groups[-1].append(turn)
+            else:
+                groups.append([turn])
+        return groups
+
+    def _plan(self, conversation_id: str, turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Envíos (requests) de los turnos, en orden; cada grupo termina con su último envío"""
+        sends: List[Dict[str, Any]] = []
+        for grouped in self._groups(turns):
+            first = grouped[0]
+            group = {"turns": grouped, "remaining": 0}
+            if first["kind"] == TEMPLATE:
+                planned = [self._template_request(first)]
+            else:
+                texts = [text for turn in grouped for text in turn["texts"]]
+                chunks = coalesce(texts, self.separator, self.max_chars)
+                planned = [self._text_request(conversation_id, first, chunk) for chunk in chunks]
+                with self._cond:
+                    self._stats["messages"] += len(texts)
+                    self._stats["coalesced"] += len(texts) - len(chunks)
+            if not planned:
+                self._finish(group, ok=True)
+                continue
+            group["remaining"] = len(planned)
+            for target, url, payload, headers in planned:
+                sends.append({"target": target, "url": url, "payload": payload, "headers": headers,
+                              "number": first["number"], "group": group, "attempts": 0, "reserved": False})
+        return sends
+
+    def _step(self, state: Dict[str, Any]) -> None:
+        """Un paso del primer envío de la conversación: tomar turno del rate limit o un intento"""
+        send = state["sends"][0]
+        if not send["reserved"]:
+            send["reserved"] = True
+            wait = self._bucket(send["number"]).reserve()
+            if wait > 0:
+                with self._cond:
+                    self._stats["rate_limited_seconds"] += wait
+                state["ready_at"] = time.monotonic() + wait
+                return
+        send["reserved"] = False
+        send["attempts"] += 1
+        outcome, delay = self._attempt(send)
+        if outcome == "sent":
+            state["sends"].popleft()
+            state["ready_at"] = 0.0
+            group = send["group"]
+            group["remaining"] -= 1
+            if not group["remaining"]:
+                self._finish(group, ok=True)
+        elif outcome == "retry" and send["attempts"] < self.max_attempts:
+            with self._cond:
+                self._stats["retries"] += 1
+            state["ready_at"] = time.monotonic() + delay
+        else:
+            self.registry.record_error(send["target"], action="outbound")
+            self._drop(state)
+
+    def _drop(self, state: Dict[str, Any]) -> None:
+        """Descarta el grupo del primer envío (el resto de sus partes no sale)"""
+        group = state["sends"][0]["group"]
+        while state["sends"] and state["sends"][0]["group"] is group:
+            state["sends"].popleft()
+        state["ready_at"] = 0.0
+        self._finish(group, ok=False)
+
+    def _finish(self, group: Dict[str, Any], ok: bool) -> None:
+        turns = group["turns"]
+        with self._cond:
+            self._inflight -= len(turns)
+            if not ok:
+                self._stats["failed_turns"] += len(turns)
+        if ok and self.sheets is not None:
+            # Una fila por interacción (como el nodo "Google Sheets Append"); el writer las agrupa
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+            for turn in turns:
+                reply = (f"[template {turn['template']}]" if turn["kind"] == TEMPLATE
+                         else self.separator.join(turn["texts"]))
+                self.sheets.enqueue([turn["contact_id"], reply, timestamp])
+
+    # ------------------------------------------
+    # Envío
+    # ------------------------------------------
+
+    def _text_request(self, conversation_id: str, turn: Dict[str, Any], content: str) -> tuple:
+        url = (f"{self.chatwoot_url}/public/api/v1/inboxes/{self.inbox_id}/contacts/"
+               f"{turn['contact_source_id']}/conversations/{conversation_id}/messages")
+        return "chatwoot", url, {"content": content}, {}
+
+    def _template_request(self, turn: Dict[str, Any]) -> tuple:
+        payload = {
+            "messaging_product": "whatsapp", "to": turn["to"], "type": "template",
+            "template": {"name": turn["template"], "language": {"code": turn["language"]},
+                         "components": [{"type": "body", "parameters": [
+                             {"type": "text", "text": str(value)} for value in turn["parameters"]]}]},
+        }
+        headers = {"Authorization": f"Bearer {self.waba_token}"} if self.waba_token else {}
+        return "waba", f"{self.waba_url}/messages", payload, headers
+
+    def _bucket(self, number: str) -> TokenBucket:
+        bucket = self._buckets.get(number)
+        if bucket is None:
+            with self._cond:
+                bucket = self._buckets.setdefault(number, TokenBucket(self.rate_per_second, self.burst))
+        return bucket
+
+    def _attempt(self, send: Dict[str, Any]) -> Tuple[str, float]:
+        """Un request: ("sent", 0), ("dropped", 0) o ("retry", segundos hasta el próximo intento)"""
+        target = send["target"]
+        session = self.sessions.get(send["url"])
+        dependency = self.dependencies.get(target)
+        retry_after = None
+        status = None
+        start = time.perf_counter()
+        try:
+            with dependency.guard() if dependency else nullcontext(self.timeout) as timeout:
+                response = session.post(send["url"], json=send["payload"], headers=send["headers"], timeout=timeout)
+                status = response.status_code
+                if status == 429:
+                    retry_after = response.headers.get("Retry-After")
+                if status == 429 or status >= 500:
+                    response.raise_for_status()  # cuenta como falla para el breaker
+        except CircuitOpenError:
+            pass
+        except requests.RequestException as e:
+            if status is None:
+                logger.warning(f"Outbound {target} request failed: {e}")
+        finally:
+            self.registry.observe("outbound", target, time.perf_counter() - start)
+            if status is not None:
+                with self._cond:
+                    self._stats["requests"] += 1
+
+        if status is not None and 200 <= status < 300:
+            return "sent", 0.0
+        if status is not None and 400 <= status < 500 and status != 429:
+            logger.error(f"Outbound {target} rejected message with HTTP {status}; dropped")
+            return "dropped", 0.0
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (send["attempts"] - 1))) * random.uniform(0.5, 1.0)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return "retry", delay
+
+
+# ==========================================
+# SERVICIO HTTP
+# ==========================================
+
+def start_outbound_server(dispatcher: OutboundDispatcher, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Sirve POST /turns, POST /templates y GET /stats en un hilo de fondo; responde 202 al encolar"""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: Any) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] == "/stats":
+                self._reply(200, dispatcher.stats())
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            path = self.path.split("?", 1)[0]
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if path == "/turns":
+                    shard = dispatcher.submit(body["conversation_id"], body.get("messages") or [],
+                                              body["contact_source_id"], body.get("number"), body.get("contact_id"))
+                elif path == "/templates":
+                    shard = dispatcher.submit_template(body["conversation_id"], body["to"], body["template"],
+                                                       body.get("language", "es"), body.get("parameters") or (),
+                                                       body.get("number"), body.get("contact_id"))
+                else:
+                    self.send_error(404)
+                    return
+            except (ValueError, KeyError, TypeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            except RuntimeError as e:
+                self._reply(503, {"error": str(e)})
+                return
+            self._reply(202, {"queued": True, "shard": shard})
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="outbound-http", daemon=True).start()
+    logger.info(f"Outbound dispatcher listening on {host}:{server.server_address[1]}")
+    return server
+
+
+def dispatcher_from_env() -> OutboundDispatcher:
+    """Dispatcher con CHATWOOT_BASE_URL / CHATWOOT_INBOX_ID, WABA_PROVIDER_URL y OUTBOUND_*;
+    con GOOGLE_SHEET_ID y GOOGLE_API_KEY registra cada interacción en la hoja Interacciones"""
+    sheets = None
+    sheet_id, api_key = os.getenv("GOOGLE_SHEET_ID"), os.getenv("GOOGLE_API_KEY")
+    if sheet_id and api_key:
+        base_url = os.getenv("SHEETS_API_URL", "https://sheets.googleapis.com").rstrip("/")
+        sheets = SheetsBatchWriter(
+            url=f"{base_url}/v4/spreadsheets/{sheet_id}/values/Interacciones!A1:append",
+            params={"valueInputOption": "RAW", "key": api_key},
+            spool_path=os.getenv("OUTBOUND_SHEETS_SPOOL_PATH", ".spool/interactions_outbox.jsonl"),
+            batch_size=int(os.getenv("SHEETS_BATCH_SIZE", "50")),
+            flush_interval_ms=int(os.getenv("SHEETS_FLUSH_INTERVAL_MS", "2000")),
+            dependency=dependency_from_env("sheets", timeout_ms=10000, min_timeout_ms=1000, max_timeout_ms=10000),
+        ).start()
+        atexit.register(sheets.stop)
+
+    return OutboundDispatcher(
+        chatwoot_url=os.getenv("CHATWOOT_BASE_URL", "http://localhost:3000"),
+        inbox_id=os.getenv("CHATWOOT_INBOX_ID", "1"),
+        waba_url=os.getenv("WABA_PROVIDER_URL") or None,
+        waba_token=os.getenv("WHATSAPP_ACCESS_TOKEN") or None,
+        workers=int(os.getenv("OUTBOUND_WORKERS", "4")),
+        rate_per_second=float(os.getenv("OUTBOUND_RATE_PER_SECOND", "20")),
+        burst=int(os.getenv("OUTBOUND_BURST", "20")),
+        max_chars=int(os.getenv("OUTBOUND_MAX_CHARS", "4096")),
+        max_attempts=int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "5")),
+        dependencies={
+            "chatwoot": dependency_from_env("chatwoot", timeout_ms=10000, min_timeout_ms=500, max_timeout_ms=10000),
+            "waba": dependency_from_env("waba", timeout_ms=10000, min_timeout_ms=500, max_timeout_ms=10000),
+        },
+        sheets=sheets,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dispatcher de respuestas salientes (Chatwoot / WhatsApp)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("OUTBOUND_PORT", "5056")))
+    parser.add_argument("--host", default="0.0.0.0")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "info").upper())
+    dispatcher = dispatcher_from_env().start()
+    server = start_outbound_server(dispatcher, args.port, args.host)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        dispatcher.stop()
+
+
+if __name__ == "__main__":
+    main()
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: outbound-dispatcher-v1
+# version: 3.1.0
+# file: rasa/outbound_dispatcher.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,220 @@
+# AUTO-ATC Playbook v3 - Enmascarado de PII y saneamiento de texto
+# Un solo regex compilado para emails, tarjetas, documentos y teléfonos, con offsets
+# de cada hallazgo y API batch para transcripts y chunks de la knowledge base
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+TOKENS: Dict[str, str] = {
+    "email": "[EMAIL]",
+    "card": "[CARD]",
+    "doc": "[DOC]",
+    "phone": "[PHONE]",
+    "num": "[NUM]",
+}
+
+# Alternativas en orden de prioridad: en cada posición gana la primera que matchea.
+# Las numéricas van detrás de un lookahead de un carácter para no probar cuatro
+# alternativas en cada letra; el email solo arranca al inicio de una palabra.
+# `date` no se enmascara; está para que 2026-10-17 no se lea como teléfono. Una CI con
+# puntos pide el dígito verificador o "CI" delante: si no, $1.299.000 sería un documento.
+PII_PATTERN = re.compile(r"""
+    (?P<email>(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)+)
+  | (?=[\d+(])(?:
+      (?P<card>\b(?:\d[ -]?){12,18}\d\b)
+    | (?P<doc>\b(?:\d{2}-\d{8}-\d|\d{1,2}\.\d{3}\.\d{3}-\d|(?:(?<=[Cc][Ii][ ])|(?<=[Cc][Ii]:[ ]))\d{1,2}\.\d{3}\.\d{3}|\d{7}-\d)\b)
+    | (?P<date>\b\d{4}-\d{2}-\d{2}\b)
+    | (?P<phone>(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,4}\)[ .-]?)?\d{2,4}(?:[ .-]?\d{2,4}){1,4}(?!\w))
+  )
+""", re.VERBOSE)
+# Sin dígitos ni @ no hay nada que enmascarar (búsqueda en C, sin callbacks)
+_CANDIDATE = re.compile(r"[\d@]")
+
+# Separador del modo batch: ningún patrón lo cruza y sanitize() lo quita de los textos
+_BATCH_SEPARATOR = "\x00"
+
+# Caracteres de control (salvo \t \n \r) y de ancho cero
+_INVISIBLE = dict.fromkeys([c for c in range(32) if c not in (9, 10, 13)] + [127, 0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF])
+_TAG = re.compile(r"<[^<>]*>")
+_SPACES = re.compile(r"[ \t]{2,}")
+_PHONE_GROUPS = re.compile(r"[ .-]")
+
+
+class PIIMatch(NamedTuple):
+    kind: str
+    start: int
+    end: int
+    text: str
+
+
+def luhn_valid(digits: str) -> bool:
+    """Dígito verificador de tarjetas (Luhn)"""
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        value = ord(char) - 48
+        if index % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def _digits(text: str) -> str:
+    return "".join(char for char in text if char.isdigit())
+
+
+def classify(kind: str, text: str) -> Optional[str]:
+    """Tipo final de un match del regex, o None si el texto se conserva.
+
+    Las tarjetas que no pasan Luhn y los "teléfonos" de menos de 8 dígitos
+    caen a `num` si son una corrida de 6+ dígitos (lo que enmascaraba el
+    nodo de n8n); precios como 1299.00 o cantidades cortas se conservan.
+    """
+    if kind == "date":
+        return None
+    if kind == "card":
+        return "card" if luhn_valid(_digits(text)) else "num"
+    if kind == "phone":
+        if _is_phone(text):
+            return "phone"
+        return "num" if text.isdigit() and len(text) >= 6 else None
+    return kind
+
+
+def _is_phone(text: str) -> bool:
+    """Si un match de `phone` es un teléfono.
+
+    Con + o código de área entre paréntesis alcanza con 7 dígitos. Sin prefijo,
+    una corrida de 8+ dígitos, o de 8 a 10 en grupos de 2 a 4 que empiecen con
+    0 (prefijo nacional) o vayan unidos por guiones o puntos: así 3840 2160
+    (resolución), 1234-5678-9012 (SKU) o 2025-001234 (orden) se conservan.
+    """
+    digits = _digits(text)
+    if text.startswith(("+", "(")):
+        return len(digits) >= 7
+    if text.isdigit():
+        return len(digits) >= 8
+    groups = _PHONE_GROUPS.split(text)
+    if not 8 <= len(digits) <= 10 or any(not 2 <= len(group) <= 4 for group in groups):
+        return False
+    return text.startswith("0") or " " not in text
+
+
+class PIIMasker:
+    """Enmascara PII en una sola pasada del regex compilado.
+
+    `kinds` limita los tipos a enmascarar (por defecto todos los de
+    TOKENS); los demás hallazgos se conservan. `mask_batch` une los textos
+    con un separador y hace una sola llamada a `sub` para todo el lote, en
+    lugar de una por texto y por patrón.
+    """
+
+    def __init__(self, kinds: Optional[Iterable[str]] = None, tokens: Optional[Mapping[str, str]] = None):
+        self.tokens = dict(TOKENS)
+        self.tokens.update(tokens or {})
+        self.kinds = frozenset(kinds) if kinds is not None else frozenset(self.tokens)
+        unknown = self.kinds - set(self.tokens)
+        if unknown:
+            raise ValueError(f"Unknown PII kinds: {sorted(unknown)}")
+
+    def _replace(self, match: "re.Match") -> str:
+        text = match.group()
+        kind = classify(match.lastgroup, text)
+        return self.tokens[kind] if kind in self.kinds else text
+
+    def find(self, text: str) -> List[PIIMatch]:
+        """Hallazgos con sus offsets en el texto original"""
+        found = []
+        for match in PII_PATTERN.finditer(text or ""):
+            kind = classify(match.lastgroup, match.group())
+            if kind in self.kinds:
+                found.append(PIIMatch(kind, match.start(), match.end(), match.group()))
+        return found
+
+    def mask(self, text: Optional[str]) -> Optional[str]:
+        if not text or not _CANDIDATE.search(text):
+            return text
+        return PII_PATTERN.sub(self._replace, text)
+
+    def mask_with_spans(self, text: str) -> Tuple[str, List[PIIMatch]]:
+        """Texto enmascarado y los hallazgos (offsets del texto original)"""
+        found = self.find(text)
+        parts, position = [], 0
+        for item in found:
+            parts.append(text[position:item.start])
+            parts.append(self.tokens[item.kind])
+            position = item.end
+        parts.append(text[position:])
+        return "".join(parts), found
+
+    def mask_batch(self, texts: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """Enmascara un lote (transcripts, chunks) con una sola pasada sobre los textos con dígitos o @"""
+        indexes = [i for i, text in enumerate(texts) if text and _CANDIDATE.search(text)]
+        if not indexes:
+            return list(texts)
+        present = [texts[i] for i in indexes]
+        if any(_BATCH_SEPARATOR in text for text in present):
+            masked = [self.mask(text) for text in present]
+        else:
+            masked = self.mask(_BATCH_SEPARATOR.join(present)).split(_BATCH_SEPARATOR)
+        result = list(texts)
+        for i, text in zip(indexes, masked):
+            result[i] = text
+        return result
+
+    def mask_fields(self, record: Mapping[str, Any], keep: Iterable[str] = (),
+                    only: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Copia del dict con los valores de texto enmascarados, salvo las claves de `keep`
+        (con `only`, solo esas claves)"""
+        keep = set(keep)
+        only = set(only) if only is not None else None
+        keys = [key for key, value in record.items()
+                if key not in keep and (only is None or key in only) and isinstance(value, str) and value]
+        result = dict(record)
+        for key, value in zip(keys, self.mask_batch([record[key] for key in keys])):
+            result[key] = value
+        return result
+
+
+def sanitize(text: Optional[str], max_length: Optional[int] = None) -> Optional[str]:
+    """Normaliza (NFC), quita caracteres de control/ancho cero y markup, y compacta espacios"""
+    if not text:
+        return text
+    text = unicodedata.normalize("NFC", text).translate(_INVISIBLE)
+    if "<" in text or ">" in text:
+        text = _TAG.sub(" ", text).replace("<", "").replace(">", "")
+    text = _SPACES.sub(" ", text).strip()
+    return text[:max_length] if max_length else text
+
+
+# Instancia por defecto (todos los tipos)
+default_masker = PIIMasker()
+
+
+def find_pii(text: str) -> List[PIIMatch]:
+    return default_masker.find(text)
+
+
+def mask_pii(text: Optional[str]) -> Optional[str]:
+    return default_masker.mask(text)
+
+
+def mask_batch(texts: Sequence[Optional[str]]) -> List[Optional[str]]:
+    return default_masker.mask_batch(texts)
+
+
+def clean_text(text: Optional[str], max_length: Optional[int] = None) -> Optional[str]:
+    """sanitize + enmascarado, para texto libre que se persiste o se indexa"""
+    return default_masker.mask(sanitize(text, max_length))
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: pii-v1
+# version: 3.1.0
+# file: rasa/pii.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
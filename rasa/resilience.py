@@ -0,0 +1,324 @@
+# AUTO-ATC Playbook v3 - Resiliencia de dependencias externas
+# Circuit breaker por dependencia (Qdrant, Postgres, Sheets), timeouts adaptativos
+# según la latencia observada y lecturas "hedged" (un segundo intento si el primero
+# tarda más que el p95)
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """La dependencia tiene el circuito abierto: no se intenta la llamada"""
+
+
+class DependencyTimeout(Exception):
+    """La llamada superó el timeout adaptativo"""
+
+
+class CircuitBreaker:
+    """Abre el circuito tras `failure_threshold` fallas seguidas.
+
+    Abierto, rechaza las llamadas durante `reset_timeout` segundos; después
+    deja pasar hasta `half_open_max` llamadas de prueba (half-open). Un
+    éxito en half-open cierra el circuito y una falla lo vuelve a abrir.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        # Se llama con el lock tomado
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def allow(self) -> bool:
+        """True si la llamada puede intentarse (cuenta como prueba en half-open)"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                logger.warning(f"Circuit {self.name} opened after {self._failures} failures; "
+                               f"retrying in {self.reset_timeout:.0f}s")
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+
+class AdaptiveTimeout:
+    """Timeout = cuantil `quantile` de las últimas `window` latencias x `multiplier`,
+    acotado a [minimum, maximum]; `initial` mientras no hay `min_samples` muestras.
+
+    Un timeout también es una muestra (con el valor del timeout): si la
+    dependencia se vuelve más lenta que la ventana, el timeout sube en vez de
+    quedar fijo en el valor viejo cortando todas las llamadas.
+    """
+
+    def __init__(self, initial: float, minimum: float, maximum: float, quantile: float = 0.99,
+                 multiplier: float = 2.0, window: int = 200, min_samples: int = 20):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Cuantil de la ventana, o None con menos de `min_samples` muestras"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    @property
+    def current(self) -> float:
+        observed = self.latency_quantile(self.quantile)
+        if observed is None:
+            return self.initial
+        return min(self.maximum, max(self.minimum, observed * self.multiplier))
+
+
+class Dependency:
+    """Breaker + timeout adaptativo + estadísticas de una dependencia externa.
+
+    `call` corre la función en un pool propio y espera a lo sumo el timeout
+    vigente; con `hedge=True` (solo lecturas idempotentes) lanza un segundo
+    intento si el primero no respondió dentro del p95 observado y se queda
+    con el primero que termina bien. `guard` solo hace la contabilidad
+    (breaker y latencia) alrededor de un bloque que ya maneja su propio
+    timeout, como las escrituras o un cliente HTTP con `timeout=`.
+    """
+
+    def __init__(self, name: str, breaker: Optional[CircuitBreaker] = None,
+                 timeout: Optional[AdaptiveTimeout] = None, hedge_quantile: float = 0.95,
+                 min_hedge_delay: float = 0.005, max_workers: int = 8):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self.timeouts = timeout or AdaptiveTimeout(initial=1.0, minimum=0.05, maximum=5.0)
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"dep-{name}")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "hedges": 0, "hedge_wins": 0}
+
+    @property
+    def timeout(self) -> float:
+        return self.timeouts.current
+
+    def hedge_delay(self) -> Optional[float]:
+        """Espera antes del segundo intento (p95 observado), o None sin suficientes muestras"""
+        observed = self.timeouts.latency_quantile(self.hedge_quantile)
+        return None if observed is None else max(self.min_hedge_delay, observed)
+
+    def available(self) -> bool:
+        """Sin consumir una prueba de half-open: False solo con el circuito abierto"""
+        return self.breaker.state != OPEN
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _admit(self) -> float:
+        """Admite la llamada y devuelve su timeout (el máximo para las pruebas de half-open)"""
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        self._count("calls")
+        if self.breaker.state == HALF_OPEN:
+            return self.timeouts.maximum
+        return self.timeout
+
+    def _success(self, seconds: float) -> None:
+        self.timeouts.observe(seconds)
+        self.breaker.record_success()
+
+    def _failure(self, timed_out: bool = False, seconds: Optional[float] = None) -> None:
+        self._count("timeouts" if timed_out else "failures")
+        if seconds is not None:
+            self.timeouts.observe(seconds)
+        self.breaker.record_failure()
+
+    @contextmanager
+    def guard(self):
+        """Contabiliza un bloque: CircuitOpenError si el circuito está abierto; entrega el timeout vigente"""
+        timeout = self._admit()
+        start = time.perf_counter()
+        try:
+            yield timeout
+        except Exception:
+            elapsed = time.perf_counter() - start
+            self._failure(seconds=elapsed if elapsed >= timeout else None)
+            raise
+        self._success(time.perf_counter() - start)
+
+    def call(self, fn: Callable, *args, hedge: bool = False, **kwargs) -> Any:
+        timeout = self._admit()
+        start = time.perf_counter()
+        try:
+            if hedge:
+                result = self._hedged(fn, args, kwargs, timeout, start)
+            else:
+                future = self._executor.submit(fn, *args, **kwargs)
+                done, _ = wait([future], timeout=timeout)
+                if not done:
+                    raise DependencyTimeout(f"{self.name} exceeded {timeout * 1000:.0f}ms")
+                result = future.result()
+        except DependencyTimeout:
+            self._failure(timed_out=True, seconds=timeout)
+            raise
+        except Exception:
+            self._failure()
+            raise
+        self._success(time.perf_counter() - start)
+        return result
+
+    def _hedged(self, fn: Callable, args: tuple, kwargs: Dict[str, Any], timeout: float, start: float) -> Any:
+        primary = self._executor.submit(fn, *args, **kwargs)
+        futures = [primary]
+        delay = self.hedge_delay()
+        if delay is not None and delay < timeout:
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                self._count("hedges")
+                futures.append(self._executor.submit(fn, *args, **kwargs))
+
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        while pending:
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise DependencyTimeout(f"{self.name} exceeded {timeout * 1000:.0f}ms")
+
+    async def acall(self, fn: Callable, *args, hedge: bool = False, **kwargs) -> Any:
+        """Variante async de `call` para corrutinas (cancela los intentos que sobran)"""
+        timeout = self._admit()
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(fn(*args, **kwargs))]
+        try:
+            delay = self.hedge_delay() if hedge else None
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self._count("hedges")
+                    tasks.append(asyncio.ensure_future(fn(*args, **kwargs)))
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                remaining = timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self._count("hedge_wins")
+                        self._success(time.perf_counter() - start)
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not pending:
+                self._failure()
+                raise error
+            self._failure(timed_out=True, seconds=timeout)
+            raise DependencyTimeout(f"{self.name} exceeded {timeout * 1000:.0f}ms")
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["state"] = self.breaker.state
+        snapshot["timeout_ms"] = round(self.timeout * 1000, 1)
+        return snapshot
+
+
+def dependency_from_env(name: str, timeout_ms: float, min_timeout_ms: float, max_timeout_ms: float) -> Dependency:
+    """Dependencia con <NAME>_TIMEOUT_MS / _TIMEOUT_MIN_MS / _TIMEOUT_MAX_MS y los
+    umbrales comunes BREAKER_FAILURE_THRESHOLD / BREAKER_RESET_TIMEOUT"""
+    prefix = name.upper()
+    return Dependency(
+        name,
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("BREAKER_RESET_TIMEOUT", "30")),
+        ),
+        timeout=AdaptiveTimeout(
+            initial=float(os.getenv(f"{prefix}_TIMEOUT_MS", str(timeout_ms))) / 1000,
+            minimum=float(os.getenv(f"{prefix}_TIMEOUT_MIN_MS", str(min_timeout_ms))) / 1000,
+            maximum=float(os.getenv(f"{prefix}_TIMEOUT_MAX_MS", str(max_timeout_ms))) / 1000,
+        ),
+    )
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: resilience-v1
+# version: 3.1.0
+# file: rasa/resilience.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,215 @@
+# AUTO-ATC Playbook v3 - Plantillas de respuesta
+# Listados de productos armados con join y bloques por producto memoizados, saludo y
+# horario laboral evaluados desde un calendario cacheado hasta el próximo cambio
+# (zona horaria y feriados configurables)
+
+import os
+import time
+import logging
+from datetime import date, datetime, timedelta
+from datetime import time as day_time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_NAMES = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+MINUTES_PER_DAY = 24 * 60
+
+# Saludo por franja: (minuto de inicio, texto)
+GREETINGS = ((0, "¡Buenos días!"), (12 * 60, "¡Buenas tardes!"), (18 * 60, "¡Buenas noches!"))
+
+
+# ==========================================
+# LISTADOS
+# ==========================================
+
+class ListingTemplate:
+    """Listado de productos: encabezado + un bloque por resultado, unidos con join.
+
+    El bloque de cada producto se memoiza por (título, contenido): un cambio
+    de contenido es una versión nueva y genera otro bloque. Los prefijos
+    "1. ", "2. "... se arman una vez; al llenarse el cache se vacía entero
+    (los listados rotan poco y así la lectura queda en un dict.get).
+    """
+
+    def __init__(self, header: str = "Encontré los siguientes productos:\n\n",
+                 item: str = "{title}\n   {content}\n\n", cache_size: int = 4096, max_items: int = 100):
+        self.header = header
+        self.item = item
+        self.cache_size = cache_size
+        self._prefixes = [f"{index}. " for index in range(1, max_items + 1)]
+        self._blocks: Dict[Tuple[str, str], str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _render_block(self, key: Tuple[str, str]) -> str:
+        self.misses += 1
+        if len(self._blocks) >= self.cache_size:
+            self._blocks.clear()
+        block = self._blocks[key] = self.item.format(title=key[0], content=key[1])
+        return block
+
+    def render(self, results: Sequence[Mapping[str, Any]]) -> str:
+        if len(results) > len(self._prefixes):
+            self._prefixes.extend(f"{index}. " for index in range(len(self._prefixes) + 1, len(results) + 1))
+        parts = [self.header]
+        append = parts.append
+        blocks = self._blocks
+        misses = self.misses
+        for prefix, product in zip(self._prefixes, results):
+            key = (product["title"], product["content"])
+            append(prefix)
+            append(blocks.get(key) or self._render_block(key))
+        self.hits += len(results) - (self.misses - misses)
+        return "".join(parts)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._blocks), "maxsize": self.cache_size}
+
+
+# ==========================================
+# CALENDARIO
+# ==========================================
+
+def _minutes(text: str) -> int:
+    hours, _, minutes = text.strip().partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def parse_hours(spec: str) -> Dict[int, List[Tuple[int, int]]]:
+    """"mon-fri 09:00-18:00; sat 09:00-13:00" -> {día: [(inicio, fin) en minutos]}"""
+    hours: Dict[int, List[Tuple[int, int]]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        days, _, window = part.partition(" ")
+        first, _, last = days.lower().partition("-")
+        start_day = DAY_KEYS.index(first)
+        end_day = DAY_KEYS.index(last) if last else start_day
+        opens, _, closes = window.partition("-")
+        opens, closes = _minutes(opens), _minutes(closes)
+        if not 0 <= opens < closes <= MINUTES_PER_DAY:
+            raise ValueError(f"Invalid business hours window: {part}")
+        for day in range(start_day, end_day + 1):
+            hours.setdefault(day, []).append((opens, closes))
+    return {day: sorted(windows) for day, windows in hours.items()}
+
+
+def parse_holidays(spec: str) -> FrozenSet[date]:
+    """"2026-12-25, 2027-01-01" -> fechas"""
+    return frozenset(date.fromisoformat(day.strip()) for day in spec.split(",") if day.strip())
+
+
+def _clock_text(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def describe_hours(hours: Mapping[int, List[Tuple[int, int]]]) -> str:
+    """Texto del horario: "de lunes a viernes de 9:00 a 18:00" (días consecutivos agrupados)"""
+    groups: List[Tuple[int, int, Tuple[Tuple[int, int], ...]]] = []
+    for day in sorted(hours):
+        windows = tuple(hours[day])
+        if groups and groups[-1][1] == day - 1 and groups[-1][2] == windows:
+            groups[-1] = (groups[-1][0], day, windows)
+        else:
+            groups.append((day, day, windows))
+    parts = []
+    for first, last, windows in groups:
+        days = f"de {DAY_NAMES[first]} a {DAY_NAMES[last]}" if last > first else f"el {DAY_NAMES[first]}"
+        times = " y ".join(f"de {_clock_text(opens)} a {_clock_text(closes)}" for opens, closes in windows)
+        parts.append(f"{days} {times}")
+    return ", ".join(parts)
+
+
+def _timezone(name: str):
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception as e:  # sin tzdata en la imagen: hora del sistema
+        logger.warning(f"Unknown timezone {name} ({e}); using local time")
+        return None
+
+
+class BusinessSchedule:
+    """Horario laboral y franja de saludo en una zona horaria, con feriados.
+
+    Cada estado (abierto/cerrado, saludo) se evalúa una vez y queda
+    cacheado hasta el próximo borde (apertura, cierre, cambio de franja o
+    medianoche local); los turnos intermedios solo comparan un timestamp.
+    Los textos de abierto/cerrado se arman una sola vez desde el horario.
+    """
+
+    def __init__(self, hours: Mapping[int, List[Tuple[int, int]]], holidays: Iterable[date] = (),
+                 timezone: Optional[str] = "America/Montevideo", clock: Callable[[], float] = time.time):
+        self.hours = {day: list(windows) for day, windows in hours.items()}
+        self.holidays = frozenset(holidays)
+        self.tz = _timezone(timezone) if timezone else None
+        self._clock = clock
+        self._cache: Dict[str, Tuple[Any, float, float]] = {}
+        self.evaluations = 0
+        self.open_text = "¡Hola! Estamos disponibles para atenderte."
+        self.closed_text = (f"Hola! Actualmente estamos fuera de horario laboral. Nuestro horario es "
+                            f"{describe_hours(self.hours)}. ¿Te gustaría dejar un mensaje?")
+
+    def _local(self, ts: float) -> datetime:
+        return datetime.fromtimestamp(ts, self.tz) if self.tz else datetime.fromtimestamp(ts)
+
+    def _boundary(self, local: datetime, minute: int) -> float:
+        """Timestamp del minuto `minute` del día local (1440 = medianoche siguiente)"""
+        midnight = datetime.combine(local.date(), day_time(), tzinfo=local.tzinfo)
+        return (midnight + timedelta(minutes=minute)).timestamp()
+
+    def _cached(self, name: str, ts: float, evaluate: Callable[[datetime, int], Tuple[Any, int]]) -> Any:
+        entry = self._cache.get(name)
+        if entry is not None and entry[1] <= ts < entry[2]:
+            return entry[0]
+        local = self._local(ts)
+        value, until = evaluate(local, local.hour * 60 + local.minute)
+        self.evaluations += 1
+        self._cache[name] = (value, ts, self._boundary(local, until))
+        return value
+
+    def _open_state(self, local: datetime, minute: int) -> Tuple[bool, int]:
+        windows = [] if local.date() in self.holidays else self.hours.get(local.weekday(), [])
+        is_open = any(opens <= minute < closes for opens, closes in windows)
+        edges = [edge for window in windows for edge in window if edge > minute]
+        return is_open, min(edges, default=MINUTES_PER_DAY)
+
+    @staticmethod
+    def _greeting_state(local: datetime, minute: int) -> Tuple[str, int]:
+        text, until = GREETINGS[0][1], MINUTES_PER_DAY
+        for start, greeting in GREETINGS:
+            if minute >= start:
+                text = greeting
+            else:
+                until = start
+                break
+        return text, until
+
+    def is_open(self, ts: Optional[float] = None) -> bool:
+        return self._cached("open", self._clock() if ts is None else ts, self._open_state)
+
+    def greeting(self, ts: Optional[float] = None) -> str:
+        return self._cached("greeting", self._clock() if ts is None else ts, self._greeting_state)
+
+    def status_text(self, ts: Optional[float] = None) -> Tuple[bool, str]:
+        is_open = self.is_open(ts)
+        return is_open, self.open_text if is_open else self.closed_text
+
+
+def schedule_from_env() -> BusinessSchedule:
+    """Calendario con BUSINESS_HOURS, BUSINESS_HOLIDAYS y BUSINESS_TIMEZONE"""
+    return BusinessSchedule(
+        parse_hours(os.getenv("BUSINESS_HOURS", "mon-fri 09:00-18:00")),
+        parse_holidays(os.getenv("BUSINESS_HOLIDAYS", "")),
+        timezone=os.getenv("BUSINESS_TIMEZONE", "America/Montevideo") or None,
+    )
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: responses-v1
+# version: 3.1.0
+# file: rasa/responses.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,128 @@
+# AUTO-ATC Playbook v3 - Caches compartidos entre workers del action server
+# Servidor de caches TTLCache por nombre (proceso del supervisor, ver action_workers.py)
+# y cliente con la misma interfaz que TTLCache, con fallback a un cache local
+
+import os
+import time
+import logging
+import threading
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Hashable, Optional
+
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Dirección (socket unix) y clave del servidor de caches; las define el supervisor
+ENV_ADDRESS = "ACTION_CACHE_ADDRESS"
+ENV_AUTHKEY = "ACTION_CACHE_AUTHKEY"
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _get_cache(name: str, maxsize: int, ttl: float) -> TTLCache:
+    """Cache del servidor por nombre; el primer worker que lo pide fija tamaño y TTL"""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(maxsize=maxsize, ttl=ttl)
+        return _caches[name]
+
+
+class CacheManager(BaseManager):
+    """Manager de multiprocessing que sirve los caches por nombre"""
+
+
+CacheManager.register("get_cache", callable=_get_cache, exposed=("get", "put", "pop", "clear", "stats", "__len__"))
+
+
+def start_cache_server(address: str, authkey: bytes) -> CacheManager:
+    """Inicia el servidor de caches en un proceso propio (lo llama el supervisor)"""
+    manager = CacheManager(address=address, authkey=authkey)
+    manager.start()
+    return manager
+
+
+class SharedTTLCache:
+    """Interfaz de TTLCache sobre un cache del servidor compartido.
+
+    Cada hilo usa su propia conexión (la maneja el proxy). Si el servidor
+    no responde se usa un TTLCache local y se reintenta la conexión cada
+    `retry_interval` segundos: un worker nunca falla por el cache.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, address: str, authkey: bytes,
+                 retry_interval: float = 5.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.address = address
+        self.authkey = authkey
+        self.retry_interval = retry_interval
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._proxy = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _remote(self):
+        if self._proxy is None and time.monotonic() >= self._retry_at:
+            with self._lock:
+                if self._proxy is None and time.monotonic() >= self._retry_at:
+                    try:
+                        manager = CacheManager(address=self.address, authkey=self.authkey)
+                        manager.connect()
+                        self._proxy = manager.get_cache(self.name, self.maxsize, self.ttl)
+                    except Exception as e:
+                        logger.warning(f"Shared cache {self.name} unavailable ({e}); using local cache")
+                        self._retry_at = time.monotonic() + self.retry_interval
+        return self._proxy
+
+    def _call(self, method: str, *args) -> Any:
+        proxy = self._remote()
+        if proxy is not None:
+            try:
+                return getattr(proxy, method)(*args)
+            except (OSError, EOFError) as e:
+                logger.warning(f"Shared cache {self.name} lost ({e}); using local cache")
+                self._proxy = None
+                self._retry_at = time.monotonic() + self.retry_interval
+        return getattr(self.local, method)(*args)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self._call("get", key, default)
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._call("put", key, value, ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        return self._call("pop", key, default)
+
+    def clear(self) -> None:
+        self._call("clear")
+
+    def __len__(self) -> int:
+        return self._call("__len__")
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores del cache compartido (suma de todos los workers)"""
+        stats = dict(self._call("stats"))
+        stats["shared"] = self._proxy is not None
+        return stats
+
+
+def shared_cache(name: str, maxsize: int, ttl: float):
+    """SharedTTLCache si el proceso es un worker del supervisor; si no, TTLCache local"""
+    address = os.getenv(ENV_ADDRESS)
+    if not address:
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    return SharedTTLCache(name, maxsize, ttl, address, bytes.fromhex(os.getenv(ENV_AUTHKEY, "")))
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: shared-cache-v1
+# version: 3.1.0
+# file: rasa/shared_cache.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
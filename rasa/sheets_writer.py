@@ -0,0 +1,359 @@
+# AUTO-ATC Playbook v3 - Escritor batch de Google Sheets
+# Cola durable (spool JSONL) que agrupa filas y las envía en un solo values:append por lote
+
+import os
+import re
+import json
+import time
+import fcntl
+import atexit
+import random
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from resilience import CircuitOpenError, Dependency, dependency_from_env
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsBatchWriter:
+    """Envía filas a Google Sheets fuera del turno del usuario.
+
+    `enqueue` agrega la fila al spool en disco y vuelve enseguida. Un hilo de
+    fondo envía un único `values:append` cada `batch_size` filas o cada
+    `flush_interval_ms`, lo que ocurra primero. Si Sheets falla (5xx, 429 o
+    error de red) el lote se reintenta con backoff exponencial; las filas
+    siguen en el spool y sobreviven a un reinicio. Un 4xx distinto de 429 no
+    se puede reintentar: el lote se mueve a `<spool>.rejected`. Con
+    `dependency`, el timeout del request es el adaptativo y con el circuito
+    abierto el lote espera al próximo reintento sin gastar un request.
+
+    Varios procesos pueden compartir `spool_path` (workers de action_workers,
+    recargas escalonadas): cada writer toma con flock el primer archivo libre
+    entre `<spool>`, `<spool>.1`, `<spool>.2`... y solo reescribe el suyo. Los
+    spools de procesos que ya no están (lock libre) se adoptan al iniciar y
+    cada `adopt_interval` segundos, así ninguna fila se pierde ni se envía dos veces.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        spool_path: str = ".spool/sheets_outbox.jsonl",
+        batch_size: int = 50,
+        flush_interval_ms: int = 2000,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0,
+        timeout: float = 10.0,
+        fsync: bool = False,
+        session: Optional[requests.Session] = None,
+        dependency: Optional[Dependency] = None,
+        adopt_interval: float = 30.0,
+    ):
+        self.url = url
+        self.params = params or {}
+        self.base_spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.fsync = fsync
+        self.session = session or requests.Session()
+        self.dependency = dependency
+        self.adopt_interval = adopt_interval
+
+        self._cond = threading.Condition()
+        self._pending: List[List[Any]] = []
+        self._oldest_at: Optional[float] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"enqueued": 0, "flushed_rows": 0, "requests": 0, "failures": 0, "rejected_rows": 0,
+                       "short_circuited": 0, "adopted_rows": 0}
+
+        directory = os.path.dirname(spool_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.spool_path, self._lock_file = self._claim_spool(spool_path)
+        self._load_spool()
+        self.adopt_orphans()
+        self._next_adopt = time.monotonic() + self.adopt_interval
+
+    # ------------------------------------------
+    # Spool en disco
+    # ------------------------------------------
+
+    @staticmethod
+    def _try_lock(path: str):
+        """Lock exclusivo no bloqueante sobre `<path>.lock` (None si lo tiene otro proceso)"""
+        lock_file = open(path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _claim_spool(self, base: str):
+        n = 0
+        while True:
+            path = base if n == 0 else f"{base}.{n}"
+            lock_file = self._try_lock(path)
+            if lock_file is not None:
+                return path, lock_file
+            n += 1
+
+    def _sibling_spools(self) -> List[str]:
+        directory = os.path.dirname(self.base_spool_path) or "."
+        name = os.path.basename(self.base_spool_path)
+        pattern = re.compile(re.escape(name) + r"(\.\d+)?")
+        return [os.path.join(os.path.dirname(self.base_spool_path), entry) for entry in sorted(os.listdir(directory))
+                if pattern.fullmatch(entry)]
+
+    @staticmethod
+    def _read_rows(path: str) -> List[List[Any]]:
+        rows = []
+        if not os.path.exists(path):
+            return rows
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # Última línea cortada por un corte abrupto: se descarta
+                    logger.warning(f"Skipping corrupt line in {path}")
+        return rows
+
+    def _load_spool(self) -> None:
+        """Recupera filas no enviadas antes de un reinicio"""
+        self._pending.extend(self._read_rows(self.spool_path))
+        if self._pending:
+            self._oldest_at = time.monotonic()
+            logger.info(f"Recovered {len(self._pending)} pending Sheets rows from spool")
+
+    def adopt_orphans(self) -> int:
+        """Pasa a este spool las filas de spools hermanos sin dueño; devuelve cuántas"""
+        adopted = 0
+        for path in self._sibling_spools():
+            if path == self.spool_path:
+                continue
+            lock_file = self._try_lock(path)
+            if lock_file is None:
+                continue  # lo usa otro proceso vivo
+            try:
+                rows = self._read_rows(path)
+                with self._cond:
+                    if rows:
+                        # Primero durable en el propio spool, después se borra el huérfano
+                        self._write_lines(self.spool_path, rows, "a")
+                        self._pending.extend(rows)
+                        if self._oldest_at is None:
+                            self._oldest_at = time.monotonic()
+                        self._stats["adopted_rows"] += len(rows)
+                        self._cond.notify()
+                    os.remove(path)
+                adopted += len(rows)
+            finally:
+                lock_file.close()
+        if adopted:
+            logger.info(f"Adopted {adopted} pending Sheets rows from orphaned spools")
+        return adopted
+
+    def _write_lines(self, path: str, rows: List[List[Any]], mode: str) -> None:
+        with open(path, mode, encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _rewrite_spool(self) -> None:
+        # Se llama con el lock tomado: reemplazo atómico con las filas pendientes
+        tmp_path = self.spool_path + ".tmp"
+        self._write_lines(tmp_path, self._pending, "w")
+        os.replace(tmp_path, self.spool_path)
+
+    # ------------------------------------------
+    # API pública
+    # ------------------------------------------
+
+    def enqueue(self, row: List[Any]) -> None:
+        """Agrega una fila (durable) y despierta al hilo si se completó un lote"""
+        with self._cond:
+            self._write_lines(self.spool_path, [row], "a")
+            self._pending.append(row)
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            self._stats["enqueued"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """Envía un lote ahora; devuelve filas confirmadas (0 si falló o no había)"""
+        with self._cond:
+            batch = self._pending[:self.batch_size]
+        if not batch:
+            return 0
+
+        short_circuited = False
+        try:
+            with self.dependency.guard() if self.dependency else nullcontext(self.timeout) as timeout:
+                response = self.session.post(self.url, params=self.params, json={"values": batch}, timeout=timeout)
+                status = response.status_code
+                if status == 429 or status >= 500:
+                    response.raise_for_status()  # cuenta como falla para el breaker
+        except CircuitOpenError:
+            short_circuited = True
+            status = None
+        except requests.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is None:
+                logger.warning(f"Error saving to Google Sheets: {e}")
+
+        with self._cond:
+            self._stats["short_circuited" if short_circuited else "requests"] += 1
+            if status is not None and 200 <= status < 300:
+                self._ack(len(batch))
+                self._stats["flushed_rows"] += len(batch)
+                return len(batch)
+
+            if status is not None and 400 <= status < 500 and status != 429:
+                logger.error(f"Google Sheets rejected {len(batch)} rows with HTTP {status}; moved to dead letter")
+                self._write_lines(self.base_spool_path + ".rejected", batch, "a")
+                self._ack(len(batch))
+                self._stats["rejected_rows"] += len(batch)
+                return 0
+
+            # Reintentable: backoff exponencial con jitter
+            self._failures += 1
+            self._stats["failures"] += 1
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (self._failures - 1)))
+            self._retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+            if status is not None:
+                logger.warning(f"Google Sheets append failed with HTTP {status}; retrying in {delay:.1f}s")
+            return 0
+
+    def _ack(self, count: int) -> None:
+        # Se llama con el lock tomado
+        self._pending = self._pending[count:]
+        self._failures = 0
+        self._retry_at = 0.0
+        self._oldest_at = time.monotonic() if self._pending else None
+        self._rewrite_spool()
+
+    def _due(self) -> float:
+        """Segundos hasta el próximo envío (0 = ya); se llama con el lock tomado"""
+        if not self._pending:
+            return self.flush_interval
+        now = time.monotonic()
+        if self._retry_at > now:
+            return self._retry_at - now
+        if self._stopping or len(self._pending) >= self.batch_size:
+            return 0.0
+        return max(0.0, self._oldest_at + self.flush_interval - now)
+
+    def _run(self) -> None:
+        while True:
+            if time.monotonic() >= self._next_adopt:
+                self._next_adopt = time.monotonic() + self.adopt_interval
+                self.adopt_orphans()
+            with self._cond:
+                wait = self._due()
+                while wait > 0 and not (self._stopping and not self._pending):
+                    until_adopt = self._next_adopt - time.monotonic()
+                    if until_adopt <= 0:
+                        break
+                    self._cond.wait(min(wait, until_adopt))
+                    wait = self._due()
+                if self._stopping and not self._pending:
+                    return
+                if wait > 0:
+                    continue
+            self.flush()
+
+    def start(self) -> "SheetsBatchWriter":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sheets-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Intenta vaciar la cola antes de salir; lo que quede sigue en el spool"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return
+            self._thread = None
+        self.close()
+
+    def close(self) -> None:
+        """Libera el spool: otro writer lo adopta con las filas que hayan quedado"""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["pending"] = len(self._pending)
+        return snapshot
+
+
+def sheets_writer_from_env() -> Optional[SheetsBatchWriter]:
+    """Crea el writer si GOOGLE_SHEET_ID y GOOGLE_API_KEY están configurados"""
+    sheet_id = os.getenv("GOOGLE_SHEET_ID")
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not sheet_id or not api_key:
+        return None
+
+    base_url = os.getenv("SHEETS_API_URL", "https://sheets.googleapis.com").rstrip("/")
+    return SheetsBatchWriter(
+        url=f"{base_url}/v4/spreadsheets/{sheet_id}/values/Cotizaciones!A1:append",
+        params={"valueInputOption": "USER_ENTERED", "key": api_key},
+        spool_path=os.getenv("SHEETS_SPOOL_PATH", ".spool/sheets_outbox.jsonl"),
+        batch_size=int(os.getenv("SHEETS_BATCH_SIZE", "50")),
+        flush_interval_ms=int(os.getenv("SHEETS_FLUSH_INTERVAL_MS", "2000")),
+        fsync=os.getenv("SHEETS_SPOOL_FSYNC", "false").lower() == "true",
+        dependency=dependency_from_env("sheets", timeout_ms=10000, min_timeout_ms=1000, max_timeout_ms=10000),
+    )
+
+
+_writer: Optional[SheetsBatchWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_sheets_writer() -> Optional[SheetsBatchWriter]:
+    """Writer compartido del proceso, iniciado en el primer uso (None si Sheets no está configurado)"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = sheets_writer_from_env()
+                if writer is None:
+                    return None
+                _writer = writer.start()
+                atexit.register(_writer.stop)
+    return _writer
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: sheets-writer-v1
+# version: 3.1.0
+# file: rasa/sheets_writer.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
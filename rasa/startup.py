@@ -0,0 +1,98 @@
+# AUTO-ATC Playbook v3 - Arranque del action server
+# Warm-up en segundo plano (después de que el servidor escucha) y señal de readiness
+
+import time
+import socket
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def wait_for_port(host: str, port: int, timeout: float, interval: float = 0.2) -> bool:
+    """Espera a que algo acepte conexiones en host:port (el action server ya hizo bind)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=interval):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
+
+class Warmup:
+    """Tareas de warm-up (pool, Qdrant, índice y snapshot del catálogo, embedder) y su estado.
+
+    Cada tarea corre una vez; si falla queda registrada como error y las
+    acciones siguen funcionando con inicialización perezosa en el primer uso.
+    `ready` se activa al terminar todas, fallen o no.
+    """
+
+    def __init__(self, import_seconds: Optional[float] = None):
+        self.import_seconds = import_seconds
+        self.ready = threading.Event()
+        self._tasks: List[Tuple[str, Callable[[], Any]]] = []
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, name: str, task: Callable[[], Any]) -> None:
+        self._tasks.append((name, task))
+        self._status[name] = {"state": "pending"}
+
+    def run(self) -> None:
+        self._started_at = time.monotonic()
+        for name, task in self._tasks:
+            start = time.perf_counter()
+            try:
+                task()
+                status = {"state": "ok"}
+            except Exception as e:
+                logger.warning(f"Warm-up task {name} failed: {e}")
+                status = {"state": "error", "error": str(e)}
+            status["seconds"] = round(time.perf_counter() - start, 4)
+            with self._lock:
+                self._status[name] = status
+        self._finished_at = time.monotonic()
+        self.ready.set()
+        logger.info(f"Warm-up finished in {self._finished_at - self._started_at:.2f}s")
+
+    def start(self, host: str = "127.0.0.1", port: Optional[int] = None, port_timeout: float = 120.0) -> None:
+        """Corre el warm-up en un hilo; con `port`, espera primero a que el servidor escuche"""
+        if self._thread is not None:
+            return
+
+        def target():
+            if port and not wait_for_port(host, port, port_timeout):
+                logger.warning(f"Action server did not bind {host}:{port} after {port_timeout:.0f}s; warming up anyway")
+            self.run()
+
+        self._thread = threading.Thread(target=target, name="actions-warmup", daemon=True)
+        self._thread.start()
+
+    def status(self) -> Dict[str, Any]:
+        """Estado para el endpoint /ready"""
+        with self._lock:
+            tasks = {name: dict(status) for name, status in self._status.items()}
+        return {
+            "ready": self.ready.is_set(),
+            "degraded": sorted(name for name, status in tasks.items() if status["state"] == "error"),
+            "import_seconds": self.import_seconds,
+            "warmup_seconds": round(self._finished_at - self._started_at, 4) if self._finished_at else None,
+            "tasks": tasks,
+        }
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: startup-v1
+# version: 3.1.0
+# file: rasa/startup.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
@@ -0,0 +1,149 @@
+# AUTO-ATC Playbook v3 - Validadores de input
+# Registro de validadores por tipo con patrones precompilados y validación batch de slots
+
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Solo números, espacios, guiones, paréntesis, y signos +
+PHONE_PATTERN = re.compile(r'^[\+]?[0-9\s\-\(\)]{8,20}$')
+
+# Tipo de validación de cada slot de la cotización, en el orden en que se re-preguntan
+SLOT_TYPES: Dict[str, str] = {
+    "producto": "text",
+    "cantidad": "quantity",
+    "email": "email",
+    "telefono": "phone",
+}
+
+
+def _clean(value: str) -> Optional[str]:
+    """Texto sin espacios en los extremos, o None si está vacío.
+
+    Solo crea una copia cuando hay espacios que quitar (el caso raro).
+    """
+    if not value:
+        return None
+    if value[0].isspace() or value[-1].isspace():
+        value = value.strip()
+        if not value:
+            return None
+    return value
+
+
+class TextValidator:
+    """Texto general: longitud máxima y sin caracteres de markup"""
+
+    __slots__ = ("max_length",)
+
+    def __init__(self, max_length: int = 500):
+        self.max_length = max_length
+
+    def __call__(self, value: Any) -> bool:
+        if not isinstance(value, str):
+            return False
+        value = _clean(value)
+        # `in` sobre dos caracteres es más barato que un regex [<>]
+        return value is not None and len(value) <= self.max_length and "<" not in value and ">" not in value
+
+
+class PatternValidator:
+    """Valida contra un patrón precompilado (email, teléfono)"""
+
+    __slots__ = ("pattern",)
+
+    def __init__(self, pattern: "re.Pattern"):
+        self.pattern = pattern
+
+    def __call__(self, value: Any) -> bool:
+        if not isinstance(value, str):
+            return False
+        value = _clean(value)
+        return value is not None and self.pattern.match(value) is not None
+
+
+class QuantityValidator:
+    """Cantidad entera en un rango; acepta "3", 3 y 3.0 (los slots float de Rasa)"""
+
+    __slots__ = ("minimum", "maximum")
+
+    def __init__(self, minimum: int = 1, maximum: int = 1000):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __call__(self, value: Any) -> bool:
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, float):
+            if not value.is_integer():
+                return False
+            value = int(value)
+        elif isinstance(value, str):
+            value = _clean(value)
+            if value is None:
+                return False
+            try:
+                value = int(value)
+            except ValueError:
+                try:
+                    number = float(value)
+                except ValueError:
+                    return False
+                if not number.is_integer():
+                    return False
+                value = int(number)
+        elif not isinstance(value, int):
+            return False
+        return self.minimum <= value <= self.maximum
+
+
+Validator = Callable[[Any], bool]
+
+_text_validator = TextValidator()
+_validators: Dict[str, Validator] = {
+    "text": _text_validator,
+    "email": PatternValidator(EMAIL_PATTERN),
+    "phone": PatternValidator(PHONE_PATTERN),
+    "quantity": QuantityValidator(),
+}
+
+
+def register_validator(input_type: str, validator: Validator) -> None:
+    """Registra (o reemplaza) el validador de un tipo de input"""
+    _validators[input_type] = validator
+
+
+def get_validator(input_type: str) -> Validator:
+    """Validador del tipo; los tipos desconocidos se validan como texto general"""
+    return _validators.get(input_type, _text_validator)
+
+
+def validate(value: Any, input_type: str = "text") -> bool:
+    """Valida un input con el validador registrado para su tipo"""
+    return _validators.get(input_type, _text_validator)(value)
+
+
+def validate_slots(slots: Mapping[str, Any], slot_types: Mapping[str, str] = SLOT_TYPES) -> List[str]:
+    """Valida en una pasada los slots con valor; devuelve los inválidos en orden de `slot_types`.
+
+    Los slots vacíos (None o "") se omiten: la obligatoriedad la decide la acción.
+    """
+    invalid = []
+    for slot, input_type in slot_types.items():
+        value = slots.get(slot)
+        if value is None or value == "":
+            continue
+        if not _validators.get(input_type, _text_validator)(value):
+            invalid.append(slot)
+    return invalid
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: validators-v1
+# version: 3.1.0
+# file: rasa/validators.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: rasa-actions-enhanced
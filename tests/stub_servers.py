@@ -0,0 +1,196 @@
+# AUTO-ATC Playbook v3 - Servidores stub para tests, benchmarks y load tests
+# Servidor HTTP local con rutas JSON, latencia configurable e inyección de fallas;
+# stubs de Sheets, Chatwoot, WhatsApp (proveedor WABA), Rasa, TEI y Qdrant
+
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# handler(request) -> (status, body_json)
+Handler = Callable[[Dict[str, Any]], Tuple[int, Any]]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # el load test abre muchas conexiones juntas
+
+
+class StubServer:
+    """Servidor HTTP en un hilo que responde JSON por (método, prefijo de ruta).
+
+    `latency` (segundos) se agrega a cada respuesta y `fail_rate` devuelve
+    503 con esa probabilidad; `fail_next` fuerza 503 en las próximas N
+    respuestas (fallas determinísticas). Guarda cada request en `requests`
+    para que los tests verifiquen lo recibido.
+    """
+
+    def __init__(self, routes: Optional[Dict[Tuple[str, str], Handler]] = None,
+                 latency: float = 0.0, fail_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.routes: Dict[Tuple[str, str], Handler] = dict(routes or {})
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_next = 0
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, method: str, prefix: str, handler: Handler) -> None:
+        self.routes[(method.upper(), prefix)] = handler
+
+    def _dispatch(self, request: Dict[str, Any]) -> Tuple[int, Any]:
+        with self._lock:
+            self.requests.append(request)
+            forced_failure = self.fail_next > 0
+            if forced_failure:
+                self.fail_next -= 1
+        if self.latency:
+            time.sleep(self.latency)
+        if forced_failure or (self.fail_rate and random.random() < self.fail_rate):
+            return 503, {"error": "injected failure"}
+        # La ruta más específica gana
+        for (method, prefix), handler in sorted(self.routes.items(), key=lambda r: -len(r[0][1])):
+            if method == request["method"] and request["path"].startswith(prefix):
+                return handler(request)
+        return 404, {"error": "not found"}
+
+    def _make_handler(self):
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                parsed = urlparse(self.path)
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = raw.decode("utf-8", "replace")
+                status, payload = stub._dispatch({
+                    "method": self.command,
+                    "path": parsed.path,
+                    "query": {k: v[0] for k, v in parse_qs(parsed.query).items()},
+                    "headers": dict(self.headers),
+                    "body": body,
+                    "received_at": time.time(),
+                })
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return _Handler
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def sheets_stub(**kwargs) -> StubServer:
+    """Stub del endpoint values:append de Google Sheets"""
+    def append(request):
+        rows = (request["body"] or {}).get("values", [])
+        return 200, {"updates": {"updatedRows": len(rows)}}
+    return StubServer({("POST", "/v4/spreadsheets/"): append}, **kwargs)
+
+
+def chatwoot_stub(can_reply: bool = True, **kwargs) -> StubServer:
+    """Stub de Chatwoot: detalle de conversación, creación de mensajes y envío de templates"""
+    def details(request):
+        conversation_id = request["path"].rstrip("/").rsplit("/", 1)[-1]
+        return 200, {"id": conversation_id, "status": "open", "can_reply": can_reply, "meta": {"channel": "Channel::Whatsapp"}}
+
+    def create_message(request):
+        return 200, {"id": len(stub.requests), "content": (request["body"] or {}).get("content"), "message_type": "outgoing"}
+
+    stub = StubServer({
+        ("GET", "/api/v1/accounts/"): details,
+        ("POST", "/public/api/v1/inboxes/"): create_message,
+        ("POST", "/messages"): create_message,
+    }, **kwargs)
+    return stub
+
+
+def waba_stub(**kwargs) -> StubServer:
+    """Stub del proveedor de WhatsApp Business (POST /messages)"""
+    def send(request):
+        body = request["body"] or {}
+        return 200, {"messaging_product": "whatsapp", "contacts": [{"input": body.get("to"), "wa_id": body.get("to")}],
+                     "messages": [{"id": f"wamid.{len(stub.requests)}"}]}
+
+    stub = StubServer({("POST", "/messages"): send}, **kwargs)
+    return stub
+
+
+def rasa_stub(reply: str = "Encontré los siguientes productos:", **kwargs) -> StubServer:
+    """Stub del canal REST de Rasa (/webhooks/rest/webhook)"""
+    def webhook(request):
+        body = request["body"] or {}
+        return 200, [{"recipient_id": body.get("sender"), "text": reply}]
+    return StubServer({("POST", "/webhooks/rest/webhook"): webhook}, **kwargs)
+
+
+def tei_stub(dim: int = 384, **kwargs) -> StubServer:
+    """Stub de TEI (/embeddings): un vector constante por input"""
+    def embed(request):
+        inputs = (request["body"] or {}).get("inputs", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return 200, [[0.01] * dim for _ in inputs]
+    return StubServer({("POST", "/embeddings"): embed}, **kwargs)
+
+
+def qdrant_stub(hits: Optional[List[Dict[str, Any]]] = None, **kwargs) -> StubServer:
+    """Stub de la búsqueda de puntos de Qdrant (/collections/<c>/points/search)"""
+    payloads = hits if hits is not None else [
+        {"title": "Laptop Dell XPS 13", "price": 1299.0, "category": "computadoras", "language": "es"},
+        {"title": "iPhone 15 Pro", "price": 999.0, "category": "celulares", "language": "es"},
+        {"title": "Auriculares Sony WH-1000XM5", "price": 349.0, "category": "audio", "language": "es"},
+    ]
+
+    def search(request):
+        top = (request["body"] or {}).get("top") or (request["body"] or {}).get("limit") or 5
+        result = [{"id": i + 1, "version": 0, "score": 0.9 - i * 0.1, "payload": payload}
+                  for i, payload in enumerate(payloads[:top])]
+        return 200, {"result": result, "status": "ok", "time": 0.001}
+    return StubServer({("POST", "/collections/"): search}, **kwargs)
+
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: stub-servers-v1
+# version: 3.1.0
+# file: tests/stub_servers.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,147 @@
+# AUTO-ATC Playbook v3 - Tests para el action server multi-proceso
+# Pruebas de shared_cache.py (caches compartidos entre procesos) y de action_workers.py
+# (supervisor pre-fork, reinicio de workers y recarga escalonada)
+
+import pytest
+import sys
+import os
+import time
+import threading
+import textwrap
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import requests
+
+from action_workers import ActionWorkerSupervisor
+from shared_cache import SharedTTLCache, shared_cache, start_cache_server
+from ttl_cache import TTLCache
+
+ACTIONS_MODULE = '''
+import os
+import threading
+from rasa_sdk import Action
+
+warmup = type("Warmup", (), {"ready": threading.Event()})()
+warmup.ready.set()
+
+
+class ActionWhoAmI(Action):
+    def name(self):
+        return "action_whoami"
+
+    def run(self, dispatcher, tracker, domain):
+        dispatcher.utter_message(text=f"{os.getpid()} {os.environ['ACTION_WORKER_ID']}")
+        return []
+'''
+
+
+def webhook(url, sender="s1"):
+    tracker = {"sender_id": sender, "slots": {}, "latest_message": {"text": "hola"}, "events": [], "paused": False,
+               "followup_action": None, "active_loop": {}, "latest_action_name": None}
+    response = requests.post(f"{url}/webhook", json={"next_action": "action_whoami", "sender_id": sender,
+                                                     "tracker": tracker, "domain": {}}, timeout=10)
+    response.raise_for_status()
+    return int(response.json()["responses"][0]["text"].split()[0])
+
+
+def wait_until(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if condition():
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+class TestSharedCache:
+    """Pruebas del servidor de caches y el cliente"""
+
+    def test_clients_share_entries_and_stats(self, tmp_path):
+        """Test que dos clientes (como dos workers) ven las mismas entradas"""
+        authkey = os.urandom(16)
+        manager = start_cache_server(str(tmp_path / "caches.sock"), authkey)
+        try:
+            first = SharedTTLCache("embedding_cache", 10, 60, str(tmp_path / "caches.sock"), authkey)
+            second = SharedTTLCache("embedding_cache", 10, 60, str(tmp_path / "caches.sock"), authkey)
+            first.put("laptop dell", [0.1, 0.2])
+            assert second.get("laptop dell") == [0.1, 0.2]
+            assert second.get("iphone") is None
+            assert len(first) == 1
+            stats = first.stats()
+            assert stats["shared"] and stats["hits"] == 1 and stats["misses"] == 1
+        finally:
+            manager.shutdown()
+
+    def test_falls_back_to_local_cache(self, tmp_path):
+        """Test que sin servidor el cliente usa un cache local y no falla"""
+        cache = SharedTTLCache("shown_results", 10, 60, str(tmp_path / "missing.sock"), b"key", retry_interval=60)
+        cache.put("sender-1", [{"title": "Laptop"}])
+        assert cache.get("sender-1") == [{"title": "Laptop"}]
+        assert cache.stats()["shared"] is False
+
+    def test_local_cache_outside_supervisor(self, monkeypatch):
+        """Test que fuera del supervisor shared_cache devuelve un TTLCache"""
+        monkeypatch.delenv("ACTION_CACHE_ADDRESS", raising=False)
+        assert isinstance(shared_cache("embedding_cache", 10, 60), TTLCache)
+
+
+class TestSupervisor:
+    """Pruebas del supervisor con un módulo de acciones mínimo"""
+
+    @pytest.fixture
+    def supervisor(self, tmp_path, monkeypatch):
+        (tmp_path / "whoami_actions.py").write_text(textwrap.dedent(ACTIONS_MODULE))
+        monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(tmp_path), os.getenv("PYTHONPATH", "")]))
+        monkeypatch.setenv("PYTHONWARNINGS", "ignore")
+        supervisor = ActionWorkerSupervisor(2, host="127.0.0.1", port=0, actions_module="whoami_actions",
+                                            ready_timeout=30, stop_timeout=10, restart_delay=0.1)
+        supervisor.start()
+        thread = threading.Thread(target=supervisor.supervise, kwargs={"interval": 0.1}, daemon=True)
+        thread.start()
+        yield supervisor, f"http://127.0.0.1:{supervisor.port}"
+        supervisor.stop()
+        thread.join(10)
+        supervisor.shutdown()
+
+    def test_workers_share_port_restart_and_reload(self, supervisor):
+        """Test que los workers atienden el mismo puerto, se reinician al morir y se recargan de a uno"""
+        supervisor, url = supervisor
+        pids = set(supervisor.pids())
+        assert len(pids) == 2
+        assert wait_until(lambda: webhook(url) in pids)
+
+        crashed = supervisor.pids()[0]
+        os.kill(crashed, 9)
+        assert wait_until(lambda: supervisor.restarts == 1 and crashed not in supervisor.pids())
+        assert wait_until(lambda: webhook(url) in supervisor.pids())
+
+        before = set(supervisor.pids())
+        supervisor.request_reload()
+        assert wait_until(lambda: supervisor.reloads == 1 and not before & set(supervisor.pids()))
+        assert all(webhook(url, f"s{i}") in supervisor.pids() for i in range(5))
+        assert {worker.bank for worker in supervisor._workers.values()} == {1}
+
+    def test_reload_uses_other_metrics_port_bank(self):
+        """Test que el worker de reemplazo no compite por el puerto de métricas del viejo"""
+        supervisor = ActionWorkerSupervisor(4, metrics_port=9102)
+
+        assert [supervisor.metrics_port_for(slot, 0) for slot in range(4)] == [9102, 9103, 9104, 9105]
+        assert [supervisor.metrics_port_for(slot, 1) for slot in range(4)] == [9106, 9107, 9108, 9109]
+        assert ActionWorkerSupervisor(4).metrics_port_for(2, 1) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-action-workers-v1
+# version: 3.1.0
+# file: tests/test_action_workers.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
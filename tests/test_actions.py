@@ -4,10 +4,14 @@
 import pytest
 import sys
 import os
+import json
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
 
-from actions import DatabaseManager
-from unittest.mock import Mock, patch
+import actions
+from actions import ActionRegisterQuote, ActionSearchProduct, DatabaseManager, match_shown_result
+from embeddings import HashingEmbedder
+import psycopg2.extensions
+from unittest.mock import MagicMock, Mock, patch
 
 class TestDatabaseManager:
     """Pruebas para DatabaseManager"""
@@ -29,6 +33,11 @@ class TestDatabaseManager:
         """Test validación de texto con caracteres maliciosos"""
         assert self.db.validate_input("<script>alert('xss')</script>", "text") == False
 
+    def test_validate_input_sanitizes_text(self):
+        """Test que texto hecho solo de caracteres de control o de ancho cero no es válido"""
+        assert self.db.validate_input("\u200b\u200b\x07", "text") == False
+        assert self.db.validate_input("Laptop\u200b Dell", "text") == True
+
     def test_validate_input_valid_email(self):
         """Test validación de email válido"""
         assert self.db.validate_input("test@example.com", "email") == True
@@ -71,6 +80,86 @@ class TestDatabaseManager:
         assert "title" in results[0]
         assert "content" in results[0]
 
+    def test_search_knowledge_base_uses_catalog_index(self):
+        """Test que los productos del catálogo se fusionan con los candidatos vectoriales"""
+        self.db.refresh_catalog_index = Mock(return_value=True)
+        self.db.catalog_index.build([
+            {"id": 1, "sku": "TV-55", "name": "Smart TV 55", "description": "Televisor 4K", "category": "tv", "price": 550},
+        ])
+        self.db.qdrant_client = Mock()
+        self.db.qdrant_client.collection_exists.return_value = False
+
+        results = self.db.search_knowledge_base("televisor")
+
+        assert results[0]["title"] == "Smart TV 55"
+        assert results[0]["price"] == 550.0
+
+    def test_search_knowledge_base_never_fuses_mock(self):
+        """Test que sin colección los mock no se mezclan con productos reales"""
+        self.db.refresh_catalog_index = Mock(return_value=True)
+        self.db.catalog_index.build([
+            {"id": 1, "sku": "LP-01", "name": "Laptop Lenovo T14", "description": "Notebook", "category": "computadoras", "price": 900},
+        ])
+        self.db.qdrant_client = Mock()
+        self.db.qdrant_client.collection_exists.return_value = False
+
+        results = self.db.search_knowledge_base("laptop")
+
+        assert [r["title"] for r in results] == ["Laptop Lenovo T14"]
+
+    def test_search_knowledge_base_mock_only_when_enabled(self):
+        """Test que con KB_MOCK_FALLBACK=false una búsqueda sin resultados queda vacía"""
+        self.db.refresh_catalog_index = Mock(return_value=True)
+        self.db.qdrant_client = Mock()
+        self.db.qdrant_client.collection_exists.return_value = False
+        self.db.kb_mock_fallback = False
+
+        assert self.db.search_knowledge_base("laptop") == []
+
+    def test_search_knowledge_base_sku_route(self):
+        """Test que una query con SKU exacto responde solo desde el índice"""
+        self.db.refresh_catalog_index = Mock(return_value=True)
+        self.db.catalog_index.build([
+            {"id": 1, "sku": "TV-55", "name": "Smart TV 55", "description": "Televisor 4K", "category": "tv", "price": 550},
+        ])
+        self.db.qdrant_client = Mock()
+
+        results = self.db.search_knowledge_base("sku: tv-55")
+
+        assert [r["title"] for r in results] == ["Smart TV 55"]
+        self.db.qdrant_client.collection_exists.assert_not_called()
+
+    def test_search_knowledge_base_vector_path(self):
+        """Test búsqueda vectorial en Qdrant con filtro y mapeo de payload"""
+        db = DatabaseManager(embedder=HashingEmbedder(dim=16))
+        db.qdrant_client = Mock()
+        db.qdrant_client.collection_exists.return_value = True
+        hit = Mock(payload={"title": "iPhone 15 Pro", "content": "Smartphone Apple", "category": "celulares", "price": 999})
+        db.qdrant_client.query_points.return_value = Mock(points=[hit])
+
+        results = db.search_knowledge_base("precio iphone", limit=2)
+
+        assert results == [{"title": "iPhone 15 Pro", "content": "Smartphone Apple", "category": "celulares", "price": 999.0}]
+        kwargs = db.qdrant_client.query_points.call_args.kwargs
+        assert kwargs["collection_name"] == "products"
+        assert kwargs["limit"] == 2
+        assert len(kwargs["query"]) == 16
+        assert kwargs["query_filter"].must[0].key == "language"
+
+    def test_query_embedding_cache(self):
+        """Test que queries repetidas no recalculan el embedding"""
+        embedder = Mock()
+        embedder.embed.return_value = [0.1, 0.2]
+        db = DatabaseManager(embedder=embedder)
+
+        db.embed_query("precio iphone")
+        db.embed_query("  Precio   iPhone ")
+
+        assert embedder.embed.call_count == 1
+        stats = db.embedding_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
     def test_mock_kb_results_filtering(self):
         """Test filtrado de resultados mock"""
         results = self.db._get_mock_kb_results("laptop", 5)
@@ -79,6 +168,90 @@ class TestDatabaseManager:
         laptop_related = [r for r in results if "laptop" in r["title"].lower()]
         assert len(laptop_related) > 0
 
+    def test_save_quote_reuses_pooled_connection(self):
+        """Test que save_quote usa el pool en lugar de reconectar cada vez"""
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        connect = Mock(return_value=conn)
+        self.db.pool._connect = connect
+
+        assert self.db.save_quote("conv-1", {"producto": "Laptop", "price": 10, "quantity": 2}) == True
+        assert self.db.save_quote("conv-1", {"producto": "Laptop", "price": 10, "quantity": 2}) == True
+
+        assert connect.call_count == 1
+        assert conn.commit.call_count == 2
+        assert self.db.pool_stats()["checkouts"] == 2
+
+    def test_save_quote_applies_adaptive_statement_timeout(self):
+        """Test que el timeout que entrega el guard de Postgres llega como statement_timeout"""
+        conn = self._pooled_connection()
+        cur = conn.cursor.return_value.__enter__.return_value
+        self.db.postgres_dependency.timeouts.initial = 0.75
+
+        assert self.db.save_quote("42", {"producto": "Laptop", "price": 10}) == True
+
+        assert cur.execute.call_args_list[0].args == ("SET LOCAL statement_timeout = %s", (750,))
+
+    def _pooled_connection(self):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.db.pool._connect = Mock(return_value=conn)
+        return conn
+
+    def test_quote_params_total_uses_cantidad(self):
+        """Test total = precio x cantidad con la clave que usan las acciones"""
+        params = self.db.quote_params("42", {"producto": "Laptop", "price": 10, "cantidad": 3})
+        assert params[2] == 30
+
+    def test_quote_params_currency_from_price(self):
+        """Test que la moneda del precio aplicado se guarda en la fila (USD si no hay)"""
+        assert self.db.quote_params("42", {"producto": "Laptop", "price": 10, "currency": "UYU"})[3] == "UYU"
+        assert self.db.quote_params("42", {"producto": "Laptop", "price": 10})[3] == "USD"
+
+    def test_quote_params_masks_free_text(self):
+        """Test PII enmascarada en las notas; producto, SKU y datos de contacto sin tocar"""
+        params = self.db.quote_params("42", {"producto": "TV 55 pulgadas 4K 3840 2160", "sku": "1234-5678-9012",
+                                             "notas": "llamar al 099 123 456", "email": "a@b.com",
+                                             "telefono": "099123456", "price": 10})
+        stored = json.loads(params[1])[0]
+        assert stored["notas"] == "llamar al [PHONE]"
+        assert stored["producto"] == "TV 55 pulgadas 4K 3840 2160" and stored["sku"] == "1234-5678-9012"
+        assert stored["email"] == "a@b.com" and stored["telefono"] == "099123456"
+
+    def test_save_quotes_single_transaction(self):
+        """Test que save_quotes inserta el lote en páginas y confirma una sola vez"""
+        conn = self._pooled_connection()
+        quotes = [(str(i), {"producto": f"p{i}", "price": 5, "quantity": 2}) for i in range(5)]
+
+        with patch("actions.psycopg2.extras.execute_values") as execute_values:
+            report = self.db.save_quotes(quotes, page_size=2)
+
+        assert report == {"inserted": 5, "failed": []}
+        assert [len(call.args[2]) for call in execute_values.call_args_list] == [2, 2, 1]
+        assert execute_values.call_args_list[0].args[2][0][2] == 10
+        assert conn.commit.call_count == 1
+
+    def test_save_quotes_reports_failed_rows(self):
+        """Test que una fila inválida se aísla y el resto del lote se guarda"""
+        conn = self._pooled_connection()
+        quotes = [(str(i), {"producto": f"p{i}", "price": 1}) for i in range(8)]
+        quotes[5] = ("bad", {"producto": "p5", "price": 1})
+        quotes[2] = ("2", {"producto": "p2", "price": None})  # falla al calcular el total
+
+        def execute_values(cur, sql, rows, template=None, page_size=None):
+            if any(row[0] == "bad" for row in rows):
+                raise psycopg2.DataError("invalid input syntax for type bigint")
+
+        with patch("actions.psycopg2.extras.execute_values", side_effect=execute_values):
+            report = self.db.save_quotes(quotes)
+
+        assert report["inserted"] == 6
+        assert [failure["index"] for failure in report["failed"]] == [2, 5]
+        assert "bigint" in report["failed"][1]["error"]
+        assert conn.commit.call_count == 1
+
 class TestActionValidation:
     """Pruebas para validaciones de actions"""
 
@@ -93,6 +266,130 @@ class TestActionValidation:
         long_input = "a" * 501
         assert db.validate_input(long_input, "text") == False
 
+    def test_register_quote_accepts_float_quantity_slot(self):
+        """Test que la cantidad 2.0 (slot float de Rasa) no se re-pregunta"""
+        from rasa_sdk import Tracker
+        from rasa_sdk.executor import CollectingDispatcher
+
+        slots = {"producto": "Laptop", "cantidad": 2.0, "email": "a@b.com", "telefono": "099123456"}
+        tracker = Tracker("42", slots, {"text": "cotizar"}, [], False, None, {}, None)
+        dispatcher = CollectingDispatcher()
+
+        assert ActionRegisterQuote()._validate_slots(dispatcher, tracker) is None
+        assert dispatcher.messages == []
+
+    def test_google_sheets_row_is_enqueued(self):
+        """Test que la cotización se encola para Sheets en lugar de un POST en el turno"""
+        writer = Mock()
+        quote = {"timestamp": "2026-01-01T00:00:00", "producto": "Laptop", "sku": None, "cantidad": 2, "email": "a@b.com"}
+
+        with patch("actions.get_sheets_writer", return_value=writer), patch("requests.post") as post:
+            ActionRegisterQuote()._save_to_google_sheets(quote)
+
+        writer.enqueue.assert_called_once_with(["2026-01-01T00:00:00", "", "Laptop", None, 2, "a@b.com"])
+        post.assert_not_called()
+
+    def test_business_hours_and_greeting_use_schedule(self):
+        """Test que horario y saludo salen del calendario cacheado (hora local de BUSINESS_TIMEZONE)"""
+        from datetime import datetime
+        from rasa_sdk import Tracker
+        from rasa_sdk.executor import CollectingDispatcher
+        from responses import BusinessSchedule, parse_hours
+
+        saturday = datetime(2026, 10, 17, 11, 0).timestamp()
+        schedule = BusinessSchedule(parse_hours("mon-fri 09:00-18:00"), timezone=None, clock=lambda: saturday)
+        tracker = Tracker("42", {}, {"text": "hola"}, [], False, None, {}, None)
+        dispatcher = CollectingDispatcher()
+
+        with patch("actions.business_schedule", schedule):
+            events = actions.ActionCheckBusinessHours().run(dispatcher, tracker, {})
+            actions.ActionGreet().run(dispatcher, tracker, {})
+
+        assert events[0]["value"] is False
+        assert "de lunes a viernes de 9:00 a 18:00" in dispatcher.messages[0]["text"]
+        assert dispatcher.messages[1]["text"].startswith("¡Buenos días! Soy el asistente de AUTO-ATC.")
+
+
+class TestShownResults:
+    """Pruebas para el cache de resultados mostrados por conversación"""
+
+    RESULTS = [
+        {"title": "Laptop Dell XPS 13", "content": "i7", "category": "computadoras", "price": 1299.0, "sku": "DELL-XPS13"},
+        {"title": "Laptop Lenovo ThinkPad", "content": "i5", "category": "computadoras", "price": 899.0, "sku": "LEN-T14"},
+    ]
+
+    def make_tracker(self, sender_id, producto, search_results=None):
+        from rasa_sdk import Tracker
+        slots = {"producto": producto, "cantidad": 2, "email": "a@b.com", "telefono": "099123456",
+                 "search_results": search_results}
+        return Tracker(sender_id, slots, {"text": "cotizar"}, [], False, None, {}, None)
+
+    def test_match_shown_result(self):
+        """Test match por SKU, número de la lista, título y coincidencia parcial única"""
+        assert match_shown_result(self.RESULTS, "lo que sea", sku="len-t14")["price"] == 899.0
+        assert match_shown_result(self.RESULTS, "2")["sku"] == "LEN-T14"
+        assert match_shown_result(self.RESULTS, "laptop  dell xps 13")["sku"] == "DELL-XPS13"
+        assert match_shown_result(self.RESULTS, "thinkpad")["sku"] == "LEN-T14"
+        assert match_shown_result(self.RESULTS, "laptop") is None  # ambiguo
+        assert match_shown_result(self.RESULTS, "5") is None
+        assert match_shown_result([], "laptop") is None
+
+    def test_quote_uses_shown_results_without_kb_search(self):
+        """Test que la cotización toma el precio de lo mostrado sin volver a la KB"""
+        from rasa_sdk.executor import CollectingDispatcher
+        with patch.object(actions.db_manager, "search_knowledge_base", return_value=self.RESULTS):
+            ActionSearchProduct().run(CollectingDispatcher(), self.make_tracker("shown-1", None), {})
+
+        with patch.object(actions.db_manager, "search_knowledge_base") as search, \
+                patch.object(actions.db_manager, "save_quote", return_value=True) as save, \
+                patch.object(ActionRegisterQuote, "_save_to_google_sheets"):
+            ActionRegisterQuote().run(CollectingDispatcher(), self.make_tracker("shown-1", "thinkpad"), {})
+
+        search.assert_not_called()
+        quote_data = save.call_args.args[1]
+        assert quote_data["price"] == 899.0
+        assert quote_data["sku"] == "LEN-T14"
+
+    def test_quote_falls_back_to_slot_then_search(self):
+        """Test slot search_results tras un reinicio y búsqueda en la KB si no hay match"""
+        from rasa_sdk.executor import CollectingDispatcher
+        db = DatabaseManager()
+
+        with patch.object(actions, "record_cache") as record_cache:
+            assert db.resolve_shown_product("shown-2", "2", shown=self.RESULTS)["sku"] == "LEN-T14"
+            assert db.resolve_shown_product("shown-2", "iphone") is None
+        assert [c.args for c in record_cache.call_args_list] == [("shown_results", True), ("shown_results", False)]
+
+        kb = [{"title": "iPhone 15 Pro", "content": "Apple", "category": "celulares", "price": 999.0}]
+        with patch.object(actions.db_manager, "search_knowledge_base", return_value=kb) as search, \
+                patch.object(actions.db_manager, "save_quote", return_value=True) as save, \
+                patch.object(ActionRegisterQuote, "_save_to_google_sheets"):
+            ActionRegisterQuote().run(CollectingDispatcher(), self.make_tracker("shown-3", "iphone"), {})
+
+        search.assert_called_once_with("iphone", limit=1)
+        assert save.call_args.args[1]["price"] == 999.0
+
+    def test_quote_price_and_stock_from_catalog_snapshot(self):
+        """Test que el precio y stock salen del snapshot de products y no del texto de la KB"""
+        from rasa_sdk.executor import CollectingDispatcher
+        snapshot = actions.CatalogSnapshot()
+        snapshot.apply('{"op": "INSERT", "id": 7, "sku": "LEN-T14", "name": "Laptop Lenovo ThinkPad T14", '
+                       '"price": 849.5, "currency": "USD", "stock_quantity": 3, "is_active": true}')
+        snapshot.loaded.set()
+
+        with patch.object(actions.db_manager, "catalog_snapshot", snapshot), \
+                patch.object(actions.db_manager, "catalog_snapshot_enabled", True), \
+                patch.object(actions.db_manager, "search_knowledge_base", return_value=self.RESULTS[1:]), \
+                patch.object(actions.db_manager, "save_quote", return_value=True) as save, \
+                patch.object(ActionRegisterQuote, "_save_to_google_sheets"):
+            ActionRegisterQuote().run(CollectingDispatcher(), self.make_tracker("snapshot-1", "thinkpad"), {})
+
+        quote_data = save.call_args.args[1]
+        assert quote_data["price"] == 849.5
+        assert quote_data["stock"] == 3
+        assert quote_data["sku"] == "LEN-T14"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
 
@@ -0,0 +1,164 @@
+# AUTO-ATC Playbook v3 - Tests para las acciones async
+# Pruebas unitarias de actions_async.py (sin Postgres, Qdrant ni Sheets reales)
+
+import pytest
+import sys
+import os
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import threading
+import actions_async
+from actions import DatabaseManager
+from actions_async import AsyncActionRegisterQuote, AsyncActionSearchProduct, AsyncDatabaseManager
+from resilience import CircuitOpenError
+from shared_cache import SharedTTLCache
+from rasa_sdk import Tracker
+from rasa_sdk.events import SlotSet
+from rasa_sdk.executor import ActionExecutor, CollectingDispatcher
+from unittest.mock import AsyncMock, Mock, patch
+
+
+def make_tracker(text="", slots=None, sender_id="42"):
+    return Tracker(sender_id, slots or {}, {"text": text}, [], False, None, {}, None)
+
+
+class FakeAsyncPool:
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, sql, *params, timeout=None):
+        self.calls.append((sql, params))
+        self.timeout = timeout
+
+
+class TestAsyncDatabaseManager:
+    """Pruebas para AsyncDatabaseManager"""
+
+    def setup_method(self):
+        self.db = DatabaseManager()
+        self.db.catalog_index_enabled = False
+        self.manager = AsyncDatabaseManager(self.db)
+
+    def test_save_quote_uses_async_pool(self):
+        """Test que save_quote usa el pool asyncpg con los mismos valores que la variante sync"""
+        pool = FakeAsyncPool()
+        self.manager.get_pg_pool = AsyncMock(return_value=pool)
+
+        ok = asyncio.run(self.manager.save_quote("42", {"producto": "Laptop", "price": 10, "quantity": 3}))
+
+        assert ok == True
+        sql, params = pool.calls[0]
+        assert "INSERT INTO quotes" in sql
+        assert params[0] == "42"
+        assert params[2] == 30
+
+    def test_save_quote_guarded_by_postgres_dependency(self):
+        """Test que el insert async pasa por el breaker y usa el timeout adaptativo"""
+        pool = FakeAsyncPool()
+        self.manager.get_pg_pool = AsyncMock(return_value=pool)
+        self.db.postgres_dependency.timeouts.initial = 0.75
+
+        assert asyncio.run(self.manager.save_quote("42", {"producto": "Laptop"})) == True
+        assert pool.timeout == 0.75
+
+        self.db.postgres_dependency.guard = Mock(side_effect=CircuitOpenError("postgres circuit is open"))
+        assert asyncio.run(self.manager.save_quote("42", {"producto": "Laptop"})) == False
+        assert len(pool.calls) == 1
+
+    def test_shared_cache_calls_leave_event_loop(self):
+        """Test que los get/put del cache compartido (IPC) corren fuera del hilo del loop"""
+        threads = []
+        cache = Mock(spec=SharedTTLCache)
+        cache.get.side_effect = lambda key: threads.append(threading.current_thread()) or [0.1, 0.2]
+        self.db.embedding_cache = cache
+
+        assert asyncio.run(self.manager.embed_query("iphone")) == [0.1, 0.2]
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_save_quote_falls_back_to_thread_without_asyncpg(self):
+        """Test que sin asyncpg se usa el pool psycopg2 en un hilo"""
+        self.db.save_quote = Mock(return_value=True)
+
+        with patch.object(actions_async, "asyncpg", None):
+            ok = asyncio.run(self.manager.save_quote("42", {"producto": "Laptop"}))
+
+        assert ok == True
+        self.db.save_quote.assert_called_once_with("42", {"producto": "Laptop"})
+
+    def test_search_uses_async_qdrant(self):
+        """Test búsqueda vectorial con el cliente async de Qdrant"""
+        qdrant = Mock()
+        qdrant.collection_exists = AsyncMock(return_value=True)
+        hit = Mock(payload={"title": "iPhone 15 Pro", "content": "Apple", "category": "celulares", "price": 999})
+        qdrant.query_points = AsyncMock(return_value=Mock(points=[hit]))
+        self.manager._qdrant = qdrant
+
+        results = asyncio.run(self.manager.search_knowledge_base("iphone", limit=1))
+
+        assert results[0]["title"] == "iPhone 15 Pro"
+        assert qdrant.query_points.call_args.kwargs["limit"] == 1
+
+    def test_search_errors_return_empty(self):
+        """Test que un error en Qdrant devuelve lista vacía"""
+        qdrant = Mock()
+        qdrant.collection_exists = AsyncMock(side_effect=Exception("timeout"))
+        self.manager._qdrant = qdrant
+
+        assert asyncio.run(self.manager.search_knowledge_base("iphone")) == []
+
+
+class TestAsyncActions:
+    """Pruebas para las acciones async"""
+
+    def test_search_product(self):
+        """Test búsqueda de producto async"""
+        results = [{"title": "iPhone 15 Pro", "content": "Apple", "category": "celulares", "price": 999.0}]
+        dispatcher = CollectingDispatcher()
+
+        with patch.object(actions_async.async_db_manager, "search_knowledge_base", AsyncMock(return_value=results)):
+            events = asyncio.run(AsyncActionSearchProduct().run(dispatcher, make_tracker("iphone"), {}))
+
+        assert events == [SlotSet("search_results", results)]
+        assert "iPhone 15 Pro" in dispatcher.messages[0]["text"]
+
+    def test_register_quote(self):
+        """Test registro de cotización async con precio de la KB"""
+        dispatcher = CollectingDispatcher()
+        tracker = make_tracker(slots={"producto": "iPhone", "cantidad": None, "email": "a@b.com"})
+        kb = [{"title": "iPhone 15 Pro", "content": "", "category": "celulares", "price": 999.0}]
+        manager = actions_async.async_db_manager
+
+        with patch.object(manager, "search_knowledge_base", AsyncMock(return_value=kb)), \
+                patch.object(manager, "save_quote", AsyncMock(return_value=True)) as save, \
+                patch.object(AsyncActionRegisterQuote, "_save_to_google_sheets") as sheets:
+            events = asyncio.run(AsyncActionRegisterQuote().run(dispatcher, tracker, {}))
+
+        conversation_id, quote = save.call_args[0]
+        assert conversation_id == "42"
+        assert quote["price"] == 999.0
+        sheets.assert_called_once_with(quote)
+        assert "Registré tu cotización para iPhone" in dispatcher.messages[0]["text"]
+        assert SlotSet("producto", None) in events
+
+    def test_async_module_overrides_registered_actions(self):
+        """Test que --actions actions_async registra las variantes async"""
+        executor = ActionExecutor()
+        executor.register_package("actions_async")
+
+        assert asyncio.iscoroutinefunction(executor.actions["action_search_product"])
+        assert asyncio.iscoroutinefunction(executor.actions["action_register_quote"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-actions-async-v1
+# version: 3.1.0
+# file: tests/test_actions_async.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
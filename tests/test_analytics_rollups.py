@@ -0,0 +1,221 @@
+# AUTO-ATC Playbook v3 - Tests para los rollups de analítica
+# Pruebas de analytics_rollups.py: histogramas y cuantiles, avance de la marca de agua
+# por lotes con una base falsa, selección de tabla de las consultas y definiciones SQL
+
+import pytest
+import sys
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from analytics_rollups import (
+    HISTOGRAM_BOUNDS, SOURCES, AnalyticsQueries, RollupEngine, histogram_cell, histogram_quantile,
+)
+from metrics import MetricsRegistry
+from unittest.mock import MagicMock
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def histogram_of(values):
+    histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    for value in values:
+        histogram[histogram_cell(value)] += 1
+    return histogram
+
+
+class FakeWarehouse:
+    """Tablas crudas (solo ids y si la fila ya está asentada) y rollup_watermarks en memoria"""
+
+    def __init__(self, rows):
+        self.rows = rows  # fuente -> [(id, asentada)]
+        self.watermarks = {}
+        self.locked_by_other = set()
+        self.aggregated = []
+        self.fail_source = None
+        self.commits = self.rollbacks = 0
+
+    def get_connection(self):
+        state = {"result": None, "source": None}
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda sql, params=None: self._execute(state, sql, params)
+        cursor.fetchone.side_effect = lambda: state["result"]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+        conn.commit.side_effect = lambda: setattr(self, "commits", self.commits + 1)
+        conn.rollback.side_effect = lambda: setattr(self, "rollbacks", self.rollbacks + 1)
+
+        @contextmanager
+        def get_connection():
+            yield conn
+        return get_connection
+
+    def _execute(self, state, sql, params):
+        if sql.startswith("INSERT INTO rollup_watermarks"):
+            self.watermarks.setdefault(params[0], 0)
+        elif "FOR UPDATE SKIP LOCKED" in sql:
+            name = params[0]
+            state["source"] = name
+            state["result"] = None if name in self.locked_by_other else (self.watermarks[name],)
+        elif "ORDER BY id" in sql:
+            pending = [row_id for row_id, settled in self.rows[state["source"]]
+                       if row_id > params["last_id"] and settled][:params["limit"]]
+            state["result"] = (max(pending) if pending else None, len(pending))
+        elif sql.lstrip().startswith("UPDATE rollup_watermarks"):
+            upper_id, _rows, name = params
+            self.watermarks[name] = upper_id
+        else:
+            if state["source"] == self.fail_source:
+                raise RuntimeError("deadlock detected")
+            self.aggregated.append((state["source"], params["last_id"], params["upper_id"]))
+
+
+class TestHistogram:
+    """Pruebas de histogramas y cuantiles"""
+
+    def test_cells_follow_width_bucket(self):
+        """Test que las celdas coinciden con width_bucket (borde inferior incluido)"""
+        assert histogram_cell(0.3) == 0
+        assert histogram_cell(1) == 1
+        assert histogram_cell(4.99) == 2 and histogram_cell(5) == 3
+        assert histogram_cell(10 ** 9) == len(HISTOGRAM_BOUNDS)
+
+    def test_quantiles_close_to_exact(self):
+        """Test que p50/p95 del histograma quedan dentro del bucket del valor exacto"""
+        values = [i * 0.37 for i in range(1, 5001)]  # 0.37 .. 1850 ms
+        histogram = histogram_of(values)
+        for q in (0.5, 0.95):
+            exact = sorted(values)[int(q * len(values)) - 1]
+            estimate = histogram_quantile(histogram, q, min(values), max(values))
+            cell = histogram_cell(exact)
+            lower = HISTOGRAM_BOUNDS[cell - 1] if cell else 0
+            upper = HISTOGRAM_BOUNDS[cell] if cell < len(HISTOGRAM_BOUNDS) else max(values)
+            assert lower <= estimate <= upper
+        assert histogram_quantile(histogram, 1.0, min(values), max(values)) == pytest.approx(max(values))
+        assert histogram_quantile([0] * 17, 0.5) is None
+
+    def test_quantile_clamped_to_observed_range(self):
+        """Test que un único valor da ese valor en todos los cuantiles"""
+        histogram = histogram_of([42.0] * 10)
+        assert histogram_quantile(histogram, 0.5, 42.0, 42.0) == 42.0
+
+
+class TestRollupEngine:
+    """Pruebas del refresco incremental"""
+
+    def make(self, warehouse, **kwargs):
+        return RollupEngine(warehouse.get_connection(), registry=MetricsRegistry(), **kwargs)
+
+    def test_processes_settled_rows_in_batches_from_watermark(self):
+        """Test que cada lote arranca en la marca de agua, respeta el tamaño y omite filas sin asentar"""
+        warehouse = FakeWarehouse({
+            "metrics": [(i, True) for i in range(1, 251)] + [(251, False)],
+            "quotes": [(i, True) for i in range(1, 11)],
+            "interactions": [],
+        })
+        engine = self.make(warehouse, batch_rows=100)
+
+        report = engine.refresh()
+        assert report["sources"]["metrics"] == {"rows": 250, "batches": 3}
+        assert report["sources"]["quotes"] == {"rows": 10, "batches": 1}
+        assert report["sources"]["interactions"] == {"rows": 0, "batches": 0}
+        assert [a for a in warehouse.aggregated if a[0] == "metrics"] == [
+            ("metrics", 0, 100), ("metrics", 100, 200), ("metrics", 200, 250)]
+        assert warehouse.watermarks == {"metrics": 250, "quotes": 10, "interactions": 0}
+
+        # Segundo refresco: solo la fila que se asentó
+        warehouse.rows["metrics"][-1] = (251, True)
+        warehouse.aggregated.clear()
+        assert engine.refresh()["rows"] == 1
+        assert warehouse.aggregated == [("metrics", 250, 251)]
+        assert engine.stats()["rows"] == 261
+
+    def test_max_batches_per_refresh(self):
+        """Test que un refresco procesa como mucho max_batches lotes por fuente"""
+        warehouse = FakeWarehouse({"metrics": [(i, True) for i in range(1, 1001)], "quotes": [], "interactions": []})
+        engine = self.make(warehouse, batch_rows=100, max_batches=2)
+        assert engine.refresh(["metrics"])["sources"]["metrics"] == {"rows": 200, "batches": 2}
+        assert warehouse.watermarks["metrics"] == 200
+
+    def test_skips_source_locked_by_other_instance(self):
+        """Test que con la marca de agua tomada por otra instancia la fuente se saltea"""
+        warehouse = FakeWarehouse({"metrics": [(1, True)], "quotes": [(1, True)], "interactions": []})
+        warehouse.locked_by_other.add("quotes")
+        engine = self.make(warehouse)
+        report = engine.refresh()
+        assert "skipped" in report["sources"]["quotes"] and report["sources"]["metrics"]["rows"] == 1
+        assert all(source != "quotes" for source, _, _ in warehouse.aggregated)
+        assert engine.stats()["skipped"] == 1
+
+    def test_failed_batch_keeps_watermark(self):
+        """Test que un lote que falla no avanza la marca de agua ni frena las otras fuentes"""
+        warehouse = FakeWarehouse({"metrics": [(1, True)], "quotes": [(1, True)], "interactions": []})
+        warehouse.fail_source = "metrics"
+        engine = self.make(warehouse)
+        report = engine.refresh()
+        assert report["sources"]["metrics"] == {"error": "deadlock detected"}
+        assert warehouse.watermarks["metrics"] == 0 and warehouse.watermarks["quotes"] == 1
+        assert warehouse.rollbacks >= 1 and engine.stats()["errors"] == 1
+
+
+class TestAnalyticsQueries:
+    """Pruebas de la API de consultas"""
+
+    def test_daily_table_only_for_whole_days(self):
+        """Test que los rangos de días completos van a la tabla diaria"""
+        assert AnalyticsQueries.metrics_table(date(2026, 10, 1), date(2026, 10, 8)) == "metrics_rollup_daily"
+        assert AnalyticsQueries.metrics_table(datetime(2026, 10, 1, 6), date(2026, 10, 8)) == "metrics_rollup_hourly"
+
+    def test_metric_by_action_reads_rollups(self):
+        """Test del resumen por acción: promedio y cuantiles desde el histograma sumado"""
+        cursor = MagicMock()
+        histogram = histogram_of([10.0] * 90 + [300.0] * 10)
+        cursor.fetchall.return_value = [("action_search_product", 100, 3900.0, 10.0, 300.0, histogram)]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        @contextmanager
+        def get_connection():
+            yield conn
+
+        [row] = AnalyticsQueries(get_connection).metric_by_action("action_latency_avg", date(2026, 10, 1),
+                                                                  date(2026, 10, 8))
+        sql, params = cursor.execute.call_args.args
+        assert "FROM metrics_rollup_daily" in sql and "performance_metrics" not in sql
+        assert params["step"] == "run"
+        assert row["avg"] == 39.0 and 10 <= row["p50"] <= 20 and 200 <= row["p95"] <= 300
+
+
+class TestSchema:
+    """Pruebas de las definiciones SQL"""
+
+    def test_schema_and_migration_define_rollup_objects(self):
+        """Test que schema.sql y la migración crean las tablas y funciones que usa el módulo"""
+        schema = open(os.path.join(ROOT, 'db', 'schema.sql')).read()
+        migration = open(os.path.join(ROOT, 'db', 'migrations', '003_analytics_rollups.sql')).read()
+        tables = {table for source in SOURCES for table in source.rollup_tables} | {"rollup_watermarks"}
+        for sql in (schema, migration):
+            for table in tables:
+                assert f"CREATE TABLE IF NOT EXISTS {table}" in sql
+            for function in ("rollup_histogram_step", "rollup_histogram_merge"):
+                assert f"CREATE OR REPLACE FUNCTION {function}" in sql
+            for aggregate in ("rollup_histogram", "rollup_histogram_sum"):
+                assert f"CREATE OR REPLACE AGGREGATE {aggregate}(" in sql
+        used = set(re.findall(r"\b(rollup_histogram\w*)\(", " ".join(source.sql for source in SOURCES)))
+        assert used <= {"rollup_histogram", "rollup_histogram_merge", "rollup_histogram_sum"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-analytics-rollups-v1
+# version: 3.1.0
+# file: tests/test_analytics_rollups.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
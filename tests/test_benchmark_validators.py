@@ -0,0 +1,84 @@
+# AUTO-ATC Playbook v3 - Micro-benchmarks de validación de input
+# Guardan contra regresiones del camino caliente (cada mensaje y cada slot)
+#
+#   python -m pytest tests/test_benchmark_validators.py --benchmark-autosave
+#   python -m pytest tests/test_benchmark_validators.py --benchmark-compare --benchmark-compare-fail=mean:20%
+
+import re
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+pytest.importorskip("pytest_benchmark")
+
+from actions import DatabaseManager
+from validators import validate, validate_slots
+
+SLOTS = {"producto": "Laptop Dell XPS 13", "cantidad": 2.0, "email": "cliente@example.com", "telefono": "+598 99 123 456"}
+MESSAGE = "Hola, quiero cotizar 3 laptops Dell para la oficina"
+
+
+def legacy_validate_input(input_text, input_type="text"):
+    """Implementación anterior de DatabaseManager.validate_input (referencia de comparación)"""
+    if not input_text or len(input_text.strip()) == 0:
+        return False
+    input_text = input_text.strip()
+    if input_type == "email":
+        return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', input_text))
+    elif input_type == "phone":
+        return bool(re.match(r'^[\+]?[0-9\s\-\(\)]{8,20}$', input_text))
+    elif input_type == "quantity":
+        try:
+            return 1 <= int(input_text) <= 1000
+        except ValueError:
+            return False
+    else:
+        return len(input_text) <= 500 and not re.search(r'[<>]', input_text)
+
+
+@pytest.mark.benchmark(group="message")
+class TestMessageValidationBenchmark:
+    """Benchmarks de validación de un mensaje de texto"""
+
+    def test_validate_message(self, benchmark):
+        assert benchmark(validate, MESSAGE) == True
+
+    def test_validate_message_via_manager(self, benchmark):
+        db = DatabaseManager()
+        assert benchmark(db.validate_input, MESSAGE) == True
+
+    def test_legacy_validate_message(self, benchmark):
+        assert benchmark(legacy_validate_input, MESSAGE) == True
+
+
+@pytest.mark.benchmark(group="slots")
+class TestSlotValidationBenchmark:
+    """Benchmarks de validación de todos los slots de una cotización"""
+
+    def test_validate_slots_batch(self, benchmark):
+        assert benchmark(validate_slots, SLOTS) == []
+
+    def test_legacy_validate_slots(self, benchmark):
+        def legacy():
+            return [
+                legacy_validate_input(SLOTS["producto"]),
+                legacy_validate_input(str(int(SLOTS["cantidad"])), "quantity"),
+                legacy_validate_input(SLOTS["email"], "email"),
+                legacy_validate_input(SLOTS["telefono"], "phone"),
+            ]
+        assert all(benchmark(legacy))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-benchmark-validators-v1
+# version: 3.1.0
+# file: tests/test_benchmark_validators.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
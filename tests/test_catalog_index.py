@@ -0,0 +1,123 @@
+# AUTO-ATC Playbook v3 - Tests para el índice del catálogo
+# Pruebas unitarias de catalog_index.py
+
+import pytest
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from catalog_index import CatalogIndex, tokenize
+from unittest.mock import MagicMock
+
+PRODUCTS = [
+    {"id": 1, "sku": "DELL-XPS13", "name": "Laptop Dell XPS 13", "description": "Procesador Intel i7, 16GB RAM",
+     "category": "computadoras", "price": 1299, "is_active": True, "updated_at": datetime(2026, 1, 1)},
+    {"id": 2, "sku": "IPH15PRO", "name": "iPhone 15 Pro", "description": "Cámara avanzada, procesador A17",
+     "category": "celulares", "price": 999, "is_active": True, "updated_at": datetime(2026, 1, 2)},
+    {"id": 3, "sku": "SONY-XM5", "name": "Auriculares Sony WH-1000XM5", "description": "Cancelación de ruido",
+     "category": "audio", "price": 349, "is_active": True, "updated_at": datetime(2026, 1, 3)},
+]
+
+
+def fake_connection(rows):
+    """Conexión falsa cuyo cursor devuelve `rows`"""
+    columns = list(rows[0].keys()) if rows else ["id"]
+    cursor = MagicMock()
+    cursor.description = [(c,) for c in columns]
+    cursor.fetchall.return_value = [tuple(r[c] for c in columns) for r in rows]
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return conn, cursor
+
+
+class TestTokenize:
+    """Pruebas de tokenización"""
+
+    def test_accents_and_stopwords(self):
+        """Test plegado de tildes y eliminación de palabras vacías"""
+        assert tokenize("Cámara para el Teléfono") == ["camara", "telefono"]
+
+
+class TestCatalogIndex:
+    """Pruebas para CatalogIndex"""
+
+    def setup_method(self):
+        self.index = CatalogIndex()
+        self.index.build(PRODUCTS)
+
+    def test_exact_match(self):
+        """Test búsqueda exacta por nombre"""
+        results = self.index.search("iphone")
+        assert results[0]["title"] == "iPhone 15 Pro"
+        assert results[0]["price"] == 999.0
+        assert results[0]["sku"] == "IPH15PRO"
+
+    def test_prefix_and_accent_folding(self):
+        """Test coincidencia por prefijo y sin tildes"""
+        assert self.index.search("auricu")[0]["title"] == "Auriculares Sony WH-1000XM5"
+        assert self.index.search("camara")[0]["title"] == "iPhone 15 Pro"
+
+    def test_name_ranks_above_description(self):
+        """Test que el nombre pesa más que la descripción"""
+        self.index.upsert({"id": 4, "name": "Funda genérica", "description": "Compatible con iPhone",
+                           "category": "accesorios", "price": 10})
+        results = self.index.search("iphone", limit=5)
+        assert [r["title"] for r in results] == ["iPhone 15 Pro", "Funda genérica"]
+
+    def test_multi_token_query_prefers_full_coverage(self):
+        """Test que gana el producto que cubre más tokens"""
+        results = self.index.search("precio laptop dell", limit=3)
+        assert results[0]["title"] == "Laptop Dell XPS 13"
+
+    def test_complete_only_requires_every_token(self):
+        """Test que complete_only no cae a coincidencias parciales"""
+        assert [r["title"] for r in self.index.search("laptop del", complete_only=True)] == ["Laptop Dell XPS 13"]
+        assert self.index.search("precio laptop dell", complete_only=True) == []
+        assert self.index.search("precio laptop dell")[0]["title"] == "Laptop Dell XPS 13"
+
+    def test_update_and_deactivate(self):
+        """Test actualización incremental y baja de productos"""
+        self.index.upsert(dict(PRODUCTS[1], name="iPhone 16 Pro", price=1099))
+        assert self.index.search("iphone")[0]["price"] == 1099.0
+        assert self.index.search("16")[0]["title"] == "iPhone 16 Pro"
+
+        self.index.upsert(dict(PRODUCTS[1], is_active=False))
+        assert self.index.search("iphone") == []
+        assert len(self.index) == 2
+
+    def test_no_match(self):
+        """Test búsqueda sin resultados"""
+        assert self.index.search("heladera") == []
+        assert self.index.search("") == []
+
+    def test_load_and_incremental_refresh(self):
+        """Test carga completa y refresco por updated_at"""
+        index = CatalogIndex()
+        conn, _ = fake_connection(PRODUCTS)
+        assert index.refresh(conn) == 3
+        assert index.watermark == datetime(2026, 1, 3)
+
+        changed = dict(PRODUCTS[0], price=1199, updated_at=datetime(2026, 2, 1))
+        conn, cursor = fake_connection([changed])
+        assert index.refresh(conn) == 1
+
+        sql, params = cursor.execute.call_args[0]
+        assert "updated_at >= %s" in sql
+        assert params == (datetime(2026, 1, 3),)
+        assert index.watermark == datetime(2026, 2, 1)
+        assert index.search("dell")[0]["price"] == 1199.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-catalog-index-v1
+# version: 3.1.0
+# file: tests/test_catalog_index.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,112 @@
+# AUTO-ATC Playbook v3 - Tests para el snapshot de precios del catálogo
+# Pruebas unitarias de catalog_snapshot.py
+
+import pytest
+import sys
+import os
+import json
+from decimal import Decimal
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import catalog_snapshot
+from catalog_snapshot import CatalogSnapshot, SnapshotListener
+from unittest.mock import MagicMock, patch
+
+ROWS = [
+    (1, "DELL-XPS13", "Laptop Dell XPS 13", Decimal("1299.00"), "USD", 5),
+    (2, "IPH15PRO", "iPhone 15 Pro", Decimal("999.00"), "USD", 0),
+    (3, None, "Cámara Réflex", None, None, None),
+]
+
+
+def fake_connection(rows):
+    """Conexión falsa cuyo cursor devuelve `rows`"""
+    cursor = MagicMock()
+    cursor.fetchall.return_value = rows
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return conn
+
+
+def notification(**change):
+    change.setdefault("op", "UPDATE")
+    return json.dumps(change)
+
+
+class TestCatalogSnapshot:
+    """Pruebas del snapshot en memoria"""
+
+    def setup_method(self):
+        self.snapshot = CatalogSnapshot()
+        assert self.snapshot.load(fake_connection(ROWS)) == 3
+
+    def test_lookup_by_sku_and_name(self):
+        """Test búsqueda por SKU sin distinguir mayúsculas y por nombre sin tildes"""
+        entry = self.snapshot.lookup(sku="dell-xps13")
+        assert entry.price == 1299.0 and entry.stock == 5 and entry.currency == "USD"
+        assert self.snapshot.lookup(sku="N/A", name="iphone  15 PRO").sku == "IPH15PRO"
+        assert self.snapshot.lookup(name="camara reflex").price == 0.0
+        assert self.snapshot.lookup(sku="NOPE", name="heladera") is None
+        assert self.snapshot.loaded.is_set()
+
+    def test_apply_update_insert_and_delete(self):
+        """Test notificaciones de cambio de precio, alta, baja e inactivación"""
+        self.snapshot.apply(notification(id=1, sku="DELL-XPS13-2", name="Laptop Dell XPS 13", price=1199.5,
+                                         currency="USD", stock_quantity=2, is_active=True))
+        assert self.snapshot.lookup(sku="DELL-XPS13") is None
+        assert self.snapshot.lookup(name="laptop dell xps 13").price == 1199.5
+
+        self.snapshot.apply(notification(op="INSERT", id=4, sku="SONY-XM5", name="Auriculares Sony",
+                                         price=349, currency="USD", stock_quantity=10, is_active=True))
+        assert self.snapshot.lookup(sku="sony-xm5").stock == 10
+
+        self.snapshot.apply(notification(id=2, sku="IPH15PRO", name="iPhone 15 Pro", is_active=False))
+        self.snapshot.apply(notification(op="DELETE", id=4, sku="SONY-XM5", name="Auriculares Sony"))
+        assert self.snapshot.lookup(sku="IPH15PRO") is None
+        assert self.snapshot.lookup(name="auriculares sony") is None
+        assert self.snapshot.stats() == {"products": 2, "loaded": True, "notifications": 4}
+
+    def test_invalid_payload(self):
+        """Test payload sin id"""
+        with pytest.raises(KeyError):
+            self.snapshot.apply(json.dumps({"op": "UPDATE"}))
+        assert len(self.snapshot) == 3
+
+
+class TestSnapshotListener:
+    """Pruebas del hilo LISTEN/NOTIFY"""
+
+    def test_listen_load_and_apply(self):
+        """Test LISTEN antes de la carga y aplicación de notificaciones"""
+        snapshot = CatalogSnapshot()
+        conn = fake_connection(ROWS)
+        listener = SnapshotListener(snapshot, "postgresql://test", connect=lambda dsn: conn)
+
+        def poll():
+            conn.notifies = [MagicMock(payload=notification(id=1, sku="DELL-XPS13", name="Laptop Dell XPS 13",
+                                                            price=1099, currency="USD", stock_quantity=1))]
+            listener._stop.set()
+
+        conn.poll.side_effect = poll
+        conn.notifies = []
+        with patch.object(catalog_snapshot.select, "select", return_value=([conn], [], [])):
+            listener._run()
+
+        cursor = conn.cursor.return_value.__enter__.return_value
+        assert cursor.execute.call_args_list[0].args == ("LISTEN catalog_changes",)
+        assert snapshot.lookup(sku="DELL-XPS13").price == 1099.0
+        conn.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-catalog-snapshot-v1
+# version: 3.1.0
+# file: tests/test_catalog_snapshot.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
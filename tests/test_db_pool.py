@@ -0,0 +1,202 @@
+# AUTO-ATC Playbook v3 - Tests para el pool de conexiones
+# Pruebas unitarias de db_pool.py con conexiones falsas (sin PostgreSQL)
+
+import pytest
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import psycopg2.extensions
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise Exception("server closed the connection unexpectedly")
+        self.conn.executed.append(sql)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.executed = []
+        self.rollbacks = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnector:
+    def __init__(self):
+        self.created = []
+
+    def __call__(self, dsn):
+        conn = FakeConnection()
+        self.created.append(conn)
+        return conn
+
+
+class TestConnectionPool:
+    """Pruebas para ConnectionPool"""
+
+    def setup_method(self):
+        self.connector = FakeConnector()
+
+    def make_pool(self, **kwargs):
+        return ConnectionPool("postgresql://test", connect=self.connector, **kwargs)
+
+    def test_connection_is_reused(self):
+        """Test que una conexión devuelta se reutiliza sin reconectar"""
+        pool = self.make_pool(maxconn=2)
+
+        for _ in range(5):
+            with pool.connection() as conn:
+                pass
+
+        assert len(self.connector.created) == 1
+        stats = pool.stats()
+        assert stats["checkouts"] == 5
+        assert stats["connections_created"] == 1
+        assert stats["idle"] == 1
+        assert stats["in_use"] == 0
+
+    def test_pool_is_bounded_and_times_out(self):
+        """Test que el pool no supera maxconn y expira la espera"""
+        pool = self.make_pool(maxconn=1, acquire_timeout=0.05)
+        conn = pool.getconn()
+
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["waits"] == 1
+        assert stats["wait_time_total"] >= 0.04
+        pool.putconn(conn)
+
+    def test_waiter_gets_returned_connection(self):
+        """Test que un hilo en espera recibe la conexión liberada"""
+        pool = self.make_pool(maxconn=1, acquire_timeout=2)
+        conn = pool.getconn()
+        got = []
+
+        worker = threading.Thread(target=lambda: got.append(pool.getconn()))
+        worker.start()
+        time.sleep(0.05)
+        pool.putconn(conn)
+        worker.join(timeout=2)
+
+        assert got == [conn]
+        assert pool.stats()["waits"] == 1
+        assert len(self.connector.created) == 1
+
+    def test_max_lifetime_recycles_connection(self):
+        """Test que una conexión vieja se cierra y se reemplaza"""
+        pool = self.make_pool(max_lifetime=0.01)
+        with pool.connection() as first:
+            pass
+        time.sleep(0.02)
+        with pool.connection() as second:
+            pass
+
+        assert first is not second
+        assert first.closed
+        assert pool.stats()["expired"] == 1
+
+    def test_health_check_discards_broken_connection(self):
+        """Test que una conexión ociosa que falla SELECT 1 se reemplaza"""
+        pool = self.make_pool(health_check_interval=0)
+        with pool.connection() as first:
+            pass
+        first.broken = True
+
+        with pool.connection() as second:
+            pass
+
+        assert second is not first
+        assert pool.stats()["health_check_failures"] == 1
+
+    def test_exception_rolls_back_and_returns_connection(self):
+        """Test rollback al fallar dentro del bloque"""
+        pool = self.make_pool()
+
+        with pytest.raises(RuntimeError):
+            with pool.connection() as conn:
+                conn.status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+                raise RuntimeError("boom")
+
+        assert conn.rollbacks >= 1
+        assert pool.stats()["idle"] == 1
+
+    def test_open_transaction_is_rolled_back_on_return(self):
+        """Test que no se devuelven conexiones con transacción abierta"""
+        pool = self.make_pool()
+        conn = pool.getconn()
+        conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+
+        assert conn.rollbacks == 1
+        assert not conn.closed
+
+    def test_concurrent_checkouts_respect_bound(self):
+        """Test concurrencia: nunca más de maxconn conexiones abiertas"""
+        pool = self.make_pool(maxconn=3, acquire_timeout=5)
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            for _ in range(20):
+                with pool.connection():
+                    with lock:
+                        peak.append(pool.stats()["in_use"])
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 3
+        assert len(self.connector.created) <= 3
+        assert pool.stats()["checkouts"] == 160
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-db-pool-v1
+# version: 3.1.0
+# file: tests/test_db_pool.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
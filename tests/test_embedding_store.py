@@ -0,0 +1,162 @@
+# AUTO-ATC Playbook v3 - Tests para el store de embeddings cuantizados
+# Pruebas de embedding_store.py: formato en disco, búsqueda top-k, filtro de idioma,
+# exportación desde Qdrant y uso desde DatabaseManager
+
+import pytest
+import sys
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from actions import DatabaseManager
+from actions_async import AsyncDatabaseManager
+from embedding_store import EmbeddingStore, EmbeddingStoreWriter, export_from_postgres, export_from_qdrant
+from embeddings import HashingEmbedder
+from unittest.mock import MagicMock, Mock
+
+
+def random_store(path, dtype, count=500, dim=32, seed=7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    writer = EmbeddingStoreWriter(str(path), dim, dtype)
+    for i, vector in enumerate(vectors):
+        writer.add(vector, {"title": f"doc {i}", "content": f"contenido {i}", "price": i,
+                            "language": "es" if i % 2 else "en"})
+    writer.close()
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestEmbeddingStore:
+    """Pruebas del formato y la búsqueda"""
+
+    @pytest.mark.parametrize("dtype", ["int8", "float16"])
+    def test_matches_float32_brute_force(self, tmp_path, dtype):
+        """Test que el top-k cuantizado coincide con el exacto en float32"""
+        vectors = random_store(tmp_path / "kb.store", dtype)
+        store = EmbeddingStore(str(tmp_path / "kb.store"), block_rows=64)
+        query = vectors[10] + 0.1 * vectors[20]
+
+        exact = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:5]
+        found = store.search(query, limit=5)
+        assert [row for row, _ in found][:2] == list(exact[:2])
+        assert len(set(row for row, _ in found) & set(exact)) >= 4
+        assert found[0][1] == pytest.approx(float(vectors[10] @ query / np.linalg.norm(query)), abs=0.02)
+        assert store.payload(found[0][0]) == {"title": "doc 10", "content": "contenido 10", "price": 10}
+        store.close()
+
+    def test_concurrent_searches_match_sequential(self, tmp_path):
+        """Test que búsquedas en paralelo (como asyncio.to_thread) dan el mismo top-k que en serie"""
+        vectors = random_store(tmp_path / "kb.store", "int8", count=4000, dim=64)
+        store = EmbeddingStore(str(tmp_path / "kb.store"), block_rows=256)
+        queries = [vectors[i] for i in range(0, 4000, 125)]
+        expected = [store.search(query, limit=5) for query in queries]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            for _ in range(20):
+                assert list(pool.map(lambda query: store.search(query, limit=5), queries)) == expected
+        store.close()
+
+    def test_language_filter_and_payloads(self, tmp_path):
+        """Test que el filtro de idioma descarta filas y search_payloads agrega el score"""
+        vectors = random_store(tmp_path / "kb.store", "int8")
+        store = EmbeddingStore(str(tmp_path / "kb.store"))
+        results = store.search_payloads(vectors[10], limit=3, language="es")
+        assert len(results) == 3
+        assert all(int(r["title"].split()[1]) % 2 == 1 for r in results)
+        assert store.search(vectors[10], limit=3, language="pt") == []
+
+    def test_header_and_empty_store(self, tmp_path):
+        """Test del encabezado y de un store sin filas"""
+        random_store(tmp_path / "kb.store", "float16", count=10)
+        info = EmbeddingStore(str(tmp_path / "kb.store")).info()
+        assert info["count"] == 10 and info["dim"] == 32 and info["dtype"] == "float16"
+        assert info["languages"] == ["en", "es"]
+
+        EmbeddingStoreWriter(str(tmp_path / "empty.store"), 8).close()
+        assert EmbeddingStore(str(tmp_path / "empty.store")).search([1.0] * 8) == []
+
+        with pytest.raises(ValueError):
+            EmbeddingStoreWriter(str(tmp_path / "bad.store"), 8).add([1.0] * 4, {})
+
+    def test_export_from_qdrant(self, tmp_path):
+        """Test que la exportación copia vectores y payloads de una colección en memoria"""
+        from qdrant_client import QdrantClient
+        from qdrant_client.http import models
+
+        embedder = HashingEmbedder(dim=16)
+        client = QdrantClient(":memory:")
+        client.create_collection("products", vectors_config=models.VectorParams(size=16, distance=models.Distance.COSINE))
+        texts = ["laptop dell xps", "iphone 15 pro", "monitor samsung 27"]
+        client.upsert("products", points=[
+            models.PointStruct(id=i, vector=embedder.embed(text), payload={"title": text, "language": "es", "tags": ["x"]})
+            for i, text in enumerate(texts)
+        ])
+
+        header = export_from_qdrant(client, "products", str(tmp_path / "kb.store"), page_size=2)
+        store = EmbeddingStore(str(tmp_path / "kb.store"))
+        assert header["count"] == 3
+        assert store.search_payloads(embedder.embed("iphone 15 pro"), limit=1, language="es")[0]["title"] == "iphone 15 pro"
+
+    def test_export_from_postgres(self, tmp_path):
+        """Test que kb_documents se chunkea y se embebe con el embedder de las queries"""
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.__iter__.return_value = iter([
+            (1, "Garantía", "Todos los productos tienen garantía de un año", "politicas", None),
+            (2, "Envíos", "Envíos a todo el país en 48 horas", "politicas", "es"),
+        ])
+        embedder = HashingEmbedder(dim=16)
+        header = export_from_postgres(conn, embedder, str(tmp_path / "kb.store"), batch_size=1)
+
+        store = EmbeddingStore(str(tmp_path / "kb.store"))
+        assert header["count"] == 2
+        best = store.search_payloads(embedder.embed("envíos a todo el país"), limit=1, language="es")[0]
+        assert best["title"] == "Envíos" and best["doc_id"] == "2"
+
+
+class TestLocalStoreSearch:
+    """Pruebas de la búsqueda vectorial de las acciones servida desde el store local"""
+
+    def make_db(self, tmp_path):
+        embedder = HashingEmbedder(dim=16)
+        writer = EmbeddingStoreWriter(str(tmp_path / "kb.store"), 16)
+        for title, price in (("Laptop Dell XPS 13", 1299), ("iPhone 15 Pro", 999), ("Monitor Samsung 27", 350)):
+            writer.add(embedder.embed(title.lower()), {"title": title, "content": title, "category": "tech",
+                                                       "price": price, "language": "es"})
+        writer.close()
+        db = DatabaseManager(embedder=embedder)
+        db.kb_local_store_path = str(tmp_path / "kb.store")
+        db.qdrant_client = Mock()
+        return db
+
+    def test_vector_candidates_skip_qdrant(self, tmp_path):
+        """Test que con KB_LOCAL_STORE los candidatos salen del archivo y Qdrant no se consulta"""
+        db = self.make_db(tmp_path)
+        results = db._vector_candidates("iphone 15 pro", 2)
+        assert results[0] == {"title": "iPhone 15 Pro", "content": "iPhone 15 Pro", "category": "tech", "price": 999.0}
+        assert not db.qdrant_client.method_calls
+        assert [name for name, _ in db.warmup_tasks()][1] == "local_store"
+
+    def test_async_vector_candidates(self, tmp_path):
+        """Test de la variante async (búsqueda en un hilo)"""
+        db = self.make_db(tmp_path)
+        async_db = AsyncDatabaseManager(db)
+        async_db.embed_query = Mock(side_effect=lambda q: asyncio.sleep(0, db.embed_query(q)))
+        results = asyncio.run(async_db._vector_candidates("laptop dell xps 13", 1))
+        assert results[0]["title"] == "Laptop Dell XPS 13"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-embedding-store-v1
+# version: 3.1.0
+# file: tests/test_embedding_store.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,132 @@
+# AUTO-ATC Playbook v3 - Tests para embeddings y cache
+# Pruebas unitarias de embeddings.py y ttl_cache.py
+
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from embeddings import HashingEmbedder, TEIEmbedder, create_embedder, normalize_query
+from ttl_cache import TTLCache
+from unittest.mock import Mock
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHashingEmbedder:
+    """Pruebas para el embedder local determinístico"""
+
+    def test_embedding_is_deterministic_and_normalized(self):
+        """Test mismo texto -> mismo vector de norma 1"""
+        embedder = HashingEmbedder(dim=64)
+        a = embedder.embed("precio iphone")
+        b = HashingEmbedder(dim=64).embed("precio iphone")
+
+        assert a == b
+        assert len(a) == 64
+        assert abs(cosine(a, a) - 1.0) < 1e-9
+
+    def test_similar_queries_are_closer(self):
+        """Test que queries parecidas quedan más cerca que queries distintas"""
+        embedder = HashingEmbedder()
+        base = embedder.embed("precio iphone 15")
+        similar = embedder.embed("iphone 15 precio")
+        other = embedder.embed("auriculares sony")
+
+        assert cosine(base, similar) > cosine(base, other)
+
+    def test_accents_are_folded(self):
+        """Test que 'cámara' y 'camara' producen el mismo embedding"""
+        embedder = HashingEmbedder()
+        assert embedder.embed("cámara") == embedder.embed("camara")
+
+
+class TestTEIEmbedder:
+    """Pruebas para el cliente TEI"""
+
+    def test_parses_native_and_openai_style_responses(self):
+        """Test de ambos formatos de respuesta"""
+        embedder = TEIEmbedder("http://tei:80")
+        response = Mock()
+        embedder.session.post = Mock(return_value=response)
+
+        response.json.return_value = [[0.1, 0.2]]
+        assert embedder.embed("hola") == [0.1, 0.2]
+
+        response.json.return_value = {"embeddings": [{"embedding": [0.3, 0.4]}]}
+        assert embedder.embed("hola") == [0.3, 0.4]
+
+        url = embedder.session.post.call_args[0][0]
+        assert url == "http://tei:80/embeddings"
+
+    def test_create_embedder_defaults_to_hashing(self, monkeypatch):
+        """Test que sin TEI_URL se usa el embedder local"""
+        monkeypatch.delenv("TEI_URL", raising=False)
+        monkeypatch.delenv("KB_EMBEDDER", raising=False)
+        assert isinstance(create_embedder(), HashingEmbedder)
+
+
+class TestTTLCache:
+    """Pruebas para el cache LRU+TTL"""
+
+    def test_hits_and_misses(self):
+        """Test contadores de aciertos y fallos"""
+        cache = TTLCache(maxsize=4, ttl=60)
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        """Test que se desaloja la entrada menos usada"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiration(self):
+        """Test que las entradas vencidas no se devuelven"""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 11
+
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_normalize_query(self):
+        """Test normalización de la clave de cache"""
+        assert normalize_query("  Precio   iPhone ") == "precio iphone"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-embeddings-v1
+# version: 3.1.0
+# file: tests/test_embeddings.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,194 @@
+# AUTO-ATC Playbook v3 - Tests para la búsqueda híbrida
+# Pruebas unitarias de hybrid_search.py (fuentes simuladas, sin Postgres ni Qdrant)
+
+import pytest
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from hybrid_search import (FULLTEXT_KB_DOCUMENTS_SQL, FULLTEXT_PRODUCTS_SQL, HybridRetriever,
+                           extract_sku, fulltext_search, product_by_sku, reciprocal_rank_fusion)
+from unittest.mock import MagicMock
+
+
+def result(title, **extra):
+    return dict({"title": title, "content": "", "category": "", "price": 0.0}, **extra)
+
+
+class TestSkuExtraction:
+    """Pruebas para extract_sku"""
+
+    def test_detects_sku(self):
+        """Test códigos de producto con y sin prefijo"""
+        assert extract_sku("DELL-XPS13") == "DELL-XPS13"
+        assert extract_sku("  sku: tv-55 ") == "TV-55"
+        assert extract_sku("SKU#AB-12-C") == "AB-12-C"
+
+    def test_ignores_text(self):
+        """Test que texto libre o palabras con guion no se toman como SKU"""
+        assert extract_sku("laptop dell xps") is None
+        assert extract_sku("wi-fi") is None
+        assert extract_sku("precio del TV-55") is None
+        assert extract_sku("") is None
+
+
+class TestReciprocalRankFusion:
+    """Pruebas para reciprocal_rank_fusion"""
+
+    def test_result_in_both_lists_ranks_first(self):
+        """Test que un resultado presente en varias fuentes sube en el ranking"""
+        lexical = [result("A"), result("B"), result("C")]
+        vector = [result("C"), result("D")]
+
+        fused = reciprocal_rank_fusion([lexical, vector], limit=3)
+
+        assert [r["title"] for r in fused] == ["C", "A", "B"]
+
+    def test_dedup_keeps_first_source_version(self):
+        """Test que el duplicado conserva la versión con SKU del catálogo"""
+        catalog = [result("Smart TV 55", sku="TV-55", price=550.0)]
+        vector = [result("smart tv 55 ", price=0.0)]
+
+        fused = reciprocal_rank_fusion([catalog, vector], limit=5)
+
+        assert fused == [catalog[0]]
+
+    def test_empty_lists(self):
+        """Test sin resultados"""
+        assert reciprocal_rank_fusion([], limit=3) == []
+
+
+class TestHybridRetriever:
+    """Pruebas para HybridRetriever"""
+
+    def test_sources_run_concurrently(self):
+        """Test que la latencia es la de la fuente más lenta, no la suma"""
+        def slow(name):
+            def source(query, limit):
+                time.sleep(0.1)
+                return [result(name)]
+            return source
+
+        retriever = HybridRetriever({"a": slow("A"), "b": slow("B"), "c": slow("C")}, budget=1.0)
+        start = time.perf_counter()
+        results = retriever.search("tv", limit=3)
+
+        assert time.perf_counter() - start < 0.25
+        assert {r["title"] for r in results} == {"A", "B", "C"}
+
+    def test_budget_skips_slow_source(self):
+        """Test que una fuente fuera de presupuesto se omite y el resto responde"""
+        release = threading.Event()
+
+        def stuck(query, limit):
+            release.wait(2)
+            return [result("tarde")]
+
+        retriever = HybridRetriever({"fast": lambda q, n: [result("A")], "stuck": stuck}, budget=0.05)
+        start = time.perf_counter()
+        try:
+            results = retriever.search("tv")
+        finally:
+            release.set()
+
+        assert time.perf_counter() - start < 0.5
+        assert [r["title"] for r in results] == ["A"]
+        assert retriever.stats()["stuck"]["timeouts"] == 1
+
+    def test_failing_source_ignored(self):
+        """Test que un error en una fuente no rompe la búsqueda"""
+        def broken(query, limit):
+            raise ConnectionError("postgres down")
+
+        retriever = HybridRetriever({"fulltext": broken, "vector": lambda q, n: [result("A")]}, budget=1.0)
+
+        assert [r["title"] for r in retriever.search("tv")] == ["A"]
+        stats = retriever.stats()
+        assert stats["fulltext"]["errors"] == 1
+        assert stats["vector"] == {"calls": 1, "timeouts": 0, "errors": 0, "empty": 0}
+
+
+    def test_fast_path_skips_sources_when_complete(self):
+        """Test que el camino rápido con `limit` resultados responde sin lanzar las fuentes"""
+        calls = []
+
+        def slow(query, limit):
+            calls.append(query)
+            time.sleep(0.2)
+            return [result("lento")]
+
+        catalog = {"tv": [result("TV 55"), result("TV 65")], "tv sony": [result("TV Sony")]}
+        retriever = HybridRetriever({"vector": slow}, budget=1.0,
+                                    fast_path=lambda q, n: catalog.get(q, [])[:n])
+        start = time.perf_counter()
+        assert [r["title"] for r in retriever.search("tv", limit=2)] == ["TV 55", "TV 65"]
+        assert time.perf_counter() - start < 0.05 and calls == []
+
+        # Con menos de `limit` se buscan todas las fuentes
+        assert {r["title"] for r in retriever.search("tv sony", limit=2)} == {"lento"}
+        assert calls == ["tv sony"]
+        assert retriever.stats()["fast_path"] == {"calls": 2, "hits": 1, "errors": 0}
+
+
+class TestFulltextSearch:
+    """Pruebas para fulltext_search"""
+
+    def test_queries_use_gin_index_expressions(self):
+        """Test que el SQL usa las mismas expresiones que los índices GIN de schema.sql"""
+        assert "to_tsvector('spanish', p.name) @@" in FULLTEXT_PRODUCTS_SQL
+        assert "to_tsvector('spanish', p.description) @@" in FULLTEXT_PRODUCTS_SQL
+        assert "to_tsvector('spanish', d.title) @@" in FULLTEXT_KB_DOCUMENTS_SQL
+        assert "to_tsvector('spanish', d.content) @@" in FULLTEXT_KB_DOCUMENTS_SQL
+
+    def test_merges_products_and_documents_by_rank(self):
+        """Test que productos y documentos se ordenan por ts_rank"""
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchall.side_effect = [
+            [("Smart TV 55", "Televisor 4K", "tv", 550, "TV-55", 0.2)],
+            [("Guía de televisores", "Cómo elegir", "guias", 0.5)],
+        ]
+
+        results = fulltext_search(conn, "televisor", limit=3)
+
+        assert [r["title"] for r in results] == ["Guía de televisores", "Smart TV 55"]
+        assert results[1]["sku"] == "TV-55"
+
+    def test_sku_lookup_matches_uppercased_sku(self):
+        """Test que el SKU en mayúsculas de extract_sku se compara con upper(sku)"""
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchone.return_value = ("Smart TV 55", "Televisor 4K", "tv", 550, "tv-55")
+
+        result = product_by_sku(conn, extract_sku("sku: tv-55"))
+
+        assert "upper(sku) = %s" in cur.execute.call_args.args[0]
+        assert cur.execute.call_args.args[1] == ("TV-55",)
+        assert result["sku"] == "tv-55"
+
+    def test_skips_products_when_indexed_in_memory(self):
+        """Test que con include_products=False solo se consulta kb_documents"""
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchall.return_value = []
+
+        fulltext_search(conn, "televisor", limit=3, include_products=False)
+
+        assert cur.execute.call_count == 1
+        assert "kb_documents" in cur.execute.call_args.args[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-hybrid-search-v1
+# version: 3.1.0
+# file: tests/test_hybrid_search.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,157 @@
+# AUTO-ATC Playbook v3 - Tests para la ingestión de la knowledge base
+# Pruebas de kb_ingest.py con Qdrant en memoria y el embedder de hashing local
+
+import io
+import pytest
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from kb_ingest import KBIngestor, chunk_text, point_id, read_jsonl, split_sentences
+from embeddings import HashingEmbedder
+from pii import PIIMasker
+from qdrant_client import QdrantClient
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Embedder local que registra el tamaño de cada lote"""
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.batches = []
+
+    def embed_batch(self, texts):
+        self.batches.append(len(texts))
+        return super().embed_batch(texts)
+
+
+class LockedClient:
+    """Qdrant en memoria serializado: el modo local de qdrant_client no es thread-safe"""
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return method(*args, **kwargs)
+        return call
+
+
+def make_document(doc_id, sentences=30, variant=""):
+    text = " ".join(f"La laptop {doc_id} modelo {i}{variant} tiene batería de larga duración." for i in range(sentences))
+    return {"id": doc_id, "title": f"Manual {doc_id}", "text": text, "category": "computadoras"}
+
+
+class TestChunking:
+    """Pruebas para el chunking por oraciones"""
+
+    def test_split_sentences(self):
+        """Test corte por fin de oración y por párrafo"""
+        text = "Hola. ¿Cómo estás? Bien!\n\nNuevo párrafo sin punto"
+        assert split_sentences(text) == ["Hola.", "¿Cómo estás?", "Bien!", "Nuevo párrafo sin punto"]
+
+    def test_chunks_respect_limit_and_overlap(self):
+        """Test que los chunks no superan max_tokens y repiten la última oración"""
+        text = " ".join(f"Oración número {i} con seis palabras." for i in range(20))
+        chunks = chunk_text(text, max_tokens=20, overlap_tokens=6)
+
+        assert all(len(chunk.split()) <= 20 for chunk in chunks)
+        for previous, current in zip(chunks, chunks[1:]):
+            last_sentence = " ".join(previous.split()[-6:])
+            assert current.startswith(last_sentence)
+        assert "Oración número 19" in chunks[-1]
+
+    def test_long_sentence_split_by_words(self):
+        """Test que una oración más larga que el límite se corta por palabras"""
+        words = [f"w{i}" for i in range(25)]
+        chunks = chunk_text(" ".join(words), max_tokens=10, overlap_tokens=2)
+
+        assert chunks[0].split() == words[:10]
+        assert chunks[1].split()[0] == "w8"
+        assert chunks[-1].split()[-1] == "w24"
+
+    def test_overlap_must_be_smaller(self):
+        """Test validación de parámetros"""
+        with pytest.raises(ValueError):
+            chunk_text("texto", max_tokens=10, overlap_tokens=10)
+
+    def test_read_jsonl_streams_and_skips_invalid(self):
+        """Test lectura de JSONL línea a línea"""
+        stream = io.StringIO('{"id": "a", "text": "x"}\nno-json\n\n{"id": "b", "text": "y"}\n')
+        assert [doc["id"] for doc in read_jsonl(stream)] == ["a", "b"]
+
+
+class TestKBIngestor:
+    """Pruebas para KBIngestor"""
+
+    def setup_method(self):
+        self.client = LockedClient(QdrantClient(":memory:"))
+        self.embedder = CountingEmbedder()
+        self.ingestor = KBIngestor(self.client, self.embedder, collection="kb", max_tokens=40,
+                                   overlap_tokens=10, batch_size=8, concurrency=3)
+
+    def test_batches_embeddings_and_upserts(self):
+        """Test que todos los chunks llegan a Qdrant en lotes"""
+        stats = self.ingestor.ingest(make_document(f"doc-{i}") for i in range(5))
+
+        assert stats["documents"] == 5
+        assert stats["upserted"] == stats["chunks"]
+        assert self.client.count("kb").count == stats["chunks"]
+        assert max(self.embedder.batches) == 8
+        assert len(self.embedder.batches) == stats["batches"]
+
+    def test_payload_matches_actions_format(self):
+        """Test que el payload sirve para DatabaseManager._hit_to_result y el filtro por idioma"""
+        self.ingestor.ingest([make_document("doc-1", sentences=2)])
+        point = self.client.retrieve("kb", ids=[point_id("doc-1", 0)], with_payload=True)[0]
+
+        assert point.payload["title"] == "Manual doc-1"
+        assert point.payload["category"] == "computadoras"
+        assert point.payload["language"] == "es"
+        assert "batería" in point.payload["content"]
+
+    def test_masks_pii_in_chunks(self):
+        """Test chunks enmascarados antes del hash y del embedding"""
+        self.ingestor.masker = PIIMasker()
+        self.ingestor.ingest([{"id": "soporte-1", "text": "Escribinos a ventas@example.com o al 099 123 456."}])
+        point = self.client.retrieve("kb", ids=[point_id("soporte-1", 0)], with_payload=True)[0]
+        assert point.payload["content"] == "Escribinos a [EMAIL] o al [PHONE]."
+
+    def test_unchanged_chunks_are_skipped(self):
+        """Test que re-ingestar el mismo documento no re-embebe ni sube nada"""
+        first = self.ingestor.ingest([make_document("doc-1")])
+        self.embedder.batches.clear()
+
+        second = self.ingestor.ingest([make_document("doc-1")])
+
+        assert second["unchanged"] == first["chunks"]
+        assert second["embedded"] == 0
+        assert self.embedder.batches == []
+
+    def test_changed_document_reembeds_and_prunes(self):
+        """Test que un documento modificado y más corto actualiza y poda chunks viejos"""
+        first = self.ingestor.ingest([make_document("doc-1", sentences=30)])
+        second = self.ingestor.ingest([make_document("doc-1", sentences=10, variant="b")])
+
+        assert second["embedded"] == second["chunks"]
+        assert second["chunks"] < first["chunks"]
+        assert self.client.count("kb").count == second["chunks"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-kb-ingest-v1
+# version: 3.1.0
+# file: tests/test_kb_ingest.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,110 @@
+# AUTO-ATC Playbook v3 - Tests para el load test del orquestador
+# Pruebas del parse/máscara, del replay contra los stubs y del presupuesto de p99
+
+import pytest
+import sys
+import os
+import json
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import httpx
+
+from loadtest_orchestrator import (
+    OrchestratorReplay, check_budget, compose_answer, parse_and_mask, recorded_payloads, synthetic_payloads,
+)
+from stub_servers import chatwoot_stub, qdrant_stub, rasa_stub, sheets_stub, tei_stub
+
+
+def replay(payloads, can_reply=True, rasa_failures=0, **kwargs):
+    """Replay contra stubs nuevos; devuelve el resumen y los stubs"""
+    stubs = {"chatwoot": chatwoot_stub(can_reply=can_reply), "rasa": rasa_stub(), "tei": tei_stub(dim=8),
+             "qdrant": qdrant_stub(), "sheets": sheets_stub()}
+    stubs["rasa"].fail_next = rasa_failures
+    for stub in stubs.values():
+        stub.start()
+    try:
+        async def run():
+            async with httpx.AsyncClient() as client:
+                return await OrchestratorReplay({name: stub.url for name, stub in stubs.items()}, client).replay(
+                    payloads, **kwargs)
+        return asyncio.run(run()), stubs
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+
+class TestPayloads:
+    """Pruebas del parse y de las fuentes de webhooks"""
+
+    def test_parse_and_mask(self):
+        """Test máscara de números largos y emails como en el nodo del workflow"""
+        _, event = next(synthetic_payloads(1))
+        event["content"] = "Soy ana@example.com, mi cel es 099123456 y quiero 2 laptops"
+        parsed = parse_and_mask(event)
+        assert parsed["body_masked"] == "Soy [EMAIL], mi cel es [NUM] y quiero 2 laptops"
+        assert parsed["channel"] == "Channel::Whatsapp"
+        assert parsed["conversation_id"] == event["conversation"]["id"]
+        assert parsed["contact_id"] == event["sender"]["id"]
+
+    def test_recorded_payloads_with_offsets(self, tmp_path):
+        """Test JSONL con webhooks sueltos y con offset_ms"""
+        path = tmp_path / "grabados.jsonl"
+        path.write_text(json.dumps({"content": "hola"}) + "\n\n"
+                        + json.dumps({"offset_ms": 250, "payload": {"content": "precio"}}) + "\n")
+        assert list(recorded_payloads(str(path))) == [(None, {"content": "hola"}), (0.25, {"content": "precio"})]
+
+    def test_compose_answer(self):
+        """Test texto de Rasa más hasta tres sugerencias"""
+        hits = [{"payload": {"title": "Laptop", "price": 10}}, {"payload": {"title": "Mouse"}}, {"payload": {}}]
+        assert compose_answer([{"text": "Mirá:"}], hits) == "Mirá:\n\nSugerencias:\nLaptop - $10\nMouse"
+        assert compose_answer([], []) == ""
+
+
+class TestReplay:
+    """Pruebas del replay contra los stubs"""
+
+    def test_full_path_counts_every_stage(self):
+        """Test que cada webhook recorre todas las etapas sin errores"""
+        summary, stubs = replay(synthetic_payloads(20, conversations=5), rate=0, concurrency=8)
+
+        assert summary["completed"] == 20 and summary["failed"] == 0
+        for stage in ("parse_mask", "chatwoot_details", "rasa", "tei_embed", "qdrant_search", "compose",
+                      "chatwoot_reply", "sheets_append", "end_to_end"):
+            assert summary["stages"][stage]["count"] == 20
+            assert summary["stages"][stage]["errors"] == 0
+        assert "whatsapp_template" not in summary["stages"]
+        reply = [r for r in stubs["chatwoot"].requests if r["method"] == "POST"][0]
+        assert reply["body"]["content"].startswith("Encontré los siguientes productos:\n\nSugerencias:")
+
+    def test_template_path_and_failures(self):
+        """Test rama de template fuera de ventana y errores contados por etapa"""
+        summary, _ = replay(synthetic_payloads(5), can_reply=False, rate=0)
+        assert summary["stages"]["whatsapp_template"]["count"] == 5
+        assert "rasa" not in summary["stages"]
+
+        summary, _ = replay(synthetic_payloads(5), rasa_failures=2, rate=0, concurrency=1)
+        assert summary["failed"] == 2 and summary["completed"] == 3
+        assert summary["stages"]["rasa"]["errors"] == 2
+        assert summary["stages"]["qdrant_search"]["count"] == 3
+
+    def test_check_budget(self):
+        """Test presupuesto de p99 end_to_end"""
+        summary = {"failed": 0, "stages": {"end_to_end": {"p99_ms": 120.0}}}
+        assert check_budget(summary, 200) is None
+        assert "p99 120.0 ms" in check_budget(summary, 100)
+        assert check_budget(dict(summary, failed=1), 200) is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-loadtest-orchestrator-v1
+# version: 3.1.0
+# file: tests/test_loadtest_orchestrator.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
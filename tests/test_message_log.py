@@ -0,0 +1,222 @@
+# AUTO-ATC Playbook v3 - Tests para el registro write-behind de mensajes
+# Pruebas de message_log.py con una conexión falsa (upserts, COPY, backpressure y drenado)
+
+import pytest
+import sys
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import psycopg2.errors
+import message_log
+from message_log import MessageLogWriter, log_turn, transcribe, user_event_time
+from pii import PIIMasker
+from unittest.mock import MagicMock, Mock, patch
+
+
+class FakeDatabase:
+    """Conexión falsa: asigna ids en los upserts y guarda lo copiado a messages"""
+
+    def __init__(self, copy_error=None):
+        self.cursor = MagicMock()
+        self.cursor.copy_expert.side_effect = self._copy
+        self.conn = MagicMock()
+        self.conn.cursor.return_value.__enter__.return_value = self.cursor
+        self.copy_error = copy_error
+        self.upserts = []
+        self.copied = []
+        self.inserted = []
+
+    @contextmanager
+    def get_connection(self):
+        yield self.conn
+
+    def _copy(self, sql, buffer):
+        if self.copy_error is not None:
+            raise self.copy_error
+        self.copied.extend(line.split("\t") for line in buffer.getvalue().splitlines())
+
+    def execute_values(self, cur, sql, rows, fetch=False, page_size=100):
+        if "INTO messages" in sql:
+            self.inserted.extend(rows)
+            return None
+        self.upserts.append(rows)
+        # users: (external_id, platform); conversations: (user_id, external_conversation_id, platform)
+        key = 0 if "INTO users" in sql else 1
+        return [(row[key], 100 + len(self.upserts) * 10 + i) for i, row in enumerate(rows)]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def fake_db():
+    db = FakeDatabase()
+    with patch.object(message_log.psycopg2.extras, "execute_values", db.execute_values):
+        yield db
+
+
+def make_writer(db, **kwargs):
+    options = {"batch_size": 10, "flush_interval_ms": 60000, "backoff_base": 0.01, "backoff_max": 0.05}
+    options.update(kwargs)
+    return MessageLogWriter(db.get_connection, **options)
+
+
+class TestMessageLogWriter:
+    """Pruebas para MessageLogWriter"""
+
+    def test_flush_upserts_once_and_copies(self, fake_db):
+        """Test upsert de users/conversations nuevos y COPY con escapes y NULL"""
+        writer = make_writer(fake_db)
+        writer.log("conv-1", "inbound", "hola\tque tal\nlaptop", "whatsapp", external_message_id="m1")
+        writer.log("conv-1", "outbound", "Encontré los siguientes productos", "whatsapp")
+        assert writer.flush() == 2
+
+        assert fake_db.upserts == [[("conv-1", "whatsapp")], [(110, "conv-1", "whatsapp")]]
+        inbound, outbound = fake_db.copied
+        assert inbound[:5] == ["120", "m1", "inbound", "text", "hola\\tque tal\\nlaptop"]
+        assert outbound[1] == "\\N"
+        fake_db.conn.commit.assert_called_once()
+
+        # Los ids quedan en cache: el siguiente lote no vuelve a hacer upsert
+        writer.log("conv-1", "inbound", "gracias", "whatsapp")
+        assert writer.flush() == 1
+        assert len(fake_db.upserts) == 2
+        assert fake_db.copied[-1][0] == "120"
+
+    def test_masks_pii_per_batch(self, fake_db):
+        """Test contenido enmascarado al escribir el lote"""
+        writer = make_writer(fake_db, masker=PIIMasker())
+        writer.log("conv-3", "inbound", "mi mail es ana@example.com")
+        writer.log("conv-3", "outbound", None)
+        assert writer.flush() == 2
+        assert fake_db.copied[0][4] == "mi mail es [EMAIL]"
+        assert fake_db.copied[1][4] == "\\N"
+
+    def test_duplicate_message_ids(self, fake_db):
+        """Test que el mismo mensaje entrante se encola una vez y que un conflicto usa ON CONFLICT"""
+        writer = make_writer(fake_db)
+        writer.log("conv-2", "inbound", "hola", external_message_id="m2")
+        writer.log("conv-2", "inbound", "hola", external_message_id="m2")
+        assert writer.stats()["duplicates"] == 1
+
+        fake_db.copy_error = psycopg2.errors.UniqueViolation()
+        assert writer.flush() == 1
+        fake_db.conn.rollback.assert_called_once()
+        assert [row[1] for row in fake_db.inserted] == ["m2"]
+
+    def test_backpressure_drops_when_full(self, fake_db):
+        """Test que con la cola llena se espera poco y se descarta"""
+        writer = make_writer(fake_db, max_queue=2, enqueue_timeout=0.01)
+        assert writer.log("conv-3", "inbound", "a")
+        assert writer.log("conv-3", "inbound", "b")
+        assert writer.log("conv-3", "inbound", "c") is False
+        assert writer.stats()["dropped"] == 1
+        assert writer.stats()["pending"] == 2
+        writer.stop()
+
+    def test_dropped_message_id_can_be_retried(self, fake_db):
+        """Test que un mensaje descartado por backpressure no queda marcado como duplicado"""
+        writer = make_writer(fake_db, max_queue=1, enqueue_timeout=0.01)
+        assert writer.log("conv-3", "inbound", "a")
+        assert writer.log("conv-3", "inbound", "b", external_message_id="m3") is False
+        assert writer.flush() == 1
+
+        assert writer.log("conv-3", "inbound", "b", external_message_id="m3")
+        assert writer.stats()["duplicates"] == 0
+        assert writer.stats()["pending"] == 1
+        writer.stop()
+
+    def test_retry_then_drop_failed_batch(self, fake_db):
+        """Test reintento con backoff y descarte tras max_retries"""
+        writer = make_writer(fake_db, max_retries=2)
+        fake_db.conn.cursor.side_effect = RuntimeError("db down")
+        writer.log("conv-4", "inbound", "hola")
+        assert writer.flush() == 0
+        assert writer.stats()["pending"] == 1
+        assert writer.flush() == 0
+        assert writer.stats()["pending"] == 0
+        assert writer.stats()["failed_rows"] == 1
+
+    def test_background_flush_and_drain_on_stop(self, fake_db):
+        """Test volcado por tamaño de lote y vaciado de la cola al detener"""
+        writer = make_writer(fake_db, batch_size=3)
+        for i in range(4):
+            writer.log("conv-5", "inbound", f"mensaje {i}")
+        assert wait_until(lambda: writer.stats()["flushed"] == 3)
+
+        writer.stop()
+        assert writer.stats()["flushed"] == 4
+        assert writer.stats()["pending"] == 0
+
+
+class TestTranscribe:
+    """Pruebas del decorador de acciones"""
+
+    def test_logs_inbound_once_and_outbound(self, fake_db):
+        """Test mensaje entrante (una vez por turno) y respuestas de cada acción"""
+        from rasa_sdk import Action, Tracker
+        from rasa_sdk.executor import CollectingDispatcher
+
+        writer = make_writer(fake_db)
+
+        class Greet(Action):
+            def name(self):
+                return "action_greet"
+
+            @transcribe(lambda: writer)
+            def run(self, dispatcher, tracker, domain):
+                dispatcher.utter_message(text="¡Hola!")
+                return []
+
+        latest = {"text": "hola", "message_id": "wa-1", "intent": {"name": "greet"}}
+        tracker = Tracker("conv-6", {}, latest, [], False, None, {}, None)
+        dispatcher = CollectingDispatcher()
+        Greet().run(dispatcher, tracker, {})
+        Greet().run(dispatcher, tracker, {})
+        assert writer.flush() == 3
+
+        directions = [(row[1], row[2], row[4]) for row in fake_db.copied]
+        assert directions == [("wa-1", "inbound", "hola"), ("\\N", "outbound", "¡Hola!"), ("\\N", "outbound", "¡Hola!")]
+
+    def test_inbound_created_at_from_user_event(self, fake_db):
+        """Test que dos workers (o un reinicio) escriben el entrante con el mismo created_at"""
+        from rasa_sdk import Tracker
+
+        latest = {"text": "hola", "message_id": "wa-7", "intent": {"name": "greet"}}
+        events = [{"event": "user", "text": "hola", "message_id": "wa-7", "timestamp": 1791000000.25},
+                  {"event": "action", "name": "action_listen", "timestamp": 1791000005.0}]
+        tracker = Tracker("conv-7", {}, latest, events, False, None, {}, None)
+        dispatcher = Mock(messages=[])
+
+        for _ in range(2):
+            # Writers separados: el cache de ids vistos es por proceso
+            writer = make_writer(fake_db)
+            log_turn(writer, "action_greet", dispatcher, tracker)
+            assert writer.flush() == 1
+        first, second = fake_db.copied
+        assert first[1] == second[1] == "wa-7"
+        assert first[6] == second[6] == datetime.fromtimestamp(1791000000.25).isoformat()
+        assert user_event_time(Tracker("conv-8", {}, {}, [], False, None, {}, None)) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-message-log-v1
+# version: 3.1.0
+# file: tests/test_message_log.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,204 @@
+# AUTO-ATC Playbook v3 - Tests para las métricas de acciones
+# Pruebas unitarias de metrics.py e instrumentación de actions.py
+
+import pytest
+import sys
+import os
+import json
+import asyncio
+import requests
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import metrics
+from metrics import Histogram, MetricsRegistry, start_metrics_server
+from actions import ActionSearchProduct, db_manager
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+from unittest.mock import MagicMock, patch
+
+
+class FakeAction:
+    def __init__(self, registry, fail=False):
+        self.registry = registry
+        self.fail = fail
+
+    def name(self):
+        return "action_fake"
+
+
+def make_action(registry, fail=False):
+    class _Action(FakeAction):
+        @registry.instrument
+        def run(self, dispatcher, tracker, domain):
+            with registry.step("kb_search"):
+                if self.fail:
+                    raise RuntimeError("qdrant down")
+            return []
+    return _Action(registry, fail)
+
+
+class TestHistogram:
+    """Pruebas para Histogram"""
+
+    def test_buckets_and_window_quantile(self):
+        """Test conteo por bucket y p95 aproximado de la ventana"""
+        histogram = Histogram((0.01, 0.1, 1.0))
+        for seconds in [0.005] * 95 + [0.5] * 5:
+            histogram.observe(seconds)
+
+        assert histogram.counts == [95, 0, 5, 0]
+        assert histogram.window_quantile(0.5) == 0.01
+        assert histogram.window_quantile(0.99) == 1.0
+
+    def test_overflow_quantile_uses_max(self):
+        """Test que un valor mayor al último bucket reporta el máximo observado"""
+        histogram = Histogram((0.01,))
+        histogram.observe(3.0)
+        assert histogram.window_quantile(0.95) == 3.0
+
+
+class TestMetricsRegistry:
+    """Pruebas para MetricsRegistry"""
+
+    def test_instrument_records_run_and_steps(self):
+        """Test latencia por acción y por sub-paso"""
+        registry = MetricsRegistry()
+        make_action(registry).run(None, None, {})
+
+        text = registry.render_prometheus()
+        assert 'rasa_action_duration_seconds_count{action="action_fake",step="run"} 1' in text
+        assert 'rasa_action_duration_seconds_count{action="action_fake",step="kb_search"} 1' in text
+        assert 'le="+Inf"' in text
+
+    def test_errors_counted_per_step(self):
+        """Test que una excepción cuenta como error del paso y de la acción"""
+        registry = MetricsRegistry()
+        with pytest.raises(RuntimeError):
+            make_action(registry, fail=True).run(None, None, {})
+
+        text = registry.render_prometheus()
+        assert 'rasa_action_errors_total{action="action_fake",step="kb_search"} 1' in text
+        assert 'rasa_action_errors_total{action="action_fake",step="run"} 1' in text
+
+    def test_instrument_async_run(self):
+        """Test que el decorador conserva run async (rasa_sdk lo detecta como corrutina)"""
+        registry = MetricsRegistry()
+
+        class _Action(FakeAction):
+            @registry.instrument
+            async def run(self, dispatcher, tracker, domain):
+                with registry.step("db_write"):
+                    await asyncio.sleep(0)
+                return []
+
+        assert asyncio.iscoroutinefunction(_Action.run)
+        asyncio.run(_Action(registry).run(None, None, {}))
+        assert 'action="action_fake",step="db_write"' in registry.render_prometheus()
+
+    def test_drain_rows_aggregates_window(self):
+        """Test que el volcado agrega la ventana en pocas filas y la reinicia"""
+        registry = MetricsRegistry()
+        for _ in range(100):
+            registry.observe("action_greet", "run", 0.002)
+        registry.record_error("db_write", "action_register_quote")
+
+        rows = registry.drain_rows()
+        names = [row[0] for row in rows]
+        assert names == ["action_latency_avg", "action_latency_p95", "action_latency_max", "action_calls", "action_errors"]
+        assert rows[3][1] == 100
+        assert json.loads(rows[4][3])["step"] == "db_write"
+        assert registry.drain_rows() == []
+
+    def test_cache_hit_rate(self):
+        """Test contadores de cache en Prometheus y fila cache_hit_rate por ventana"""
+        registry = MetricsRegistry()
+        for hit in (True, True, True, False):
+            registry.record_cache("shown_results", hit)
+
+        assert registry.cache_stats()["shown_results"]["hit_rate"] == 0.75
+        assert 'rasa_cache_lookups_total{cache="shown_results",result="miss"} 1' in registry.render_prometheus()
+        rows = registry.drain_rows()
+        assert rows[0][:3] == ("cache_hit_rate", 75.0, "percent")
+        assert json.loads(rows[0][3])["lookups"] == 4
+        assert registry.drain_rows() == []
+
+    def test_flush_to_db_single_batch_insert(self):
+        """Test que el volcado usa un solo execute_values y un commit"""
+        registry = MetricsRegistry()
+        registry.observe("action_greet", "run", 0.002)
+        conn = MagicMock()
+        get_connection = MagicMock()
+        get_connection.return_value.__enter__.return_value = conn
+
+        with patch("metrics.psycopg2.extras.execute_values") as execute_values:
+            assert registry.flush_to_db(get_connection) == 4
+
+        assert execute_values.call_count == 1
+        assert "performance_metrics" in execute_values.call_args.args[1]
+        conn.commit.assert_called_once()
+
+
+class TestMetricsEndpoint:
+    """Pruebas para el endpoint /metrics"""
+
+    def test_serves_prometheus_text(self):
+        """Test GET /metrics"""
+        registry = MetricsRegistry()
+        registry.observe("action_greet", "run", 0.001)
+        server = start_metrics_server(0, registry, host="127.0.0.1")
+        try:
+            port = server.server_address[1]
+            response = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+            missing = requests.get(f"http://127.0.0.1:{port}/other", timeout=5)
+        finally:
+            server.shutdown()
+
+        assert response.status_code == 200
+        assert "rasa_action_duration_seconds_bucket" in response.text
+        assert missing.status_code == 404
+
+    def test_ready_reflects_warmup(self):
+        """Test GET /ready: 503 durante el warm-up y 200 al terminar"""
+        state = {"ready": False}
+        server = start_metrics_server(0, MetricsRegistry(), host="127.0.0.1", readiness=lambda: dict(state))
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/ready"
+            warming = requests.get(url, timeout=5)
+            state["ready"] = True
+            ready = requests.get(url, timeout=5)
+        finally:
+            server.shutdown()
+
+        assert warming.status_code == 503
+        assert ready.status_code == 200
+        assert ready.json()["ready"] == True
+
+
+class TestActionInstrumentation:
+    """Pruebas de la instrumentación de las acciones reales"""
+
+    def test_search_product_records_steps(self):
+        """Test que action_search_product registra validación y búsqueda"""
+        registry = MetricsRegistry()
+        tracker = Tracker("42", {}, {"text": "laptop"}, [], False, None, {}, None)
+
+        with patch.object(metrics.metrics, "_histograms", registry._histograms), \
+                patch.object(db_manager, "search_knowledge_base", return_value=[]):
+            ActionSearchProduct().run(CollectingDispatcher(), tracker, {})
+
+        assert {("action_search_product", "run"), ("action_search_product", "validation"),
+                ("action_search_product", "kb_search")} <= set(registry._histograms)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-metrics-v1
+# version: 3.1.0
+# file: tests/test_metrics.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,217 @@
+# AUTO-ATC Playbook v3 - Tests para el dispatcher de respuestas salientes
+# Pruebas de outbound_dispatcher.py contra stubs locales de Chatwoot y del proveedor de
+# WhatsApp: coalescencia, orden por conversación, rate limit por número, reintentos,
+# templates, filas de Sheets y endpoint HTTP
+
+import pytest
+import sys
+import os
+import json
+import time
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from metrics import MetricsRegistry
+from outbound_dispatcher import OutboundDispatcher, TokenBucket, coalesce, message_text, start_outbound_server
+from stub_servers import chatwoot_stub, waba_stub
+
+
+class FakeSheets:
+    def __init__(self):
+        self.rows = []
+
+    def enqueue(self, row):
+        self.rows.append(row)
+
+
+def make_dispatcher(chatwoot, waba=None, **kwargs):
+    options = dict(workers=4, rate_per_second=1000, burst=1000, backoff_base=0.01, registry=MetricsRegistry())
+    options.update(kwargs)
+    return OutboundDispatcher(chatwoot.url, inbox_id="7", waba_url=waba.url if waba else None, **options)
+
+
+def posts(stub):
+    return [r for r in stub.requests if r["method"] == "POST"]
+
+
+class TestCoalesce:
+    """Pruebas de la unión de mensajes"""
+
+    def test_joins_texts_and_splits_between_messages(self):
+        """Test que se une con separador, se corta entre mensajes y se descartan vacíos y repetidos"""
+        assert coalesce(["Hola", "", "Hola", "¿Qué buscás?"]) == ["Hola\n\n¿Qué buscás?"]
+        assert coalesce(["a" * 6, "b" * 6, "c" * 20], max_chars=14) == ["aaaaaa\n\nbbbbbb", "c" * 20]
+        assert coalesce([]) == []
+
+    def test_message_text_from_rasa_message(self):
+        """Test del texto de un mensaje de Rasa con imagen y botones"""
+        message = {"text": "Elegí una opción ", "image": "https://cdn/x.png",
+                   "buttons": [{"title": "Cotizar", "payload": "/quote"}, {"title": "Asesor", "payload": "/human"}]}
+        assert message_text(message) == "Elegí una opción\nhttps://cdn/x.png\n- Cotizar\n- Asesor"
+
+    def test_token_bucket(self):
+        """Test del token bucket: ráfaga inmediata y espera proporcional a la tasa"""
+        now = [0.0]
+        bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0])
+        assert bucket.reserve() == 0 and bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1)
+        assert bucket.reserve() == pytest.approx(0.2)
+        now[0] = 1.0
+        assert bucket.reserve() == 0
+
+
+class TestOutboundDispatcher:
+    """Pruebas del envío contra los stubs"""
+
+    def test_one_request_per_turn_with_coalesced_content(self):
+        """Test que los utter_message de un turno salen en un solo Create Message por la ruta pública"""
+        with chatwoot_stub() as chatwoot:
+            dispatcher = make_dispatcher(chatwoot).start()
+            dispatcher.submit(42, [{"text": "Encontré los siguientes productos:"}, {"text": "1. iPhone 15 Pro"},
+                                   {"text": "¿Querés una cotización?"}], contact_source_id="src-1")
+            assert dispatcher.drain(5)
+            dispatcher.stop()
+        [request] = posts(chatwoot)
+        assert request["path"] == "/public/api/v1/inboxes/7/contacts/src-1/conversations/42/messages"
+        assert request["body"]["content"] == ("Encontré los siguientes productos:\n\n1. iPhone 15 Pro\n\n"
+                                              "¿Querés una cotización?")
+        stats = dispatcher.stats()
+        assert stats["messages"] == 3 and stats["coalesced"] == 2 and stats["requests"] == 1
+        assert stats["hosts"] == [chatwoot.url]
+
+    def test_turns_queued_for_a_conversation_go_together(self):
+        """Test que los turnos acumulados de una conversación se envían juntos y en orden"""
+        with chatwoot_stub() as chatwoot:
+            dispatcher = make_dispatcher(chatwoot)
+            for turn in range(3):
+                dispatcher.submit(1, [{"text": f"turno {turn}"}], contact_source_id="src-1")
+            dispatcher.start()
+            assert dispatcher.drain(5)
+            dispatcher.stop()
+        assert [r["body"]["content"] for r in posts(chatwoot)] == ["turno 0\n\nturno 1\n\nturno 2"]
+
+    def test_order_kept_per_conversation_across_workers(self):
+        """Test que cada conversación recibe sus turnos en el orden de envío con varios workers"""
+        with chatwoot_stub(latency=0.002) as chatwoot:
+            dispatcher = make_dispatcher(chatwoot, workers=4).start()
+            for turn in range(5):
+                for conversation in range(12):
+                    dispatcher.submit(conversation, [{"text": f"c{conversation}-t{turn}"}], contact_source_id="src")
+            assert dispatcher.drain(10)
+            dispatcher.stop()
+        received = {}
+        for request in posts(chatwoot):
+            conversation = request["path"].split("/conversations/")[1].split("/")[0]
+            received.setdefault(conversation, []).extend(request["body"]["content"].split("\n\n"))
+        assert len(received) == 12
+        for conversation, texts in received.items():
+            assert texts == [f"c{conversation}-t{turn}" for turn in range(5)]
+
+    def test_rate_limited_per_whatsapp_number(self):
+        """Test que los envíos de un mismo número respetan la tasa y otro número no espera"""
+        with chatwoot_stub() as chatwoot:
+            dispatcher = make_dispatcher(chatwoot, workers=4, rate_per_second=20, burst=2).start()
+            for conversation in range(6):
+                dispatcher.submit(conversation, [{"text": "hola"}], contact_source_id="src", number="+59899000001")
+            dispatcher.submit(99, [{"text": "hola"}], contact_source_id="src", number="+59899000002")
+            assert dispatcher.drain(5)
+            dispatcher.stop()
+        throttled = [r["received_at"] for r in posts(chatwoot) if "/conversations/99/" not in r["path"]]
+        # 6 envíos con ráfaga de 2 a 20/s: al menos 4 x 50 ms entre el primero y el último
+        assert max(throttled) - min(throttled) >= 0.15
+        assert dispatcher.stats()["numbers"] == 2 and dispatcher.stats()["rate_limited_seconds"] > 0
+
+    def test_retries_transient_failures_and_drops_rejected(self):
+        """Test que un 503 y un 429 con Retry-After se reintentan y un 4xx se descarta"""
+        with chatwoot_stub() as chatwoot:
+            throttled = {"count": 0}
+
+            def too_many_then_ok(request):
+                throttled["count"] += 1
+                return (429, {"error": "slow down"}) if throttled["count"] == 1 else (200, {"id": 1})
+
+            chatwoot.route("POST", "/public/api/v1/inboxes/7/contacts/src-429/", too_many_then_ok)
+            chatwoot.route("POST", "/public/api/v1/inboxes/7/contacts/bad/", lambda request: (422, {"error": "invalid"}))
+            chatwoot.fail_next = 1
+            sheets = FakeSheets()
+            dispatcher = make_dispatcher(chatwoot, workers=1, sheets=sheets).start()
+            dispatcher.submit(1, [{"text": "uno"}], contact_source_id="src")
+            dispatcher.submit(2, [{"text": "dos"}], contact_source_id="src-429")
+            dispatcher.submit(3, [{"text": "tres"}], contact_source_id="bad")
+            assert dispatcher.drain(5)
+            dispatcher.stop()
+        stats = dispatcher.stats()
+        assert stats["retries"] == 2 and stats["failed_turns"] == 1
+        # Cada conversación reintenta por su cuenta: el orden entre conversaciones no está fijo
+        assert sorted(row[:2] for row in sheets.rows) == [["src", "uno"], ["src-429", "dos"]]
+
+    def test_waiting_conversation_does_not_block_its_shard(self):
+        """Test que una conversación en backoff no frena a las otras del mismo shard"""
+        with chatwoot_stub() as chatwoot:
+            chatwoot.route("POST", "/public/api/v1/inboxes/7/contacts/down/",
+                           lambda request: (503, {"error": "unavailable"}))
+            dispatcher = make_dispatcher(chatwoot, workers=1, backoff_base=0.2, max_attempts=3).start()
+            dispatcher.submit(1, [{"text": "falla"}], contact_source_id="down")
+            time.sleep(0.05)
+            dispatcher.submit(2, [{"text": "sale"}], contact_source_id="src")
+            assert dispatcher.drain(5)
+            dispatcher.stop()
+        received = [(r["path"].split("/contacts/")[1].split("/")[0], r["received_at"]) for r in posts(chatwoot)]
+        down = [at for contact, at in received if contact == "down"]
+        [ok] = [at for contact, at in received if contact == "src"]
+        assert len(down) == 3 and ok < down[1]
+        assert dispatcher.stats()["failed_turns"] == 1
+
+    def test_template_via_provider_in_order(self):
+        """Test que un template sale al proveedor de WhatsApp después de los textos previos"""
+        with chatwoot_stub() as chatwoot, waba_stub() as waba:
+            sheets = FakeSheets()
+            dispatcher = make_dispatcher(chatwoot, waba, waba_token="token", sheets=sheets)
+            dispatcher.submit(5, [{"text": "Te enviamos la cotización"}], contact_source_id="src", contact_id="c-5")
+            dispatcher.submit_template(5, to="59899123456", template="cotizacion_inicial", parameters=["Juan"],
+                                       contact_id="c-5")
+            dispatcher.start()
+            assert dispatcher.drain(5)
+            dispatcher.stop()
+        [request] = posts(waba)
+        assert request["headers"]["Authorization"] == "Bearer token"
+        assert request["body"]["template"]["name"] == "cotizacion_inicial"
+        assert request["body"]["template"]["components"][0]["parameters"] == [{"type": "text", "text": "Juan"}]
+        assert posts(chatwoot)[0]["received_at"] <= request["received_at"]
+        assert [row[1] for row in sheets.rows] == ["Te enviamos la cotización", "[template cotizacion_inicial]"]
+
+    def test_http_service(self):
+        """Test del servicio: POST /turns encola (202), 400 sin campos y GET /stats"""
+        with chatwoot_stub() as chatwoot:
+            dispatcher = make_dispatcher(chatwoot).start()
+            server = start_outbound_server(dispatcher, 0, "127.0.0.1")
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                body = json.dumps({"conversation_id": 8, "contact_source_id": "src",
+                                   "messages": [{"text": "hola"}, {"text": "¿en qué te ayudo?"}]}).encode()
+                with urllib.request.urlopen(urllib.request.Request(f"{base}/turns", data=body, method="POST")) as response:
+                    assert response.status == 202
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(urllib.request.Request(f"{base}/turns", data=b"{}", method="POST"))
+                assert error.value.code == 400
+                assert dispatcher.drain(5)
+                with urllib.request.urlopen(f"{base}/stats") as response:
+                    assert json.loads(response.read())["requests"] == 1
+            finally:
+                server.shutdown()
+                dispatcher.stop()
+        assert posts(chatwoot)[0]["body"]["content"] == "hola\n\n¿en qué te ayudo?"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-outbound-dispatcher-v1
+# version: 3.1.0
+# file: tests/test_outbound_dispatcher.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,125 @@
+# AUTO-ATC Playbook v3 - Tests para el mantenimiento de particiones
+# Pruebas unitarias de partition_maintenance.py con una conexión falsa
+
+import pytest
+import sys
+import os
+from datetime import date
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from partition_maintenance import (
+    PartitionMaintenance, RetentionPolicy, add_months, expired_before, partition_month, policies_from_env,
+)
+from unittest.mock import MagicMock, patch
+
+MESSAGES = RetentionPolicy("messages", "created_at", 3)
+TODAY = date(2026, 10, 17)
+
+
+class FakeCatalog:
+    """Cursor falso que responde a las consultas de catálogo y registra las sentencias"""
+
+    def __init__(self, partitions, partitioned=True):
+        self.partitions = list(partitions)
+        self.partitioned = partitioned
+        self.statements = []
+        self.cursor = MagicMock()
+        self.cursor.execute.side_effect = self._execute
+        self.cursor.rowcount = 0
+        self.conn = MagicMock()
+        self.conn.cursor.return_value.__enter__.return_value = self.cursor
+
+    def _execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+        if "pg_partitioned_table" in sql:
+            self.cursor.fetchone.return_value = (self.partitioned,)
+        elif "pg_inherits" in sql:
+            self.cursor.fetchall.return_value = [(name,) for name in self.partitions]
+        elif "create_monthly_partition" in sql:
+            table, _column, month = params
+            name = f"{table}_p{month:%Y%m}"
+            self.partitions.append(name)
+            self.cursor.fetchone.return_value = (name,)
+
+    def executed(self, prefix):
+        return [sql for sql, _ in self.statements if sql.startswith(prefix)]
+
+
+class TestHelpers:
+    """Pruebas de fechas y nombres"""
+
+    def test_add_months_and_cutoff(self):
+        """Test aritmética de meses y primer mes conservado"""
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert expired_before(MESSAGES, TODAY) == date(2026, 7, 1)
+        assert expired_before(MESSAGES._replace(retention_months=0), TODAY) is None
+
+    def test_partition_month(self):
+        """Test que solo los nombres <tabla>_pYYYYMM son particiones mensuales"""
+        assert partition_month("messages", "messages_p202610") == date(2026, 10, 1)
+        assert partition_month("messages", "messages_default") is None
+        assert partition_month("messages", "messages_p202613") is None
+        assert partition_month("error_logs", "messages_p202610") is None
+
+    def test_policies_from_env(self):
+        """Test retención configurable por tabla"""
+        with patch.dict(os.environ, {"MESSAGES_RETENTION_MONTHS": "24"}):
+            policies = {policy.table: policy for policy in policies_from_env()}
+        assert policies["messages"].retention_months == 24
+        assert policies["performance_metrics"].column == "recorded_at"
+
+
+class TestPartitionMaintenance:
+    """Pruebas de creación y retención"""
+
+    def test_creates_missing_months_and_drops_expired(self):
+        """Test particiones adelantadas, detach + drop de las vencidas y purga de la default"""
+        catalog = FakeCatalog(["messages_default", "messages_p202605", "messages_p202606",
+                               "messages_p202607", "messages_p202610"])
+        report = PartitionMaintenance(catalog.conn, premake_months=2).run([MESSAGES], TODAY)
+
+        assert report["messages"]["created"] == ["messages_p202611", "messages_p202612"]
+        assert report["messages"]["expired"] == ["messages_p202605", "messages_p202606"]
+        assert catalog.executed("ALTER TABLE") == [
+            'ALTER TABLE "messages" DETACH PARTITION "messages_p202605"',
+            'ALTER TABLE "messages" DETACH PARTITION "messages_p202606"',
+        ]
+        assert catalog.executed("DROP TABLE") == ['DROP TABLE "messages_p202605"', 'DROP TABLE "messages_p202606"']
+        purge = [(sql, params) for sql, params in catalog.statements if sql.startswith("DELETE")]
+        assert purge == [('DELETE FROM "messages_default" WHERE "created_at" < %s', (date(2026, 7, 1),))]
+
+    def test_detach_only_and_dry_run(self):
+        """Test modo archivo (sin DROP) y modo dry-run (sin cambios)"""
+        catalog = FakeCatalog(["messages_p202601", "messages_p202610"])
+        PartitionMaintenance(catalog.conn, premake_months=0, drop=False).run([MESSAGES], TODAY)
+        assert catalog.executed("ALTER TABLE") == ['ALTER TABLE "messages" DETACH PARTITION "messages_p202601"']
+        assert catalog.executed("DROP TABLE") == []
+
+        catalog = FakeCatalog(["messages_p202601"])
+        report = PartitionMaintenance(catalog.conn, premake_months=1, dry_run=True).run([MESSAGES], TODAY)
+        assert report["messages"] == {"created": ["messages_p202610", "messages_p202611"], "expired": ["messages_p202601"]}
+        assert catalog.executed("SELECT create_monthly_partition") == []
+        assert catalog.executed("ALTER TABLE") == []
+        catalog.conn.commit.assert_not_called()
+
+    def test_skips_unpartitioned_table(self):
+        """Test que una tabla sin migrar no se toca"""
+        catalog = FakeCatalog([], partitioned=False)
+        report = PartitionMaintenance(catalog.conn).run([MESSAGES], TODAY)
+        assert report == {"messages": {"skipped": "not partitioned"}}
+        assert len(catalog.statements) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-partition-maintenance-v1
+# version: 3.1.0
+# file: tests/test_partition_maintenance.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,106 @@
+# AUTO-ATC Playbook v3 - Tests para el enmascarado de PII
+# Pruebas unitarias de pii.py (tipos, offsets, batch y saneamiento)
+
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from pii import PIIMasker, PIIMatch, clean_text, find_pii, luhn_valid, mask_batch, mask_pii, sanitize
+
+
+class TestMasking:
+    """Pruebas de detección y reemplazo"""
+
+    def test_masks_each_kind(self):
+        """Test emails, teléfonos, documentos y tarjetas en una pasada"""
+        text = ("Soy ana.p@example.com.uy, cel +598 99 123 456 o 2901-1234, CI 1.234.567-8, "
+                "CUIT 20-12345678-9, tarjeta 4111 1111 1111 1111")
+        assert mask_pii(text) == ("Soy [EMAIL], cel [PHONE] o [PHONE], CI [DOC], "
+                                  "CUIT [DOC], tarjeta [CARD]")
+
+    def test_keeps_prices_dates_and_quantities(self):
+        """Test que precios, fechas, cantidades y SKUs no se enmascaran"""
+        text = "3 laptops DELL-XPS13 a 1299.00 el 2026-10-17, modelo 15-3520"
+        assert mask_pii(text) == text
+        text = "Precio: $1.299.000 (antes $1.450.000), cuotas de $ 108.250"
+        assert mask_pii(text) == text
+        assert mask_pii("CI 1.234.567 y ci: 4.567.890") == "CI [DOC] y ci: [DOC]"
+
+    def test_keeps_specs_skus_and_order_numbers(self):
+        """Test que resoluciones, SKUs y números de orden no se leen como teléfonos"""
+        for text in ("TV 55 pulgadas 4K 3840 2160", "SKU 1234-5678-9012", "orden 2025-001234"):
+            assert mask_pii(text) == text
+        assert mask_pii("tel (02) 2901 1234 o 099 123 456") == "tel [PHONE] o [PHONE]"
+
+    def test_fallbacks_to_num(self):
+        """Test tarjeta sin Luhn válido y corridas de 6+ dígitos como en el nodo de n8n"""
+        assert luhn_valid("4111111111111111") and not luhn_valid("4111111111111112")
+        assert mask_pii("4111111111111112 pedido 123456 y 12345") == "[NUM] pedido [NUM] y 12345"
+
+    def test_spans_refer_to_original_text(self):
+        """Test offsets de cada hallazgo sobre el texto original"""
+        text = "x 099123456 y a@b.co"
+        masked, found = PIIMasker().mask_with_spans(text)
+        assert masked == "x [PHONE] y [EMAIL]"
+        assert found == [PIIMatch("phone", 2, 11, "099123456"), PIIMatch("email", 14, 20, "a@b.co")]
+        assert [text[m.start:m.end] for m in find_pii(text)] == ["099123456", "a@b.co"]
+
+    def test_kinds_subset(self):
+        """Test que solo se enmascaran los tipos pedidos"""
+        masker = PIIMasker(kinds=["email"])
+        assert masker.mask("a@b.co 099123456") == "[EMAIL] 099123456"
+        with pytest.raises(ValueError):
+            PIIMasker(kinds=["iban"])
+
+
+class TestBatch:
+    """Pruebas de la API batch"""
+
+    def test_batch_matches_single(self):
+        """Test que el lote da lo mismo que texto por texto y conserva None/vacíos"""
+        texts = ["hola 099123456", None, "", "sin datos", "a@b.co", "4111 1111 1111 1111"]
+        assert mask_batch(texts) == [mask_pii(text) for text in texts]
+        assert mask_batch([]) == []
+
+    def test_separator_in_text_falls_back(self):
+        """Test textos con el separador interno enmascarados de a uno"""
+        assert mask_batch(["a\x00099123456", "b@c.co"]) == ["a\x00[PHONE]", "[EMAIL]"]
+
+    def test_mask_fields(self):
+        """Test dict con claves conservadas"""
+        record = {"producto": "laptop 099123456", "email": "a@b.co", "cantidad": 2}
+        masked = PIIMasker().mask_fields(record, keep=["email"])
+        assert masked == {"producto": "laptop [PHONE]", "email": "a@b.co", "cantidad": 2}
+        assert record["producto"] == "laptop 099123456"
+        assert PIIMasker().mask_fields({"producto": "laptop 099123456", "notas": "a@b.co"}, only=["notas"]) == \
+            {"producto": "laptop 099123456", "notas": "[EMAIL]"}
+
+
+class TestSanitize:
+    """Pruebas del saneamiento"""
+
+    def test_sanitize(self):
+        """Test markup, caracteres de control y de ancho cero, espacios y longitud"""
+        assert sanitize(" <b>hola</b>​  mundo\x07 < ") == "hola mundo"
+        assert sanitize("línea 1\nlínea 2") == "línea 1\nlínea 2"
+        assert sanitize("abcdef", max_length=3) == "abc"
+        assert sanitize(None) is None
+
+    def test_clean_text(self):
+        """Test saneamiento + enmascarado"""
+        assert clean_text("<i>mail:</i> a@b.co") == "mail: [EMAIL]"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-pii-v1
+# version: 3.1.0
+# file: tests/test_pii.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,154 @@
+# AUTO-ATC Playbook v3 - Tests para el vencimiento de cotizaciones
+# Pruebas de quote_sweeper.py con una tabla quotes falsa en memoria que reproduce el
+# lote por keyset y los advisory locks
+
+import pytest
+import sys
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from metrics import MetricsRegistry
+from quote_sweeper import OPEN_STATUSES, QuoteSweeper
+from unittest.mock import MagicMock, patch
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+class FakeQuotes:
+    """Tabla quotes y advisory locks compartidos por varias conexiones falsas"""
+
+    def __init__(self, quotes):
+        self.quotes = {quote["id"]: dict(quote) for quote in quotes}
+        self.lock_owner = None
+        self.batches = []
+        self.fail_on_batch = None
+
+    def connection(self, name):
+        state = {"result": None}
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda sql, params=None: state.update(result=self._execute(name, sql, params))
+        cursor.fetchone.side_effect = lambda: state["result"][0]
+        cursor.fetchall.side_effect = lambda: state["result"]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        @contextmanager
+        def get_connection():
+            yield conn
+        return get_connection
+
+    def _execute(self, owner, sql, params):
+        if "pg_try_advisory_lock" in sql:
+            acquired = self.lock_owner in (None, owner)
+            if acquired:
+                self.lock_owner = owner
+            return [(acquired,)]
+        if "pg_advisory_unlock" in sql:
+            self.lock_owner = None
+            return [(True,)]
+        if "count(*)" in sql:
+            status, cutoff = params
+            return [(sum(1 for q in self.quotes.values() if q["status"] == status and q["valid_until"] < cutoff),)]
+        if "UPDATE quotes" in sql:
+            if self.fail_on_batch is not None and len(self.batches) == self.fail_on_batch:
+                raise RuntimeError("connection lost")
+            after = (params["after_valid_until"] or datetime.min, params["after_id"])
+            due = sorted(
+                (q for q in self.quotes.values()
+                 if q["status"] == params["status"] and q["valid_until"] < params["cutoff"]
+                 and (q["valid_until"], q["id"]) > after),
+                key=lambda q: (q["valid_until"], q["id"]),
+            )[:params["limit"]]
+            self.batches.append((params["status"], after, len(due)))
+            for quote in due:
+                quote["status"] = "expired"
+            return [(q["id"], q["valid_until"]) for q in due]
+        raise AssertionError(f"unexpected SQL: {sql}")
+
+
+def make_quotes():
+    quotes, next_id = [], 1
+    for status, count, offset in (("draft", 1200, -1), ("sent", 30, -2), ("draft", 40, 3), ("accepted", 20, -5)):
+        for i in range(count):
+            quotes.append({"id": next_id, "status": status, "valid_until": NOW + timedelta(days=offset, minutes=i % 7)})
+            next_id += 1
+    return quotes
+
+
+@pytest.fixture(autouse=True)
+def no_metrics_insert():
+    with patch("quote_sweeper.psycopg2.extras.execute_values") as execute_values:
+        yield execute_values
+
+
+class TestQuoteSweeper:
+    """Pruebas del barrido"""
+
+    def test_expires_due_open_quotes_in_keyset_batches(self, no_metrics_insert):
+        """Test que solo vencen draft/sent con valid_until pasado, en lotes que avanzan por keyset"""
+        table = FakeQuotes(make_quotes())
+        registry = MetricsRegistry()
+        sweeper = QuoteSweeper(table.connection("a"), batch_size=500, registry=registry)
+
+        report = sweeper.sweep(cutoff=NOW)
+
+        assert report["statuses"] == {"draft": {"expired": 1200, "batches": 3}, "sent": {"expired": 30, "batches": 1}}
+        assert report["expired"] == 1230
+        statuses = [q["status"] for q in table.quotes.values()]
+        assert statuses.count("expired") == 1230 and statuses.count("draft") == 40 and statuses.count("accepted") == 20
+        draft_batches = [after for status, after, _ in table.batches if status == "draft"]
+        assert draft_batches == sorted(draft_batches) and len(set(draft_batches)) == len(draft_batches)
+        assert table.lock_owner is None
+        assert sweeper.stats()["expired"] == 1230
+        assert "quote_sweeper" in registry.render_prometheus()
+        rows = no_metrics_insert.call_args.args[2]
+        assert [row[:2] for row in rows][0] == ("quotes_expired", 1230)
+
+    def test_concurrent_instance_skips_while_locked(self):
+        """Test que con el lock tomado por otra instancia el barrido no toca la tabla"""
+        table = FakeQuotes(make_quotes())
+        table.lock_owner = "other-instance"
+        sweeper = QuoteSweeper(table.connection("a"))
+        report = sweeper.sweep(cutoff=NOW)
+        assert "skipped" in report and table.batches == []
+        assert sweeper.stats()["skipped"] == 1
+
+    def test_dry_run_counts_without_updating(self):
+        """Test que --dry-run solo cuenta"""
+        table = FakeQuotes(make_quotes())
+        report = QuoteSweeper(table.connection("a")).sweep(cutoff=NOW, dry_run=True)
+        assert report["statuses"] == {"draft": {"due": 1200}, "sent": {"due": 30}}
+        assert all(q["status"] != "expired" for q in table.quotes.values())
+
+    def test_releases_lock_on_failure(self):
+        """Test que una falla a mitad del barrido libera el advisory lock y se cuenta"""
+        table = FakeQuotes(make_quotes())
+        table.fail_on_batch = 1
+        sweeper = QuoteSweeper(table.connection("a"), batch_size=500)
+        with pytest.raises(RuntimeError):
+            sweeper.sweep(cutoff=NOW)
+        assert table.lock_owner is None and sweeper.stats()["errors"] == 1
+
+    def test_schema_has_matching_partial_index(self):
+        """Test que schema.sql tiene el índice parcial que usa el lote (status, valid_until, id)"""
+        schema = open(os.path.join(os.path.dirname(__file__), '..', 'db', 'schema.sql')).read()
+        match = re.search(r"idx_quotes_open_valid_until ON quotes\(status, valid_until, id\) WHERE status IN \(([^)]*)\)", schema)
+        assert match
+        assert tuple(s.strip().strip("'") for s in match.group(1).split(",")) == OPEN_STATUSES
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-quote-sweeper-v1
+# version: 3.1.0
+# file: tests/test_quote_sweeper.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,283 @@
+# AUTO-ATC Playbook v3 - Tests para la capa de resiliencia
+# Pruebas de resilience.py (breaker, timeouts adaptativos, hedging) con stubs locales
+# que inyectan fallas y latencia
+
+import pytest
+import sys
+import os
+import time
+import asyncio
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+sys.path.append(os.path.dirname(__file__))
+
+import httpx
+import requests
+
+from actions import DatabaseManager
+from embeddings import HashingEmbedder
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker, CircuitOpenError, Dependency, DependencyTimeout,
+)
+from sheets_writer import SheetsBatchWriter
+from stub_servers import StubServer, sheets_stub
+from unittest.mock import Mock
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulated_call(dependency, latency):
+    """Misma contabilidad que Dependency.call con una latencia fija, sin dormir"""
+    timeout = dependency._admit()
+    if latency > timeout:
+        dependency._failure(timed_out=True, seconds=timeout)
+        raise DependencyTimeout(f"{dependency.name} exceeded {timeout * 1000:.0f}ms")
+    dependency._success(latency)
+
+
+def fast_dependency(**kwargs):
+    """Dependencia con ventana chica para que el p95 se aprenda en pocas llamadas"""
+    options = {"initial": 1.0, "minimum": 0.05, "maximum": 1.0, "min_samples": 5}
+    options.update(kwargs)
+    return Dependency("stub", breaker=CircuitBreaker("stub", failure_threshold=3, reset_timeout=60),
+                      timeout=AdaptiveTimeout(**options))
+
+
+def slow_first_stub(slow_seconds=0.5):
+    """Stub de búsqueda: el request marcado como lento tarda `slow_seconds`, el resto responde enseguida"""
+    server = StubServer()
+    state = {"slow_next": False}
+    lock = threading.Lock()
+
+    def search(request):
+        with lock:
+            slow, state["slow_next"] = state["slow_next"], False
+        if slow:
+            time.sleep(slow_seconds)
+        return 200, {"result": [{"id": 1, "payload": {"title": "Laptop", "slow": slow}}]}
+    server.route("POST", "/collections/", search)
+    return server, state
+
+
+class TestCircuitBreaker:
+    """Pruebas de estados del breaker"""
+
+    def test_opens_half_opens_and_closes(self):
+        """Test closed -> open tras N fallas -> half-open tras el reset -> closed con una prueba exitosa"""
+        clock = FakeClock()
+        breaker = CircuitBreaker("qdrant", failure_threshold=3, reset_timeout=10, clock=clock)
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.record_success()
+        for _ in range(3):
+            assert breaker.allow()
+            breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow()
+
+        clock.now = 10
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() and not breaker.allow()  # una sola prueba
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        """Test que una falla en half-open vuelve a abrir por otro período completo"""
+        clock = FakeClock()
+        breaker = CircuitBreaker("sheets", failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        assert breaker.allow()
+        breaker.record_failure()
+        clock.now = 9
+        assert breaker.state == OPEN
+
+
+class TestDependency:
+    """Pruebas de timeouts adaptativos y hedging"""
+
+    def test_adaptive_timeout(self):
+        """Test timeout inicial hasta tener muestras, luego p99 x multiplicador acotado"""
+        timeouts = AdaptiveTimeout(initial=1.0, minimum=0.05, maximum=0.5, min_samples=5)
+        assert timeouts.current == 1.0
+        for _ in range(5):
+            timeouts.observe(0.01)
+        assert timeouts.current == 0.05
+        for _ in range(5):
+            timeouts.observe(0.2)
+        assert timeouts.current == 0.4
+        timeouts.observe(2.0)
+        assert timeouts.current == 0.5
+
+    def test_timeouts_open_circuit_and_fail_fast(self):
+        """Test que las llamadas lentas cortan en el timeout y, con el circuito abierto, ni se intentan"""
+        dependency = fast_dependency(initial=0.05)
+        slow = Mock(side_effect=lambda: time.sleep(0.3))
+        for _ in range(3):
+            with pytest.raises(DependencyTimeout):
+                dependency.call(slow)
+        calls = slow.call_count
+
+        start = time.perf_counter()
+        with pytest.raises(CircuitOpenError):
+            dependency.call(slow)
+        assert time.perf_counter() - start < 0.01
+        assert slow.call_count == calls
+        assert dependency.stats()["timeouts"] == 3 and dependency.stats()["rejected"] == 1
+
+    def test_recovers_when_latency_rises_above_window(self):
+        """Test que si la dependencia pasa de 5 ms a 30 ms el timeout sube y el circuito vuelve a cerrar"""
+        clock = FakeClock()
+        dependency = Dependency("stub", breaker=CircuitBreaker("stub", failure_threshold=3, reset_timeout=30,
+                                                               clock=clock),
+                                timeout=AdaptiveTimeout(initial=1.0, minimum=0.02, maximum=1.0, min_samples=5,
+                                                        window=50))
+        for _ in range(30):
+            simulated_call(dependency, 0.005)
+        assert dependency.timeout == pytest.approx(0.02)
+
+        outcomes = []
+        for _ in range(30):
+            try:
+                simulated_call(dependency, 0.03)
+                outcomes.append(True)
+            except CircuitOpenError:
+                clock.now += 31
+                outcomes.append(False)
+            except DependencyTimeout:
+                outcomes.append(False)
+        assert all(outcomes[-20:])
+        assert dependency.breaker.state == CLOSED and dependency.timeout > 0.03
+
+    def test_half_open_probe_uses_maximum_timeout(self):
+        """Test que la prueba de half-open espera hasta el máximo y no el timeout aprendido"""
+        clock = FakeClock()
+        dependency = Dependency("stub", breaker=CircuitBreaker("stub", failure_threshold=1, reset_timeout=30,
+                                                               clock=clock),
+                                timeout=AdaptiveTimeout(initial=0.02, minimum=0.02, maximum=1.0, min_samples=100))
+        with pytest.raises(DependencyTimeout):
+            dependency.call(time.sleep, 0.05)
+        assert dependency.breaker.state == OPEN
+        clock.now += 31
+        dependency.call(time.sleep, 0.05)
+        assert dependency.breaker.state == CLOSED
+
+    def test_hedged_read_against_slow_stub(self):
+        """Test que un request lento se cubre con un segundo intento al p95 observado"""
+        server, state = slow_first_stub()
+        dependency = fast_dependency()
+        session = requests.Session()
+
+        def search():
+            response = session.post(f"{server.url}/collections/products/points/search", json={"top": 1}, timeout=5)
+            response.raise_for_status()
+            return response.json()["result"]
+
+        with server:
+            for _ in range(5):
+                dependency.call(search, hedge=True)
+            state["slow_next"] = True
+            start = time.perf_counter()
+            result = dependency.call(search, hedge=True)
+            elapsed = time.perf_counter() - start
+
+        assert result[0]["payload"]["slow"] is False
+        assert elapsed < 0.3
+        assert dependency.stats()["hedges"] == 1 and dependency.stats()["hedge_wins"] == 1
+
+    def test_async_hedged_read(self):
+        """Test del hedging async con httpx contra el mismo stub"""
+        server, state = slow_first_stub()
+        dependency = fast_dependency()
+
+        async def run():
+            async with httpx.AsyncClient() as client:
+                async def search():
+                    response = await client.post(f"{server.url}/collections/products/points/search", json={})
+                    response.raise_for_status()
+                    return response.json()["result"]
+                for _ in range(5):
+                    await dependency.acall(search, hedge=True)
+                state["slow_next"] = True
+                return await dependency.acall(search, hedge=True)
+
+        with server:
+            result = asyncio.run(run())
+        assert result[0]["payload"]["slow"] is False
+        assert dependency.stats()["hedge_wins"] == 1
+
+    def test_guard_counts_failures(self):
+        """Test que guard registra fallas sin correr en otro hilo"""
+        dependency = fast_dependency()
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                with dependency.guard():
+                    raise RuntimeError("connection refused")
+        with pytest.raises(CircuitOpenError):
+            with dependency.guard():
+                pass
+
+
+class TestDegradedResponses:
+    """Pruebas de respuestas degradadas y de Sheets con el circuito abierto"""
+
+    def test_vector_search_served_from_cache_when_qdrant_fails(self):
+        """Test que con Qdrant caído se responde con los últimos candidatos de la query"""
+        db = DatabaseManager(embedder=HashingEmbedder(dim=16))
+        # El primer intento importa los modelos de qdrant_client: timeout amplio para no depender de eso
+        db.qdrant_dependency = fast_dependency(initial=5.0, maximum=5.0)
+        db.qdrant_client = Mock()
+        db.qdrant_client.collection_exists.return_value = True
+        hit = Mock(payload={"title": "Laptop Dell XPS 13", "content": "i7", "category": "computadoras", "price": 1299})
+        db.qdrant_client.query_points.return_value = Mock(points=[hit])
+
+        fresh = db._vector_candidates("laptop dell", 3)
+        db.qdrant_client.query_points.side_effect = ConnectionError("qdrant down")
+        for _ in range(3):
+            assert db._vector_candidates("Laptop  Dell", 3) == fresh
+        assert db.qdrant_dependency.breaker.state == OPEN
+
+        calls = db.qdrant_client.query_points.call_count
+        assert db._vector_candidates("laptop dell", 3) == fresh
+        assert db.qdrant_client.query_points.call_count == calls
+        with pytest.raises(CircuitOpenError):
+            db._vector_candidates("iphone", 3)
+
+    def test_sheets_short_circuits_while_open(self, tmp_path):
+        """Test que con el circuito abierto el lote espera sin requests a Sheets"""
+        with sheets_stub() as server:
+            server.fail_next = 2
+            writer = SheetsBatchWriter(
+                url=f"{server.url}/v4/spreadsheets/test/values/Cotizaciones!A1:append",
+                spool_path=str(tmp_path / "outbox.jsonl"), backoff_base=0.01, backoff_max=0.01,
+                dependency=Dependency("sheets", breaker=CircuitBreaker("sheets", failure_threshold=2, reset_timeout=60)),
+            )
+            writer.enqueue(["quote-1"])
+            assert writer.flush() == 0 and writer.flush() == 0
+            assert writer.flush() == 0
+
+            assert len(server.requests) == 2
+            assert writer.stats()["short_circuited"] == 1 and writer.stats()["pending"] == 1
+
+            writer.dependency.breaker.reset_timeout = 0
+            assert writer.flush() == 1
+        assert writer.dependency.breaker.state == CLOSED
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-resilience-v1
+# version: 3.1.0
+# file: tests/test_resilience.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
@@ -0,0 +1,105 @@
+# AUTO-ATC Playbook v3 - Tests para las plantillas de respuesta
+# Pruebas de responses.py: listado de productos, calendario laboral cacheado,
+# feriados, zona horaria y saludo
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from responses import BusinessSchedule, ListingTemplate, describe_hours, parse_holidays, parse_hours
+
+MONTEVIDEO = ZoneInfo("America/Montevideo")
+RESULTS = [
+    {"title": "Laptop Dell XPS 13", "content": "Intel i7, 16GB RAM", "category": "computadoras", "price": 1299.0},
+    {"title": "iPhone 15 Pro", "content": "256GB", "category": "celulares", "price": 999.0},
+]
+
+
+def at(year, month, day, hour, minute=0):
+    return datetime(year, month, day, hour, minute, tzinfo=MONTEVIDEO).timestamp()
+
+
+def concatenated(results):
+    """Formato previo (concatenación) como referencia"""
+    response = "Encontré los siguientes productos:\n\n"
+    for i, product in enumerate(results, 1):
+        response += f"{i}. {product['title']}\n"
+        response += f"   {product['content']}\n\n"
+    return response
+
+
+class TestListingTemplate:
+    """Pruebas del listado"""
+
+    def test_same_text_as_concatenation_and_memoized_blocks(self):
+        """Test que el listado coincide con el formato previo y reutiliza los bloques por producto"""
+        template = ListingTemplate()
+        assert template.render(RESULTS) == concatenated(RESULTS)
+        assert template.render(list(reversed(RESULTS))) == concatenated(list(reversed(RESULTS)))
+        assert template.stats()["misses"] == 2 and template.stats()["hits"] == 2
+
+        changed = [dict(RESULTS[0], content="Intel i7, 32GB RAM")]
+        assert "32GB" in template.render(changed)
+        assert template.stats()["misses"] == 3
+
+
+class TestBusinessSchedule:
+    """Pruebas del calendario"""
+
+    def test_parse_and_describe_hours(self):
+        """Test del formato de BUSINESS_HOURS y del texto del horario"""
+        hours = parse_hours("mon-fri 09:00-18:00; sat 09:00-13:00")
+        assert hours[0] == [(540, 1080)] and hours[5] == [(540, 780)] and 6 not in hours
+        assert describe_hours(parse_hours("mon-fri 09:00-18:00")) == "de lunes a viernes de 9:00 a 18:00"
+        assert describe_hours(hours) == "de lunes a viernes de 9:00 a 18:00, el sábado de 9:00 a 13:00"
+        with pytest.raises(ValueError):
+            parse_hours("mon 18:00-09:00")
+
+    def test_open_closed_holidays_and_timezone(self):
+        """Test de apertura y cierre en la zona horaria configurada y de los feriados"""
+        schedule = BusinessSchedule(parse_hours("mon-fri 09:00-18:00"), parse_holidays("2026-10-19"))
+        assert schedule.is_open(at(2026, 10, 16, 9, 0))          # viernes
+        assert not schedule.is_open(at(2026, 10, 16, 18, 0))
+        assert not schedule.is_open(at(2026, 10, 17, 12, 0))     # sábado
+        assert not schedule.is_open(at(2026, 10, 19, 10, 0))     # feriado
+        assert schedule.is_open(at(2026, 10, 20, 10, 0))
+        # 13:00 UTC = 10:00 en Montevideo (UTC-3)
+        assert schedule.is_open(datetime(2026, 10, 20, 13, 0, tzinfo=ZoneInfo("UTC")).timestamp())
+
+        is_open, text = schedule.status_text(at(2026, 10, 17, 12, 0))
+        assert not is_open and text == ("Hola! Actualmente estamos fuera de horario laboral. Nuestro horario es "
+                                        "de lunes a viernes de 9:00 a 18:00. ¿Te gustaría dejar un mensaje?")
+
+    def test_state_cached_until_next_boundary(self):
+        """Test que el estado se evalúa una vez por tramo y se recalcula al cruzar el cierre"""
+        schedule = BusinessSchedule(parse_hours("mon-fri 09:00-18:00"))
+        for minute in range(0, 60, 5):
+            assert schedule.is_open(at(2026, 10, 16, 10, minute))
+        assert schedule.evaluations == 1
+        assert not schedule.is_open(at(2026, 10, 16, 18, 0))
+        assert schedule.evaluations == 2
+
+    def test_greeting_by_local_time(self):
+        """Test del saludo por franja en la hora local"""
+        schedule = BusinessSchedule({})
+        assert schedule.greeting(at(2026, 10, 17, 8)) == "¡Buenos días!"
+        assert schedule.greeting(at(2026, 10, 17, 12)) == "¡Buenas tardes!"
+        assert schedule.greeting(at(2026, 10, 17, 23, 59)) == "¡Buenas noches!"
+        assert schedule.greeting(at(2026, 10, 18, 0, 1)) == "¡Buenos días!"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-responses-v1
+# version: 3.1.0
+# file: tests/test_responses.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
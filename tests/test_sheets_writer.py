@@ -0,0 +1,187 @@
+# AUTO-ATC Playbook v3 - Tests para el writer batch de Google Sheets
+# Pruebas de sheets_writer.py contra un servidor Sheets local (stub_servers)
+
+import pytest
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+sys.path.append(os.path.dirname(__file__))
+
+import sheets_writer
+from sheets_writer import SheetsBatchWriter, get_sheets_writer
+from stub_servers import StubServer, sheets_stub
+from unittest.mock import patch
+
+
+def make_writer(server, tmp_path, **kwargs):
+    options = {"batch_size": 3, "flush_interval_ms": 50, "backoff_base": 0.01, "backoff_max": 0.05}
+    options.update(kwargs)
+    return SheetsBatchWriter(
+        url=f"{server.url}/v4/spreadsheets/test/values/Cotizaciones!A1:append",
+        params={"valueInputOption": "USER_ENTERED", "key": "test"},
+        spool_path=str(tmp_path / "outbox.jsonl"),
+        **options,
+    )
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestSheetsBatchWriter:
+    """Pruebas para SheetsBatchWriter"""
+
+    def test_coalesces_rows_in_one_append(self, tmp_path):
+        """Test que N filas encoladas salen en un solo values:append"""
+        with sheets_stub() as server:
+            writer = make_writer(server, tmp_path, flush_interval_ms=10000)
+            for i in range(3):
+                writer.enqueue([f"row-{i}", "Laptop"])
+
+            assert writer.flush() == 3
+
+        assert len(server.requests) == 1
+        assert server.requests[0]["body"]["values"] == [["row-0", "Laptop"], ["row-1", "Laptop"], ["row-2", "Laptop"]]
+        assert server.requests[0]["query"]["key"] == "test"
+
+    def test_background_flush_by_size_and_interval(self, tmp_path):
+        """Test que el hilo envía al completar el lote y, con menos filas, al vencer el intervalo"""
+        with sheets_stub() as server:
+            writer = make_writer(server, tmp_path).start()
+            for i in range(4):
+                writer.enqueue([i])
+
+            assert wait_until(lambda: writer.stats()["flushed_rows"] == 4)
+            writer.stop()
+
+        sizes = [len(r["body"]["values"]) for r in server.requests]
+        assert sizes == [3, 1]
+
+    def test_retries_with_backoff_on_server_error(self, tmp_path):
+        """Test que un 503 se reintenta sin perder filas"""
+        with sheets_stub() as server:
+            server.fail_next = 2
+            writer = make_writer(server, tmp_path).start()
+            writer.enqueue(["a"])
+            writer.enqueue(["b"])
+
+            assert wait_until(lambda: writer.stats()["flushed_rows"] == 2)
+            writer.stop()
+
+        stats = writer.stats()
+        assert stats["failures"] == 2
+        assert stats["pending"] == 0
+        assert server.requests[-1]["body"]["values"] == [["a"], ["b"]]
+
+    def test_spool_survives_restart(self, tmp_path):
+        """Test que las filas no enviadas se recuperan del spool al reiniciar"""
+        with sheets_stub() as server:
+            server.fail_next = 1
+            writer = make_writer(server, tmp_path, flush_interval_ms=10000)
+            writer.enqueue(["pendiente"])
+            assert writer.flush() == 0
+            writer.close()
+
+            # "Reinicio": nuevo writer sobre el mismo spool
+            restarted = make_writer(server, tmp_path, flush_interval_ms=10000)
+            assert restarted.stats()["pending"] == 1
+            assert restarted.flush() == 1
+
+        assert server.requests[-1]["body"]["values"] == [["pendiente"]]
+        assert (tmp_path / "outbox.jsonl").read_text() == ""
+
+    def test_writers_sharing_a_spool_path(self, tmp_path):
+        """Test que dos writers con el mismo spool no se pisan ni duplican filas al adoptar"""
+        with sheets_stub() as server:
+            a = make_writer(server, tmp_path, flush_interval_ms=10000)
+            b = make_writer(server, tmp_path, flush_interval_ms=10000)
+            assert a.spool_path != b.spool_path
+            a.enqueue(["de-a"])
+            b.enqueue(["de-b"])
+
+            assert a.flush() == 1
+            assert b.stats()["pending"] == 1
+            assert "de-b" in open(b.spool_path).read()
+
+            # Mientras B vive nadie toma sus filas; al terminar B, un writer nuevo las adopta una vez
+            fresh = make_writer(server, tmp_path, flush_interval_ms=10000)
+            assert fresh.stats()["pending"] == 0
+            b.close()
+            assert fresh.adopt_orphans() == 1
+            assert fresh.adopt_orphans() == 0
+            assert fresh.flush() == 1
+            fresh.close()
+            a.close()
+
+            restarted = make_writer(server, tmp_path, flush_interval_ms=10000)
+            assert restarted.stats()["pending"] == 0
+
+        assert [r["body"]["values"] for r in server.requests] == [[["de-a"]], [["de-b"]]]
+
+    def test_client_error_moves_batch_to_dead_letter(self, tmp_path):
+        """Test que un 400 no se reintenta y el lote queda en .rejected"""
+        server = StubServer({("POST", "/v4/spreadsheets/"): lambda request: (400, {"error": "bad range"})})
+        with server:
+            writer = make_writer(server, tmp_path)
+            writer.enqueue(["malo"])
+
+            assert writer.flush() == 0
+
+        assert writer.stats()["pending"] == 0
+        assert writer.stats()["rejected_rows"] == 1
+        assert "malo" in (tmp_path / "outbox.jsonl.rejected").read_text()
+
+    def test_unreachable_endpoint_keeps_rows(self, tmp_path):
+        """Test que un error de red deja las filas en el spool"""
+        writer = SheetsBatchWriter(url="http://127.0.0.1:9/append", spool_path=str(tmp_path / "outbox.jsonl"), timeout=0.5)
+        writer.enqueue(["x"])
+
+        assert writer.flush() == 0
+        assert writer.stats()["pending"] == 1
+        assert writer.stats()["failures"] == 1
+
+
+class TestSheetsWriterFromEnv:
+    """Pruebas para la configuración por entorno"""
+
+    def test_not_configured_returns_none(self):
+        """Test que sin GOOGLE_SHEET_ID no se crea writer"""
+        with patch.dict(os.environ, {"GOOGLE_SHEET_ID": "", "GOOGLE_API_KEY": ""}), \
+                patch.object(sheets_writer, "_writer", None):
+            assert get_sheets_writer() is None
+
+    def test_endpoint_is_configurable(self, tmp_path):
+        """Test que SHEETS_API_URL redirige el append (servidor local en tests)"""
+        env = {
+            "GOOGLE_SHEET_ID": "abc",
+            "GOOGLE_API_KEY": "key",
+            "SHEETS_API_URL": "http://127.0.0.1:8080/",
+            "SHEETS_SPOOL_PATH": str(tmp_path / "spool.jsonl"),
+            "SHEETS_BATCH_SIZE": "25",
+        }
+        with patch.dict(os.environ, env):
+            writer = sheets_writer.sheets_writer_from_env()
+
+        assert writer.url == "http://127.0.0.1:8080/v4/spreadsheets/abc/values/Cotizaciones!A1:append"
+        assert writer.batch_size == 25
+        assert writer.spool_path == str(tmp_path / "spool.jsonl")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-sheets-writer-v1
+# version: 3.1.0
+# file: tests/test_sheets_writer.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
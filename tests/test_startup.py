@@ -0,0 +1,125 @@
+# AUTO-ATC Playbook v3 - Tests para el arranque del action server
+# Pruebas de startup.py, inicialización perezosa y readiness
+
+import pytest
+import sys
+import os
+import socket
+import subprocess
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+from startup import Warmup, wait_for_port
+from actions import DatabaseManager
+from unittest.mock import Mock, patch
+
+RASA_DIR = os.path.join(os.path.dirname(__file__), '..', 'rasa')
+
+
+class TestWarmup:
+    """Pruebas para Warmup"""
+
+    def test_not_ready_until_tasks_finish(self):
+        """Test que readiness pasa a True solo al terminar el warm-up"""
+        warmup = Warmup(import_seconds=0.2)
+        warmup.add("postgres", lambda: None)
+
+        assert warmup.status()["ready"] == False
+        assert warmup.status()["tasks"]["postgres"]["state"] == "pending"
+
+        warmup.run()
+
+        status = warmup.status()
+        assert status["ready"] == True
+        assert status["tasks"]["postgres"]["state"] == "ok"
+        assert status["import_seconds"] == 0.2
+
+    def test_failed_task_marks_degraded_but_ready(self):
+        """Test que una tarea fallida no bloquea la readiness y se reporta como degradada"""
+        warmup = Warmup()
+        warmup.add("qdrant", Mock(side_effect=ConnectionError("qdrant unreachable")))
+        warmup.add("embedder", lambda: None)
+
+        warmup.run()
+
+        status = warmup.status()
+        assert status["ready"] == True
+        assert status["degraded"] == ["qdrant"]
+        assert "unreachable" in status["tasks"]["qdrant"]["error"]
+        assert status["tasks"]["embedder"]["state"] == "ok"
+
+    def test_start_waits_for_server_bind(self):
+        """Test que el warm-up en segundo plano arranca cuando el puerto acepta conexiones"""
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        task = Mock()
+        warmup = Warmup()
+        warmup.add("task", task)
+
+        warmup.start(port=port, port_timeout=5)
+        assert not warmup.ready.wait(0.3)
+        task.assert_not_called()
+
+        listener.listen()
+        try:
+            assert warmup.ready.wait(5)
+        finally:
+            listener.close()
+        task.assert_called_once()
+
+    def test_wait_for_port_timeout(self):
+        """Test que wait_for_port devuelve False si nadie escucha"""
+        probe = socket.socket()
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+
+        assert wait_for_port("127.0.0.1", port, timeout=0.3, interval=0.05) == False
+
+
+class TestLazyInitialization:
+    """Pruebas de la inicialización perezosa de DatabaseManager"""
+
+    def test_qdrant_client_created_on_first_use(self):
+        """Test que el cliente de Qdrant no se crea en el constructor"""
+        db = DatabaseManager()
+        assert db._qdrant_client is None
+
+        with patch("qdrant_client.QdrantClient") as client_class:
+            client = db.qdrant_client
+            assert db.qdrant_client is client
+
+        client_class.assert_called_once_with(url=db.qdrant_url)
+
+    def test_warmup_tasks_cover_clients(self):
+        """Test que el warm-up precalienta pool, Qdrant, índice, snapshot del catálogo, embedder y Sheets"""
+        db = DatabaseManager()
+        names = [name for name, _ in db.warmup_tasks()]
+        assert names == ["postgres", "qdrant", "catalog_index", "catalog_snapshot", "embedder", "sheets_writer"]
+
+    def test_import_does_not_load_qdrant_client(self):
+        """Test que importar actions no importa qdrant_client ni conecta a servicios"""
+        code = (
+            "import sys, actions; "
+            "assert 'qdrant_client' not in sys.modules, 'qdrant_client imported'; "
+            "assert actions.warmup.import_seconds is not None; "
+            "assert actions.warmup.status()['ready'] is False"
+        )
+        env = dict(os.environ, ACTIONS_WARMUP="false", QDRANT_URL="http://127.0.0.1:9")
+        result = subprocess.run([sys.executable, "-c", code], cwd=RASA_DIR, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-startup-v1
+# version: 3.1.0
+# file: tests/test_startup.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite
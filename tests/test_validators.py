@@ -0,0 +1,81 @@
+# AUTO-ATC Playbook v3 - Tests para los validadores de input
+# Pruebas unitarias de validators.py
+
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'rasa'))
+
+import validators
+from validators import QuantityValidator, get_validator, register_validator, validate, validate_slots
+from unittest.mock import patch
+
+
+class TestValidators:
+    """Pruebas para los validadores por tipo"""
+
+    def test_text_strips_and_limits_length(self):
+        """Test texto con espacios en los extremos y longitud máxima"""
+        assert validate("  Laptop Dell  ") == True
+        assert validate("\n") == False
+        assert validate("a" * 500) == True
+        assert validate(" " + "a" * 500 + " ") == True
+        assert validate("a" * 501) == False
+
+    def test_non_string_values_are_invalid(self):
+        """Test que None y tipos no string no pasan como texto, email o teléfono"""
+        assert validate(None) == False
+        assert validate(12345678, "phone") == False
+        assert validate(["a@b.com"], "email") == False
+
+    def test_quantity_accepts_rasa_float_slots(self):
+        """Test que 2.0 (slot float de Rasa) y "2.0" son cantidades válidas"""
+        assert validate(2.0, "quantity") == True
+        assert validate("2.0", "quantity") == True
+        assert validate(" 7 ", "quantity") == True
+        assert validate(2.5, "quantity") == False
+        assert validate("nan", "quantity") == False
+        assert validate(True, "quantity") == False
+
+    def test_unknown_type_falls_back_to_text(self):
+        """Test que un tipo desconocido se valida como texto general"""
+        assert get_validator("comentario") is get_validator("text")
+        assert validate("<b>", "comentario") == False
+
+    def test_register_validator(self):
+        """Test registro de un validador nuevo"""
+        with patch.dict(validators._validators):
+            register_validator("units", QuantityValidator(1, 10))
+            assert validate("10", "units") == True
+            assert validate("11", "units") == False
+
+
+class TestValidateSlots:
+    """Pruebas para la validación batch de slots"""
+
+    def test_returns_invalid_slots_in_order(self):
+        """Test que se reportan todos los slots inválidos en orden de re-pregunta"""
+        slots = {"producto": "Laptop", "cantidad": "0", "email": "x", "telefono": "123"}
+        assert validate_slots(slots) == ["cantidad", "email", "telefono"]
+
+    def test_empty_slots_are_skipped(self):
+        """Test que los slots sin valor no se validan"""
+        assert validate_slots({"producto": "Laptop", "cantidad": None, "email": ""}) == []
+
+    def test_custom_slot_types(self):
+        """Test mapeo de slots propio"""
+        assert validate_slots({"mail": "a@b.com", "tel": "abc"}, {"mail": "email", "tel": "phone"}) == ["tel"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
+
+# EXPORT_SEAL v1
+# project: auto-atc
+# prompt_id: test-validators-v1
+# version: 3.1.0
+# file: tests/test_validators.py
+# lang: py
+# created_at: 2026-10-17T00:00:00Z
+# author: auto-atc-setup
+# origin: test-suite